@@ -0,0 +1,51 @@
+"""shard-safe item ids
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 10:12:31.418907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        # AUTOINCREMENT lets an item shard start its ids at its own range
+        with op.batch_alter_table(
+            "items", recreate="always", table_kwargs={"sqlite_autoincrement": True}
+        ):
+            pass
+    else:
+        op.alter_column("items", "id", existing_type=sa.Integer(), type_=sa.BigInteger())
+        op.alter_column(
+            "item_changes",
+            "item_id",
+            existing_type=sa.Integer(),
+            type_=sa.BigInteger(),
+            existing_nullable=False,
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        with op.batch_alter_table(
+            "items", recreate="always", table_kwargs={"sqlite_autoincrement": False}
+        ):
+            pass
+    else:
+        op.alter_column(
+            "item_changes",
+            "item_id",
+            existing_type=sa.BigInteger(),
+            type_=sa.Integer(),
+            existing_nullable=False,
+        )
+        op.alter_column("items", "id", existing_type=sa.BigInteger(), type_=sa.Integer())
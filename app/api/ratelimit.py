@@ -0,0 +1,55 @@
+from typing import Any, List, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.api.routing import add_response_headers
+from app.api.v1.auth import get_optional_user
+from app.core import ratelimit
+from app.core.config import settings
+from app.core.ratelimit import RATE_LIMITED, RateLimit
+from app.models import User as UserModel
+
+
+class RateLimiter:
+    """Dependency enforcing a token bucket ``limit`` on a router's requests.
+
+    Authenticated callers get a bucket per user id, anonymous ones (and every
+    caller when ``per_user`` is off) a bucket per client IP. Behind a proxy,
+    run uvicorn with ``--proxy-headers`` so the client IP is the real one.
+    Every response carries the RateLimit-* headers; rejected requests get a
+    429 with ``Retry-After``.
+    """
+
+    def __init__(self, name: str, limit: RateLimit, per_user: bool = True):
+        self.name = name
+        self.limit = limit
+        self.per_user = per_user
+
+    def key(self, request: Request, user: Optional[UserModel]) -> str:
+        if self.per_user and user is not None:
+            return f"{self.name}:user:{user.id}"
+        host = request.client.host if request.client else "unknown"
+        return f"{self.name}:ip:{host}"
+
+    async def __call__(
+        self,
+        request: Request,
+        user: Optional[UserModel] = Depends(get_optional_user),
+    ) -> None:
+        result = await ratelimit.rate_limit_backend.hit(self.key(request, user), self.limit)
+        if not result.allowed:
+            RATE_LIMITED.inc(limit=self.name)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers=result.headers(),
+            )
+        add_response_headers(request, result.headers())
+
+
+def rate_limit_dependencies(name: str, value: str, per_user: bool = True) -> List[Any]:
+    """Router dependencies enforcing a ``RATE_LIMIT_*`` setting, if it is set."""
+    limit = RateLimit.parse(value)
+    if not settings.RATE_LIMIT_ENABLED or limit is None:
+        return []
+    return [Depends(RateLimiter(name, limit, per_user))]
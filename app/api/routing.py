@@ -0,0 +1,144 @@
+import functools
+import inspect
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi import routing as fastapi_routing
+from fastapi.routing import APIRoute
+
+from app.core.database import release_sessions, session_scope
+from app.core.logs import current_request
+from app.core.serialization import (
+    MsgPackResponse,
+    is_msgpack,
+    msgpack_available,
+    prefers_msgpack,
+    unpackb,
+)
+
+
+def add_response_headers(request: Request, headers: Dict[str, str]) -> None:
+    """Headers for whatever response the route returns, set from a dependency.
+
+    Unlike headers set on an injected ``Response``, these also reach
+    responses the endpoint builds itself (streams, files, plain text).
+    """
+    request.state.response_headers = {
+        **getattr(request.state, "response_headers", {}),
+        **headers,
+    }
+
+
+def release_db_after(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap an endpoint so its database work finishes before serialization."""
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        try:
+            result = await endpoint(*args, **kwargs)
+        except BaseException:
+            await release_sessions(commit=False)
+            raise
+        await release_sessions()
+        return result
+
+    return wrapper
+
+
+class MsgPackRequest(Request):
+    """Request whose MessagePack body is read wherever a JSON body would be."""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = unpackb(await self.body())
+        return self._json
+
+
+def _as_json_request(request: Request) -> Request:
+    """Present a MessagePack request to FastAPI's body handling as JSON."""
+    headers = [
+        (name, value) for name, value in request.scope["headers"] if name != b"content-type"
+    ]
+    headers.append((b"content-type", b"application/json"))
+    return MsgPackRequest({**request.scope, "headers": headers}, request.receive)
+
+
+class AppRoute(APIRoute):
+    """Route class used by every API router.
+
+    Connections are handed back to the pool as soon as the endpoint returns,
+    instead of staying checked out while the response is serialized and sent.
+
+    Routes with a response model also speak MessagePack: request bodies sent
+    as ``application/msgpack`` are validated like JSON ones, and clients that
+    ask for it in ``Accept`` get the response model serialized as MessagePack.
+
+    Headers dependencies pass to ``add_response_headers`` are set on the
+    response, whatever its class.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, release_db_after(endpoint), **kwargs)
+
+    def _handler_state(self) -> Any:
+        """The route state FastAPI builds this route's handler from.
+
+        Newer FastAPI versions build handlers from a per-include copy of the
+        route rather than the route itself.
+        """
+        context_var = getattr(fastapi_routing, "_effective_route_context_var", None)
+        context = context_var.get() if context_var is not None else None
+        if context is not None and getattr(context, "original_route", None) is self:
+            return context
+        return self
+
+    def _msgpack_route_handler(
+        self,
+    ) -> Optional[Callable[[Request], Coroutine[Any, Any, Response]]]:
+        state = self._handler_state()
+        if not msgpack_available() or state.response_field is None:
+            return None
+        # Same handler, rendering the serialized response model as MessagePack
+        response_class = state.response_class
+        state.response_class = MsgPackResponse
+        try:
+            return super().get_route_handler()
+        finally:
+            state.response_class = response_class
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        original_route_handler = super().get_route_handler()
+        msgpack_route_handler = self._msgpack_route_handler()
+        has_body = self.body_field is not None
+        # With the prefixes of the routers it was included in
+        path_format = getattr(self._handler_state(), "path_format", self.path_format)
+
+        async def route_handler(request: Request) -> Response:
+            request_log = current_request.get()
+            if request_log is not None:
+                request_log.route = path_format
+            # Created before the MessagePack request copies the scope, so
+            # both share it
+            state = request.state
+            if has_body and is_msgpack(request.headers.get("content-type", "")):
+                if not msgpack_available():
+                    raise HTTPException(
+                        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail="MessagePack request bodies are not supported",
+                    )
+                request = _as_json_request(request)
+            handler = original_route_handler
+            if msgpack_route_handler is not None and prefers_msgpack(
+                request.headers.get("accept", "")
+            ):
+                handler = msgpack_route_handler
+            with session_scope():
+                response = await handler(request)
+            if msgpack_route_handler is not None:
+                response.headers.add_vary_header("Accept")
+            response.headers.update(getattr(state, "response_headers", {}))
+            return response
+
+        return route_handler
@@ -1,37 +1,54 @@
-from datetime import timedelta
+from datetime import UTC, datetime, timedelta
+from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.routing import AppRoute
+from app.core import revocation
 from app.core.config import settings
 from app.core.database import get_db
-from app.core.security import create_access_token, verify_token
+from app.core.revocation import family_key
+from app.core.security import create_token_pair, decode_token, verify_token
+from app.models import User as UserModel
 from app.repositories import UserRepository
-from app.schemas import Token, UserLogin
+from app.schemas import Token, TokenRefresh, UserLogin
 
-router = APIRouter()
+router = APIRouter(route_class=AppRoute)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
-):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+async def get_optional_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> Optional[UserModel]:
+    """The user the bearer token belongs to, or None without a valid one.
 
-    username = verify_token(token)
+    FastAPI caches it per request, so dependencies that only want to know who
+    is calling (like rate limits) share the lookup with ``get_current_user``.
+    """
+    if token is None:
+        return None
+    username = await verify_token(token)
     if username is None:
-        raise credentials_exception
-
+        return None
     user_repo = UserRepository(db)
-    user = await user_repo.get_by_username(username=username)
-    if user is None:
-        raise credentials_exception
+    return await user_repo.get_by_username(username=username)
 
+
+async def get_current_user(
+    # Rejects requests without a token and documents the security scheme
+    token: str = Depends(oauth2_scheme),
+    user: Optional[UserModel] = Depends(get_optional_user),
+):
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 
@@ -48,11 +65,7 @@ async def login_for_access_token(
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return create_token_pair(user.username)
 
 
 @router.post("/login", response_model=Token)
@@ -64,8 +77,66 @@ async def login(user_login: UserLogin, db: AsyncSession = Depends(get_db)):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
         )
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+    return create_token_pair(user.username)
+
+
+async def _revoke_session(db: AsyncSession, family: str) -> None:
+    """Revoke every token of a login session, for as long as any could live."""
+    expires_at = datetime.now(UTC) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    await revocation.token_denylist.revoke(db, family_key(family), expires_at)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(token_refresh: TokenRefresh, db: AsyncSession = Depends(get_db)):
+    """Exchange a refresh token for a new access and refresh token.
+
+    Refresh tokens are single use: the presented one is revoked and the new
+    one continues its session. Presenting a used refresh token again means it
+    was leaked or replayed, so the whole session is revoked.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    payload = decode_token(token_refresh.refresh_token)
+    if payload is None or payload["type"] != "refresh":
+        raise credentials_exception
+    if "jti" not in payload or "fam" not in payload:
+        raise credentials_exception
+
+    denylist = revocation.token_denylist
+    rotated = False
+    if not await denylist.is_revoked(None, payload["fam"]):
+        expires_at = datetime.fromtimestamp(payload["exp"], UTC)
+        try:
+            rotated = await denylist.revoke(db, payload["jti"], expires_at)
+        except IntegrityError:
+            # A concurrent refresh with the same token got there first
+            await db.rollback()
+    if not rotated:
+        await _revoke_session(db, payload["fam"])
+        await db.commit()
+        raise credentials_exception
+
+    user_repo = UserRepository(db)
+    user = await user_repo.get_by_username(username=payload["sub"])
+    if user is None or not user.is_active:
+        raise credentials_exception
+    return create_token_pair(user.username, family=payload["fam"])
+
+
+@router.post("/logout")
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """Revoke the session of the bearer token, including its refresh token."""
+    payload = decode_token(token)
+    if "fam" in payload:
+        await _revoke_session(db, payload["fam"])
+    elif "jti" in payload:
+        expires_at = datetime.fromtimestamp(payload["exp"], UTC)
+        await revocation.token_denylist.revoke(db, payload["jti"], expires_at)
+    return {"message": "Logged out successfully"}
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.api.routing import AppRoute
+from app.api.v1.auth import get_current_user
+from app.core.config import settings
+from app.core.database import release_sessions
+from app.core.profiling import ProfilerBusyError, profile_cpu, profile_memory
+from app.models import User as UserModel
+from app.schemas import MemoryProfile
+
+router = APIRouter(route_class=AppRoute)
+
+
+async def require_debug_access(current_user: UserModel = Depends(get_current_user)):
+    """Allow superusers only, and only with ``DEBUG_ENDPOINTS_ENABLED``."""
+    if not settings.DEBUG_ENDPOINTS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    # Profiles take a while; don't hold a database connection meanwhile
+    await release_sessions()
+    return current_user
+
+
+def _check_seconds(seconds: float) -> None:
+    if seconds > settings.DEBUG_MAX_SECONDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"seconds must be at most {settings.DEBUG_MAX_SECONDS:g}",
+        )
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def cpu_profile(
+    seconds: float = Query(10.0, gt=0),
+    current_user: UserModel = Depends(require_debug_access),
+):
+    """Sample this worker's threads for ``seconds`` (superusers only).
+
+    Returns collapsed stacks, one ``frame;frame;... count`` line per stack,
+    for flamegraph.pl, speedscope or inferno.
+    """
+    _check_seconds(seconds)
+    try:
+        return await profile_cpu(seconds, settings.DEBUG_PROFILE_INTERVAL)
+    except ProfilerBusyError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+
+
+@router.get("/memory", response_model=MemoryProfile)
+async def memory_profile(
+    seconds: float = Query(10.0, gt=0),
+    limit: int = Query(25, ge=1, le=500),
+    current_user: UserModel = Depends(require_debug_access),
+):
+    """The source lines whose allocations grew most over ``seconds`` (superusers only)."""
+    _check_seconds(seconds)
+    try:
+        return await profile_memory(seconds, limit)
+    except ProfilerBusyError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
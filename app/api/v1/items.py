@@ -1,15 +1,38 @@
-from typing import List, Optional
+import asyncio
+import logging
+from typing import AsyncIterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.routing import AppRoute
 from app.api.v1.auth import get_current_user
+from app.core.analytics import (
+    AnalyticsUnavailableError,
+    analytics_cache,
+    price_analytics,
+)
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.events import broker, format_sse
+from app.core.imports import ImportFormatError, detect_format, iter_lines, iter_records
 from app.models import User as UserModel
 from app.repositories import ItemRepository
-from app.schemas import ItemCreate, ItemResponse, ItemUpdate
+from app.schemas import (
+    ItemChangeFeed,
+    ItemCreate,
+    ItemImportError,
+    ItemImportReport,
+    ItemResponse,
+    ItemUpdate,
+    PriceAnalytics,
+)
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+router = APIRouter(route_class=AppRoute)
 
 
 @router.get("/", response_model=List[ItemResponse])
@@ -17,11 +40,23 @@ async def read_items(
     skip: int = 0,
     limit: int = 100,
     owner_id: Optional[int] = None,
+    include_owner: bool = True,
+    after: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
 ):
-    """Get all items (public endpoint)."""
+    """Get all items (public endpoint).
+
+    Items are ordered by id; pass the last id of a page as ``after`` to get
+    the next one, which stays cheap however deep the listing goes.
+    """
     item_repo = ItemRepository(db)
-    items = await item_repo.get_multi(skip=skip, limit=limit, owner_id=owner_id)
+    items = await item_repo.get_multi_rows(
+        skip=skip,
+        limit=limit,
+        owner_id=owner_id,
+        include_owner=include_owner,
+        after_id=after,
+    )
     return items
 
 
@@ -36,19 +71,193 @@ async def create_item(
     return await item_repo.create(item_create=item, owner_id=current_user.id)
 
 
+@router.post("/import", response_model=ItemImportReport)
+async def import_items(
+    request: Request,
+    format: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """Bulk import items from an NDJSON or CSV request body (requires authentication).
+
+    The body is read as a stream and valid rows are inserted in batches of
+    ``IMPORT_BATCH_SIZE``, each committed on its own; invalid rows are skipped
+    and reported. The format comes from ``format`` or the Content-Type header.
+    """
+    try:
+        fmt = detect_format(request.headers.get("content-type"), format)
+    except ImportFormatError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(exc)
+        ) from exc
+
+    item_repo = ItemRepository(db)
+    report = ItemImportReport()
+    batch: List[ItemCreate] = []
+
+    async def flush_batch():
+        report.imported += await item_repo.create_many(batch, owner_id=current_user.id)
+        report.batches += 1
+        await db.commit()
+        batch.clear()
+        logger.info(
+            "Item import for user %s: %d imported, %d failed",
+            current_user.id,
+            report.imported,
+            report.failed,
+        )
+
+    def record_error(line: int, errors: List[str]):
+        report.failed += 1
+        if len(report.errors) < settings.IMPORT_MAX_ERRORS:
+            report.errors.append(ItemImportError(line=line, errors=errors))
+        else:
+            report.errors_truncated = True
+
+    try:
+        async for line, record, error in iter_records(fmt, iter_lines(request.stream())):
+            if error is not None:
+                record_error(line, [error])
+                continue
+            try:
+                batch.append(ItemCreate.model_validate(record))
+            except ValidationError as exc:
+                record_error(
+                    line,
+                    [
+                        f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                        for err in exc.errors()
+                    ],
+                )
+                continue
+            if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                await flush_batch()
+    except ImportFormatError as exc:
+        # Rows parsed before the stream became unreadable are still imported
+        record_error(0, [str(exc)])
+    if batch:
+        await flush_batch()
+    return report
+
+
 @router.get("/my-items", response_model=List[ItemResponse])
 async def read_my_items(
     skip: int = 0,
     limit: int = 100,
+    include_owner: bool = True,
     db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(get_current_user),
 ):
     """Get current user's items."""
     item_repo = ItemRepository(db)
-    items = await item_repo.get_multi(skip=skip, limit=limit, owner_id=current_user.id)
+    items = await item_repo.get_multi_rows(
+        skip=skip, limit=limit, owner_id=current_user.id, include_owner=include_owner
+    )
     return items
 
 
+@router.get("/changes", response_model=ItemChangeFeed)
+async def read_item_changes(
+    since: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    shard: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get items created, updated or deleted after a cursor (public endpoint).
+
+    Pass the returned ``cursor`` as ``since`` on the next call to sync
+    incrementally; deletes are reported with ``item`` set to null. With
+    items sharded, each of the ``shard_count`` shards has its own feed.
+
+    Change ids can commit out of order, so the feed holds back changes past
+    a missing id for up to ``CHANGE_FEED_GAP_SECONDS``, until the write
+    holding it commits or is taken to have rolled back.
+    """
+    item_repo = ItemRepository(db)
+    shard_count = len(item_repo.shards.item_shards)
+    if shard >= shard_count:
+        raise HTTPException(status_code=400, detail="Unknown shard")
+    changes, cursor, has_more = await item_repo.get_changes(
+        since=since, limit=limit, shard=shard
+    )
+    return {
+        "changes": changes,
+        "cursor": cursor,
+        "has_more": has_more,
+        "shard": shard,
+        "shard_count": shard_count,
+    }
+
+
+@router.get("/analytics", response_model=PriceAnalytics)
+async def read_item_analytics(
+    owner_id: Optional[int] = None,
+    bins: int = Query(20, ge=1, le=1000),
+    percentiles: List[float] = Query([50, 90, 95, 99]),
+    owner_limit: int = Query(20, ge=0, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """Get the price distribution of items (requires authentication).
+
+    Results are cached for ``ANALYTICS_CACHE_SECONDS``; ``generated_at`` tells
+    when they were computed.
+    """
+    if not all(0 <= percentile <= 100 for percentile in percentiles):
+        raise HTTPException(status_code=400, detail="Percentiles must be between 0 and 100")
+    key = (owner_id, bins, tuple(percentiles), owner_limit)
+    try:
+        return await analytics_cache.get_or_compute(
+            key,
+            lambda: price_analytics(
+                db,
+                owner_id=owner_id,
+                bins=bins,
+                percentiles=percentiles,
+                owner_limit=owner_limit,
+            ),
+        )
+    except AnalyticsUnavailableError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc)
+        ) from exc
+
+
+async def _item_event_stream(owner_id: int) -> AsyncIterator[str]:
+    subscription = broker.subscribe(lambda event: event["owner_id"] == owner_id)
+    try:
+        while True:
+            try:
+                event = await subscription.get(timeout=settings.SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                if subscription.dropped:
+                    # Fell behind; the client should resync from the change feed
+                    yield "event: overflow\ndata: {}\n\n"
+                return
+            yield format_sse(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream_my_items(current_user: UserModel = Depends(get_current_user)):
+    """Push changes to the current user's items as server-sent events.
+
+    Each event id is a change feed cursor, so a reconnecting client can catch
+    up through ``/changes?shard=<event shard>&since=<last event id>``. Bulk
+    imports send one ``item.imported`` event per batch, whose items are read
+    the same way from its ``since`` cursor.
+    """
+    return StreamingResponse(
+        _item_event_stream(current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{item_id}", response_model=ItemResponse)
 async def read_item(
     item_id: int,
@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.routing import AppRoute
+from app.api.v1.auth import get_current_user
+from app.core.database import get_db
+from app.core.jobs import job_runner
+from app.models import Job
+from app.models import User as UserModel
+from app.repositories import JobRepository
+from app.schemas import JobCreate, JobResponse
+
+router = APIRouter(route_class=AppRoute)
+
+
+def _job_response(job: Job) -> JobResponse:
+    response = JobResponse.model_validate(job)
+    if job.status == "succeeded" and job.result_path:
+        response.result_url = f"/api/v1/jobs/{job.id}/result"
+    return response
+
+
+async def _get_own_job(job_id: str, db: AsyncSession, current_user: UserModel) -> Job:
+    job_repo = JobRepository(db)
+    db_job = await job_repo.get_by_id(job_id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if db_job.owner_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return db_job
+
+
+@router.post("/", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    job_create: JobCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """Submit a background job (requires authentication)."""
+    if job_create.kind not in job_runner.handlers:
+        raise HTTPException(status_code=400, detail="Unknown job kind")
+    if job_create.kind in job_runner.superuser_only and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
+    job_repo = JobRepository(db)
+    db_job = await job_repo.create(
+        kind=job_create.kind, params=job_create.params, owner_id=current_user.id
+    )
+    # The runner uses its own session, so the job must be committed first
+    await db.commit()
+    job_runner.submit(db_job.id)
+    return _job_response(db_job)
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def read_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """Get the status of a job (only the submitter or a superuser)."""
+    return _job_response(await _get_own_job(job_id, db, current_user))
+
+
+@router.get("/{job_id}/result")
+async def read_job_result(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """Download the result file of a finished job."""
+    db_job = await _get_own_job(job_id, db, current_user)
+    if db_job.status != "succeeded" or not db_job.result_path:
+        raise HTTPException(status_code=404, detail="Job result not available")
+    path = job_runner.result_dir / db_job.result_path
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Job result not available")
+    return FileResponse(path, filename=db_job.result_path)
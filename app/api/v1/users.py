@@ -3,13 +3,14 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.routing import AppRoute
 from app.api.v1.auth import get_current_user
 from app.core.database import get_db
 from app.models import User as UserModel
-from app.repositories import UserRepository
-from app.schemas import UserCreate, UserResponse, UserUpdate
+from app.repositories import UserItemStatsRepository, UserRepository
+from app.schemas import UserCreate, UserItemStatsResponse, UserResponse, UserUpdate
 
-router = APIRouter()
+router = APIRouter(route_class=AppRoute)
 
 
 @router.get("/", response_model=List[UserResponse])
@@ -54,6 +55,30 @@ async def read_user_me(current_user: UserModel = Depends(get_current_user)):
     return current_user
 
 
+@router.get("/me/stats", response_model=UserItemStatsResponse)
+async def read_user_me_stats(
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """Get item statistics for the current user."""
+    stats_repo = UserItemStatsRepository(db)
+    return await stats_repo.get(current_user.id)
+
+
+@router.get("/{user_id}/stats", response_model=UserItemStatsResponse)
+async def read_user_stats(
+    user_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """Get item statistics for a specific user."""
+    stats_repo = UserItemStatsRepository(db)
+    stats = await stats_repo.get(user_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return stats
+
+
 @router.get("/{user_id}", response_model=UserResponse)
 async def read_user(
     user_id: int,
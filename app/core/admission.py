@@ -0,0 +1,190 @@
+import asyncio
+import json
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Optional, Sequence
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.metrics import Counter, Gauge, Histogram
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "http_admission_in_flight", "Requests being handled", ["route_class"]
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "http_admission_queue_depth", "Requests waiting to be admitted", ["route_class"]
+)
+ADMISSION_QUEUE_SECONDS = Histogram(
+    "http_admission_queue_seconds",
+    "Time admitted requests waited in the queue",
+    ["route_class"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+ADMISSION_SHED = Counter(
+    "http_admission_shed_total",
+    "Requests rejected with 503 because of overload",
+    ["route_class", "reason"],
+)
+
+
+@dataclass
+class RouteClass:
+    """Concurrency budget for the requests under some path prefixes.
+
+    At most ``limit`` requests run at once; up to ``max_queue`` more wait for
+    a slot, each for at most ``queue_timeout`` seconds.
+    """
+
+    name: str
+    prefixes: Sequence[str]
+    limit: int
+    max_queue: int
+    queue_timeout: float
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class ConcurrencyLimiter:
+    """FIFO concurrency limiter with a bounded, time-limited wait queue.
+
+    A released slot is handed straight to the oldest waiter, so queued
+    requests can't be overtaken by new arrivals.
+    """
+
+    def __init__(self, route_class: RouteClass):
+        self.route_class = route_class
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        """Take a slot, or raise Overloaded if none frees up within budget."""
+        route_class = self.route_class
+        if self.in_flight < route_class.limit and not self._waiters:
+            self.in_flight += 1
+            ADMISSION_IN_FLIGHT.inc(route_class=route_class.name)
+            ADMISSION_QUEUE_SECONDS.observe(0.0, route_class=route_class.name)
+            return
+        if len(self._waiters) >= route_class.max_queue:
+            raise Overloaded("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUE_DEPTH.inc(route_class=route_class.name)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), route_class.queue_timeout)
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                raise Overloaded("queue_timeout") from None
+            # A slot was handed over just as the budget ran out; use it
+        except asyncio.CancelledError:
+            if self._abandon(waiter):
+                self.release()
+            raise
+        ADMISSION_QUEUE_SECONDS.observe(time.perf_counter() - start, route_class=route_class.name)
+
+    def _abandon(self, waiter: asyncio.Future) -> bool:
+        """Stop waiting; returns whether a slot had already been handed over."""
+        if waiter.done():
+            return True
+        waiter.cancel()
+        self._waiters.remove(waiter)
+        ADMISSION_QUEUE_DEPTH.dec(route_class=self.route_class.name)
+        return False
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            ADMISSION_QUEUE_DEPTH.dec(route_class=self.route_class.name)
+            if not waiter.done():
+                # The slot passes to the waiter, in_flight stays the same
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.dec(route_class=self.route_class.name)
+
+
+class AdmissionMiddleware:
+    """Shed load with a fast 503 instead of queueing without bound.
+
+    Each request is matched to the route class with the longest matching path
+    prefix (``default`` otherwise) and admitted under that class's limits.
+    Requests that can't get a slot within the class's queue budget get a 503
+    with ``Retry-After``. Paths under ``exempt_prefixes`` (health checks,
+    metrics, long-lived event streams) bypass admission.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        default: RouteClass,
+        route_classes: Sequence[RouteClass] = (),
+        exempt_prefixes: Sequence[str] = (),
+        retry_after: int = 1,
+    ):
+        self.app = app
+        self.limiters = {
+            route_class.name: ConcurrencyLimiter(route_class)
+            for route_class in (default, *route_classes)
+        }
+        self.default = self.limiters[default.name]
+        # Longest prefix first, so the most specific class wins
+        self.prefixes = sorted(
+            (
+                (prefix, self.limiters[route_class.name])
+                for route_class in route_classes
+                for prefix in route_class.prefixes
+            ),
+            key=lambda entry: len(entry[0]),
+            reverse=True,
+        )
+        self.exempt_prefixes = tuple(exempt_prefixes)
+        self.retry_after = retry_after
+
+    def limiter_for(self, path: str) -> Optional[ConcurrencyLimiter]:
+        if path.startswith(self.exempt_prefixes):
+            return None
+        for prefix, limiter in self.prefixes:
+            if path.startswith(prefix):
+                return limiter
+        return self.default
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limiter = self.limiter_for(scope["path"])
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await limiter.acquire()
+        except Overloaded as exc:
+            ADMISSION_SHED.inc(route_class=limiter.route_class.name, reason=exc.reason)
+            await self._reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    async def _reject(self, send: Send) -> None:
+        body = json.dumps({"detail": "Server is overloaded, please retry later"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
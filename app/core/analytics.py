@@ -0,0 +1,96 @@
+import asyncio
+from datetime import UTC, datetime
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.repositories import ItemRepository, UserItemStatsRepository
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+class AnalyticsUnavailableError(RuntimeError):
+    """Raised when the optional analytics dependencies are not installed."""
+
+
+# Recent results by (owner_id, bins, percentiles, owner_limit)
+analytics_cache = TTLCache(ttl=settings.ANALYTICS_CACHE_SECONDS)
+
+
+def _percentile_key(percentile: float) -> str:
+    return f"p{percentile:g}"
+
+
+async def price_analytics(
+    db: AsyncSession,
+    owner_id: Optional[int] = None,
+    bins: int = 20,
+    percentiles: Sequence[float] = (50, 90, 95, 99),
+    owner_limit: int = 20,
+) -> Dict[str, Any]:
+    """Compute the price distribution of items, of one owner's if given.
+
+    Count, sum, min and max come from database aggregates, as do percentiles
+    where the database supports ``percentile_cont``. The price column is then
+    streamed in ``ANALYTICS_CHUNK_SIZE`` chunks into NumPy arrays and binned
+    chunk by chunk; only without database percentiles are the chunks kept
+    (8 bytes per priced item) to compute them.
+    """
+    if np is None:
+        raise AnalyticsUnavailableError("Price analytics requires the 'numpy' package")
+
+    item_repo = ItemRepository(db)
+    summary = await item_repo.get_price_summary(owner_id)
+    db_percentiles = await item_repo.get_price_percentiles(percentiles, owner_id)
+
+    low, high = summary["min"], summary["max"]
+    if summary["priced_count"]:
+        edges = np.histogram_bin_edges(np.empty(0), bins=bins, range=(low, high))
+    else:
+        edges = np.empty(0)
+    counts = np.zeros(max(len(edges) - 1, 0), dtype=np.int64)
+    chunks = [] if db_percentiles is None else None
+    async for prices in item_repo.stream_prices(
+        owner_id, chunk_size=settings.ANALYTICS_CHUNK_SIZE
+    ):
+        chunk = np.fromiter(prices, dtype=np.int64, count=len(prices))
+        if counts.size:
+            # Prices written since the summary was taken go in the outer bins
+            counts += np.histogram(np.clip(chunk, low, high), bins=edges)[0]
+        if chunks is not None:
+            chunks.append(chunk)
+
+    if db_percentiles is not None:
+        values = db_percentiles
+    elif chunks:
+        prices = np.concatenate(chunks)
+        values = (await asyncio.to_thread(np.percentile, prices, percentiles)).tolist()
+    else:
+        values = [None] * len(percentiles)
+
+    owners = await UserItemStatsRepository(db).get_top_by_value(owner_limit, owner_id)
+    return {
+        **summary,
+        "mean": summary["total"] / summary["priced_count"] if summary["priced_count"] else None,
+        "percentiles": {
+            _percentile_key(percentile): value
+            for percentile, value in zip(percentiles, values)
+        },
+        "histogram": {"edges": edges.tolist(), "counts": counts.tolist()},
+        "owners": [
+            {
+                "owner_id": stats.user_id,
+                "item_count": stats.item_count,
+                "price_sum": stats.price_sum,
+                "price_min": stats.price_min,
+                "price_max": stats.price_max,
+            }
+            for stats in owners
+        ],
+        "generated_at": datetime.now(UTC),
+    }
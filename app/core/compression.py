@@ -0,0 +1,268 @@
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import Counter
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSION_BYTES_IN = Counter(
+    "http_compression_bytes_in_total", "Response bytes before compression", ["encoding"]
+)
+COMPRESSION_BYTES_OUT = Counter(
+    "http_compression_bytes_out_total", "Response bytes after compression", ["encoding"]
+)
+
+COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/msgpack",
+    "application/x-msgpack",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+}
+# Server-sent events are delivered message by message and read by clients
+# and proxies that often don't expect an encoded stream
+UNCOMPRESSED_TYPES = {"text/event-stream"}
+
+
+class Encoder(ABC):
+    """Incremental compressor for one response body."""
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes: ...
+
+    @abstractmethod
+    def flush(self) -> bytes:
+        """Emit everything compressed so far, keeping the stream open."""
+
+    @abstractmethod
+    def finish(self) -> bytes: ...
+
+
+class GzipEncoder(Encoder):
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder(Encoder):
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder(Encoder):
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+DEFAULT_LEVELS = {"gzip": 6, "br": 4, "zstd": 3}
+ENCODERS = {"gzip": GzipEncoder}
+if brotli is not None:
+    ENCODERS["br"] = BrotliEncoder
+if zstandard is not None:
+    ENCODERS["zstd"] = ZstdEncoder
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Map each coding in an Accept-Encoding header to its q-value."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(header: str, encodings: Sequence[str]) -> Optional[str]:
+    """Pick the client's most preferred of ``encodings`` (in server order on ties)."""
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    if not media_type or media_type in UNCOMPRESSED_TYPES:
+        return False
+    return (
+        media_type.startswith("text/")
+        or media_type.endswith(("/json", "+json"))
+        or media_type in COMPRESSIBLE_TYPES
+    )
+
+
+class CompressionMiddleware:
+    """Compress response bodies with the best encoding the client accepts.
+
+    Complete bodies smaller than ``minimum_size`` go out as they are. Streamed
+    bodies are compressed as they arrive and flushed after every chunk, so
+    clients keep receiving data as it is produced. Server-sent events and
+    responses that already have a Content-Encoding are passed through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        encodings: Sequence[str] = ("zstd", "br", "gzip"),
+        levels: Optional[Dict[str, int]] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        # Only the encodings whose libraries are installed
+        self.encodings = [encoding for encoding in encodings if encoding in ENCODERS]
+        self.levels = {**DEFAULT_LEVELS, **(levels or {})}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), self.encodings
+        )
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(
+        self, middleware: CompressionMiddleware, encoding: Optional[str], send: Send
+    ):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message: Optional[Message] = None
+        self.encoder: Optional[Encoder] = None
+        # None until the first body message decides
+        self.compressing: Optional[bool] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.downstream(message)
+            return
+
+        if self.compressing is None:
+            await self._start(message)
+            return
+        if not self.compressing:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        chunk = self.encoder.compress(body)
+        chunk += self.encoder.flush() if more_body else self.encoder.finish()
+        self._count(body, chunk, done=not more_body)
+        await self.downstream(
+            {"type": "http.response.body", "body": chunk, "more_body": more_body}
+        )
+
+    async def _start(self, message: Message) -> None:
+        headers = MutableHeaders(scope=self.start_message)
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        compressible = (
+            self.start_message["status"] not in (204, 206, 304)
+            and "content-encoding" not in headers
+            and is_compressible(headers.get("content-type", ""))
+        )
+        if compressible:
+            headers.add_vary_header("Accept-Encoding")
+        self.compressing = (
+            compressible
+            and self.encoding is not None
+            and (more_body or len(body) >= self.middleware.minimum_size)
+        )
+        if not self.compressing:
+            await self.downstream(self.start_message)
+            await self.downstream(message)
+            return
+
+        self.encoder = ENCODERS[self.encoding](self.middleware.levels[self.encoding])
+        headers["Content-Encoding"] = self.encoding
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # The encoded body is a different representation
+            headers["ETag"] = f"W/{etag}"
+        chunk = self.encoder.compress(body)
+        if more_body:
+            chunk += self.encoder.flush()
+            del headers["Content-Length"]
+        else:
+            chunk += self.encoder.finish()
+            headers["Content-Length"] = str(len(chunk))
+        self._count(body, chunk, done=not more_body)
+        await self.downstream(self.start_message)
+        await self.downstream(
+            {"type": "http.response.body", "body": chunk, "more_body": more_body}
+        )
+
+    def _count(self, body: bytes, chunk: bytes, done: bool) -> None:
+        self.bytes_in += len(body)
+        self.bytes_out += len(chunk)
+        if done:
+            COMPRESSION_BYTES_IN.inc(self.bytes_in, encoding=self.encoding)
+            COMPRESSION_BYTES_OUT.inc(self.bytes_out, encoding=self.encoding)
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    """Compress a whole payload, as the middleware does for complete bodies."""
+    encoder = ENCODERS[encoding](level)
+    return encoder.compress(data) + encoder.finish()
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Any, Dict, List, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -9,15 +9,193 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "info"
     HOST: str = "127.0.0.1"
     PORT: int = 8000
+    METRICS_ENABLED: bool = True
 
     # Database
     DATABASE_TYPE: str = "sqlite"
     DATABASE_URL: str = "sqlite:///./app.db"
+    DB_QUERY_CACHE_SIZE: int = 500
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    # Databases for items, sharded by owner; empty keeps items in DATABASE_URL
+    ITEM_SHARD_URLS: List[str] = []
 
     # Security
     SECRET_KEY: str = "your-super-secret-key-change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+
+    # Token signing: HS256 signs with SECRET_KEY; with ALGORITHM "ES256"
+    # (P-256) or "EdDSA" (Ed25519), tokens are signed with the PEM
+    # JWT_PRIVATE_KEY and verified with JWT_PUBLIC_KEY, so services that only
+    # verify tokens need just the public key. Verified tokens are cached
+    # until they expire, up to TOKEN_CACHE_SIZE of them (0 disables).
+    JWT_PRIVATE_KEY: Optional[str] = None
+    JWT_PUBLIC_KEY: Optional[str] = None
+    TOKEN_CACHE_SIZE: int = 10_000
+
+    # Revoked tokens: each worker keeps a Bloom filter of the revocation list,
+    # sized for this many entries at this false positive rate (positives are
+    # confirmed in the database), and picks up other workers' revocations
+    # every TOKEN_DENYLIST_SYNC_SECONDS
+    TOKEN_DENYLIST_CAPACITY: int = 100_000
+    TOKEN_DENYLIST_ERROR_RATE: float = 0.001
+    TOKEN_DENYLIST_SYNC_SECONDS: float = 5.0
+
+    # Password hashing: new hashes use the first scheme ("bcrypt" or
+    # "argon2", i.e. argon2id, which needs the "argon2" extra); hashes in
+    # the other listed schemes or with other costs are upgraded on login,
+    # e.g. ["argon2", "bcrypt"] migrates bcrypt users to argon2id
+    PASSWORD_SCHEMES: List[str] = ["bcrypt"]
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_COST: int = 65536  # KiB
+    PASSWORD_ARGON2_PARALLELISM: int = 4
+
+    # Item change events (set EVENT_BROKER_URL=redis://... for multiple workers)
+    EVENT_BROKER_URL: Optional[str] = None
+    EVENT_BROKER_CHANNEL: str = "item-events"
+    EVENT_QUEUE_SIZE: int = 100
+    SSE_KEEPALIVE_SECONDS: float = 15.0
+    # The change feed waits this long for a missing change id, which may
+    # belong to a write still committing, before reading past it
+    CHANGE_FEED_GAP_SECONDS: float = 60.0
+
+    # Bulk item import
+    IMPORT_BATCH_SIZE: int = 500
+    IMPORT_MAX_ERRORS: int = 100
+    IMPORT_MAX_LINE_LENGTH: int = 1_048_576
+
+    # Background jobs; the worker running a job renews its lease of
+    # JOB_LEASE_SECONDS as it goes, and a job whose lease lapses is taken to
+    # belong to a worker that died, and runs again
+    JOB_WORKERS: int = 2
+    JOB_QUEUE_SIZE: int = 100
+    JOB_POLL_SECONDS: float = 5.0
+    JOB_LEASE_SECONDS: float = 300.0
+    JOB_RESULT_DIR: str = "./job_results"
+
+    # Price analytics (NumPy is required, see the "analytics" extra)
+    ANALYTICS_CHUNK_SIZE: int = 100_000
+    ANALYTICS_CACHE_SECONDS: float = 60.0
+
+    # Columnar snapshots of users and items (pyarrow is required, see the
+    # "snapshots" extra); "parquet" or "arrow" (Arrow IPC)
+    SNAPSHOT_DIR: str = "./snapshots"
+    SNAPSHOT_FORMAT: str = "parquet"
+    SNAPSHOT_CHUNK_SIZE: int = 50_000
+    SNAPSHOT_PARTITION_ROWS: int = 1_000_000
+
+    # Response compression (brotli and zstd need the "compression" extra)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    # Server preference when the client accepts several equally
+    COMPRESSION_ENCODINGS: List[str] = ["zstd", "br", "gzip"]
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_LEVEL: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # Admission control: concurrent requests and how many may queue, and for
+    # how long, before the rest are shed with a 503. Auth routes hash
+    # passwords with bcrypt, so they get a tighter budget of their own.
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_LIMIT: int = 100
+    ADMISSION_MAX_QUEUE: int = 200
+    ADMISSION_QUEUE_SECONDS: float = 2.0
+    ADMISSION_AUTH_PATHS: List[str] = ["/api/v1/auth/"]
+    ADMISSION_AUTH_LIMIT: int = 8
+    ADMISSION_AUTH_MAX_QUEUE: int = 32
+    ADMISSION_AUTH_QUEUE_SECONDS: float = 1.0
+    ADMISSION_EXEMPT_PATHS: List[str] = [
+        "/health",
+        "/metrics",
+        "/debug/",
+        "/api/v1/items/stream",
+    ]
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # Rate limits per router as "<count>/<second|minute|hour|day>" token
+    # buckets, per user when authenticated and per client IP otherwise (auth
+    # is always per IP); empty disables a limit. Buckets live in memory
+    # unless RATE_LIMIT_STORAGE_URL=redis://... is set for multiple workers.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORAGE_URL: Optional[str] = None
+    RATE_LIMIT_MEMORY_SHARDS: int = 16
+    RATE_LIMIT_AUTH: str = "10/minute"
+    RATE_LIMIT_USERS: str = "120/minute"
+    RATE_LIMIT_ITEMS: str = "300/minute"
+    RATE_LIMIT_JOBS: str = "30/minute"
+
+    # HTTP caching of public routes: Cache-Control policies by route path
+    # (with typed placeholders, so /items/stream isn't an item), as
+    # CachePolicy arguments (max_age and stale_while_revalidate in
+    # seconds, vary: request headers the response depends on). Responses are
+    # also cached in process for up to RESPONSE_CACHE_SECONDS, cleared
+    # whenever items change.
+    HTTP_CACHE_POLICIES: Dict[str, Dict[str, Any]] = {
+        "/api/v1/items/": {"max_age": 5, "stale_while_revalidate": 30, "vary": ["Accept"]},
+        "/api/v1/items/{item_id:int}": {
+            "max_age": 30,
+            "stale_while_revalidate": 60,
+            "vary": ["Accept"],
+        },
+    }
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_SECONDS: float = 30.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+
+    # Idempotency-Key support for POSTs to these exact paths: the first
+    # response is stored for IDEMPOTENCY_TTL_SECONDS and replayed to retries.
+    # A retry arriving while the first request runs waits up to
+    # IDEMPOTENCY_WAIT_SECONDS for it; a claim left by a crashed worker
+    # lapses after IDEMPOTENCY_LOCK_SECONDS.
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_PATHS: List[str] = ["/api/v1/items/", "/api/v1/users/"]
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_SECONDS: int = 60
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+
+    # Event loop monitoring: lag is measured every LOOP_MONITOR_INTERVAL
+    # seconds, and the stack of code blocking the loop for longer than
+    # LOOP_BLOCK_THRESHOLD_SECONDS is logged
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL: float = 0.1
+    LOOP_BLOCK_THRESHOLD_SECONDS: float = 0.25
+
+    # Structured logs: JSON access and query logs are queued and written to
+    # stdout by a background thread, dropping records if LOG_QUEUE_SIZE are
+    # waiting. The sample rates are the share of records written; 5xx
+    # responses and requests or queries slower than the *_SLOW_SECONDS
+    # thresholds always are. Each log writes at most
+    # LOG_MAX_RECORDS_PER_SECOND records a second (0: no cap). Query logs
+    # replace SQLAlchemy's echo, and DEBUG turns them on.
+    ACCESS_LOG_ENABLED: bool = True
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    ACCESS_LOG_SLOW_SECONDS: float = 1.0
+    ACCESS_LOG_EXCLUDE_PATHS: List[str] = ["/health", "/metrics"]
+    QUERY_LOG_ENABLED: bool = False
+    QUERY_LOG_SAMPLE_RATE: float = 1.0
+    QUERY_LOG_SLOW_SECONDS: float = 0.1
+    LOG_MAX_RECORDS_PER_SECOND: int = 0
+    LOG_QUEUE_SIZE: int = 10000
+
+    # Readiness (/health/ready): a SELECT 1 on every database, plus the
+    # migration revision, cached for READINESS_CACHE_SECONDS and failed
+    # after READINESS_PROBE_TIMEOUT seconds. A worker is also unready with
+    # this share of a pool's connections checked out, or of an admission
+    # queue filled.
+    READINESS_CACHE_SECONDS: float = 1.0
+    READINESS_PROBE_TIMEOUT: float = 2.0
+    READINESS_MAX_POOL_SATURATION: float = 1.0
+    READINESS_MAX_QUEUE_FRACTION: float = 0.5
+
+    # Superuser-only profiling of a live worker: /debug/profile samples
+    # stacks every DEBUG_PROFILE_INTERVAL seconds, /debug/memory diffs
+    # tracemalloc snapshots. One profile runs at a time, for at most
+    # DEBUG_MAX_SECONDS.
+    DEBUG_ENDPOINTS_ENABLED: bool = False
+    DEBUG_PROFILE_INTERVAL: float = 0.01
+    DEBUG_MAX_SECONDS: float = 60.0
 
     # CORS
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8080"]
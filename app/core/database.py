@@ -1,9 +1,35 @@
+import time
 from collections.abc import AsyncGenerator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import ForeignKeyConstraint, MetaData, event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_session,
+    create_async_engine,
+)
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 from app.core.config import settings
+from app.core.logs import instrument_queries
+from app.core.metrics import Counter, Gauge, Histogram
+
+DB_POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool", ["database"]
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool", ["database"]
+)
+DB_POOL_HOLD_SECONDS = Histogram(
+    "db_pool_connection_hold_seconds",
+    "Time a connection is held between checkout and checkin",
+    ["database"],
+)
 
 
 # Create database URL based on type
@@ -35,24 +61,232 @@ def get_database_url() -> str:
 # Database URL
 DATABASE_URL = get_database_url()
 
+
+def get_async_url(url: str) -> str:
+    """Switch a database URL to the async driver for its scheme."""
+    for sync_prefix, async_prefix in (
+        ("sqlite:///", "sqlite+aiosqlite:///"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("mysql://", "mysql+aiomysql://"),
+        ("mysql+pymysql://", "mysql+aiomysql://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+def get_engine_options(url: str) -> dict:
+    """Get the keyword arguments used to create the async engine for a URL."""
+    options = {
+        # Queries are logged by app.core.logs, off the event loop
+        "future": True,
+        # Size of SQLAlchemy's compiled-statement cache
+        "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+    }
+    if url.startswith("postgresql+asyncpg://"):
+        # asyncpg prepares every statement; keep the per-connection cache warm
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+        }
+    return options
+
+
 # Create async engine
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=settings.DEBUG,
-    future=True,
-)
+engine = create_async_engine(DATABASE_URL, **get_engine_options(DATABASE_URL))
+
+
+def instrument_pool(engine: AsyncEngine, database: str = "default") -> None:
+    """Export checkout counts and connection hold times for an engine's pool."""
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        DB_POOL_CHECKOUTS.inc(database=database)
+        DB_POOL_CHECKED_OUT.inc(database=database)
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is None:
+            return
+        DB_POOL_CHECKED_OUT.dec(database=database)
+        DB_POOL_HOLD_SECONDS.observe(
+            time.perf_counter() - checked_out_at, database=database
+        )
+
+
+instrument_pool(engine)
+instrument_queries(engine)
+
+DEFAULT_SHARD = "default"
+# Tables that live on the item shard of their owner
+SHARDED_TABLES = ("items", "item_changes", "user_item_stats")
+# Item shard i hands out item ids from i << SHARD_ID_BITS upwards
+SHARD_ID_BITS = 40
+
+
+class ShardRouter:
+    """Routes item data to databases ("shards") by owner.
+
+    Users, jobs and all other tables stay in the default database. An owner's
+    items, their change log and the owner's item stats live on item shard
+    ``owner_id % N``; without ``ITEM_SHARD_URLS`` the default database is the
+    only item shard and sessions are not sharded at all.
+
+    Item shard ``i`` allocates item ids from ``i << SHARD_ID_BITS`` (see
+    ``create_tables``), so an item id alone tells which shard holds it, and
+    ids stay below 2**53 for JSON clients. Owners are placed by modulo, so
+    changing the number of shards means moving data.
+    """
+
+    def __init__(
+        self, default_engine: AsyncEngine, item_engines: Sequence[AsyncEngine] = ()
+    ):
+        self.engines: Dict[str, AsyncEngine] = {DEFAULT_SHARD: default_engine}
+        if item_engines:
+            self.item_shards = [f"items{index}" for index in range(len(item_engines))]
+            self.engines.update(zip(self.item_shards, item_engines))
+        else:
+            self.item_shards = [DEFAULT_SHARD]
+
+    @property
+    def colocated(self) -> bool:
+        """Whether items share the default database with users."""
+        return self.item_shards == [DEFAULT_SHARD]
+
+    def index_for_owner(self, owner_id: Optional[int]) -> int:
+        return (owner_id or 0) % len(self.item_shards)
+
+    def for_owner(self, owner_id: Optional[int]) -> str:
+        return self.item_shards[self.index_for_owner(owner_id)]
+
+    def for_item(self, item_id: int) -> str:
+        return self.item_shards[(item_id >> SHARD_ID_BITS) % len(self.item_shards)]
+
+    def shard_chooser(self, mapper, instance, clause=None) -> str:
+        table = mapper.local_table.name if mapper is not None else None
+        if table not in SHARDED_TABLES:
+            return DEFAULT_SHARD
+        if instance is None:
+            return self.item_shards[0]
+        if table == "items" and instance.id is not None:
+            return self.for_item(instance.id)
+        if table == "user_item_stats":
+            return self.for_owner(instance.user_id)
+        return self.for_owner(instance.owner_id)
+
+    def identity_chooser(self, mapper, primary_key, **kw) -> List[str]:
+        table = mapper.local_table.name
+        if table == "items":
+            return [self.for_item(primary_key[0])]
+        if table == "user_item_stats":
+            return [self.for_owner(primary_key[0])]
+        if table in SHARDED_TABLES:
+            return self.item_shards
+        return [DEFAULT_SHARD]
+
+    def execute_chooser(self, orm_context) -> List[str]:
+        """Shards for a statement without an explicit ``shard_id``.
+
+        Reads of sharded tables go to every item shard and their results are
+        concatenated; repositories pass ``shard_id`` wherever order or a
+        single owner matter.
+        """
+        mapper = orm_context.bind_mapper
+        if mapper is None or mapper.local_table.name not in SHARDED_TABLES:
+            return [DEFAULT_SHARD]
+        if orm_context.is_insert:
+            raise ValueError("Inserts into sharded tables need an explicit shard_id")
+        return self.item_shards
+
+    def session_factory(self) -> sessionmaker:
+        options = {
+            "class_": AsyncSession,
+            "expire_on_commit": False,
+            "info": {"shard_router": self},
+        }
+        if self.colocated:
+            return sessionmaker(self.engines[DEFAULT_SHARD], **options)
+        return sessionmaker(
+            sync_session_class=ShardedSession,
+            shards={name: shard.sync_engine for name, shard in self.engines.items()},
+            shard_chooser=self.shard_chooser,
+            identity_chooser=self.identity_chooser,
+            execute_chooser=self.execute_chooser,
+            **options,
+        )
+
+
+def _create_item_engines() -> List[AsyncEngine]:
+    item_engines = []
+    for index, url in enumerate(settings.ITEM_SHARD_URLS):
+        url = get_async_url(url)
+        item_engine = create_async_engine(url, **get_engine_options(url))
+        instrument_pool(item_engine, database=f"items{index}")
+        instrument_queries(item_engine, database=f"items{index}")
+        item_engines.append(item_engine)
+    return item_engines
+
+
+shard_router = ShardRouter(engine, _create_item_engines())
+
+
+def get_shard_router(session: AsyncSession) -> ShardRouter:
+    """Get the shard router of a session from ``session_factory``."""
+    return session.info.get("shard_router", shard_router)
+
 
 # Create async session factory
-AsyncSessionLocal = sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False
-)
+AsyncSessionLocal = shard_router.session_factory()
 
 # Create declarative base
 Base = declarative_base()
 
+# Sessions that began a transaction during the current request, see session_scope()
+_scoped_sessions: ContextVar[Optional[List[Session]]] = ContextVar(
+    "_scoped_sessions", default=None
+)
+
+
+@event.listens_for(Session, "after_begin")
+def _track_session(session, transaction, connection):
+    sessions = _scoped_sessions.get()
+    if sessions is not None and session not in sessions:
+        sessions.append(session)
+
+
+@contextmanager
+def session_scope() -> Iterator[None]:
+    """Track every session that checks out a connection inside this block."""
+    token = _scoped_sessions.set([])
+    try:
+        yield
+    finally:
+        _scoped_sessions.reset(token)
+
+
+async def release_sessions(commit: bool = True) -> None:
+    """Finish the transactions of sessions tracked by the current scope.
+
+    Committing (or rolling back) returns each connection to the pool straight
+    away, while the sessions stay open so loaded objects remain usable.
+    """
+    sessions = _scoped_sessions.get() or []
+    while sessions:
+        session = async_session(sessions.pop())
+        if session is None or not session.in_transaction():
+            continue
+        if commit:
+            await session.commit()
+        else:
+            await session.rollback()
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Dependency to get database session."""
+    """Dependency to get database session.
+
+    The session only checks a connection out of the pool on its first query.
+    """
     async with AsyncSessionLocal() as session:
         try:
             yield session
@@ -60,7 +294,61 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
-async def create_tables():
-    """Create database tables."""
-    async with engine.begin() as conn:
+def _item_shard_metadata() -> MetaData:
+    """Copy of the sharded tables minus foreign keys into the default database."""
+    metadata = MetaData()
+    for name in SHARDED_TABLES:
+        table = Base.metadata.tables[name].to_metadata(metadata)
+        for constraint in list(table.constraints):
+            if isinstance(constraint, ForeignKeyConstraint):
+                table.constraints.discard(constraint)
+        table.foreign_keys.clear()
+        for column in table.columns:
+            column.foreign_keys.clear()
+    return metadata
+
+
+def reserve_item_id_range(connection: Connection, start: int) -> None:
+    """Make the items table allocate ids from ``start`` + 1 onwards."""
+    if start <= 0:
+        return
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        # items is an AUTOINCREMENT table, so its counter is in sqlite_sequence
+        connection.execute(
+            text(
+                "INSERT INTO sqlite_sequence (name, seq) SELECT 'items', :start "
+                "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'items')"
+            ),
+            {"start": start},
+        )
+        connection.execute(
+            text("UPDATE sqlite_sequence SET seq = :start WHERE name = 'items' AND seq < :start"),
+            {"start": start},
+        )
+    elif dialect == "postgresql":
+        connection.execute(
+            text(
+                "SELECT setval(pg_get_serial_sequence('items', 'id'), :start) "
+                "WHERE COALESCE(pg_sequence_last_value("
+                "pg_get_serial_sequence('items', 'id')::regclass), 0) < :start"
+            ),
+            {"start": start},
+        )
+    elif dialect == "mysql":
+        # MySQL ignores values below the current counter
+        connection.execute(text(f"ALTER TABLE items AUTO_INCREMENT = {int(start) + 1}"))
+
+
+async def create_tables(router: Optional[ShardRouter] = None):
+    """Create database tables, and the item tables of every item shard."""
+    router = router or shard_router
+    async with router.engines[DEFAULT_SHARD].begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    if router.colocated:
+        return
+    metadata = _item_shard_metadata()
+    for index, shard in enumerate(router.item_shards):
+        async with router.engines[shard].begin() as conn:
+            await conn.run_sync(metadata.create_all)
+            await conn.run_sync(reserve_item_id_range, index << SHARD_ID_BITS)
@@ -0,0 +1,253 @@
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:  # pragma: no cover - optional dependency
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+EVENT_SUBSCRIBERS = Gauge("event_subscribers", "Open event stream subscriptions")
+EVENT_SUBSCRIBERS_DROPPED = Counter(
+    "event_subscribers_dropped_total", "Subscriptions dropped for falling behind"
+)
+
+Event = Dict[str, Any]
+
+
+class Subscription:
+    """A subscriber's bounded queue of events.
+
+    ``get`` returns None once the subscription is closed, either by the
+    subscriber or because it fell behind and was dropped by the broker.
+    """
+
+    def __init__(
+        self, maxsize: int, predicate: Optional[Callable[[Event], bool]] = None
+    ):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.predicate = predicate
+        self.dropped = False
+        self.closed = False
+
+    def offer(self, event: Event) -> bool:
+        """Queue an event without blocking; False if the queue is full."""
+        if self.closed:
+            return True
+        if self.predicate is not None and not self.predicate(event):
+            return True
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def close(self) -> None:
+        """Discard queued events and wake the consumer with the end marker."""
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class EventBroker:
+    """In-process fan-out of events to subscribers.
+
+    Publishing never blocks: a subscriber whose queue is full is dropped
+    instead of slowing down the publisher or the other subscribers.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscription] = set()
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        for subscription in list(self._subscribers):
+            self.unsubscribe(subscription)
+
+    def subscribe(
+        self, predicate: Optional[Callable[[Event], bool]] = None
+    ) -> Subscription:
+        subscription = Subscription(self.queue_size, predicate)
+        self._subscribers.add(subscription)
+        EVENT_SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self._subscribers:
+            self._subscribers.discard(subscription)
+            EVENT_SUBSCRIBERS.dec()
+        subscription.close()
+
+    def publish(self, event: Event) -> None:
+        self._fan_out(event)
+
+    def _fan_out(self, event: Event) -> None:
+        for subscription in list(self._subscribers):
+            if not subscription.offer(event):
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        """Close a subscription that may have missed events."""
+        subscription.dropped = True
+        self.unsubscribe(subscription)
+        EVENT_SUBSCRIBERS_DROPPED.inc()
+
+
+class RedisEventBroker(EventBroker):
+    """Event broker that fans out across workers through Redis pub/sub.
+
+    Every worker publishes to the channel and delivers what it receives from
+    it, including its own events, to its local subscribers. When the
+    subscription fails, local subscribers are dropped, since they may miss
+    events, and it is retried with exponential backoff from
+    ``retry_initial`` up to ``retry_max`` seconds.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        channel: str,
+        queue_size: int = 100,
+        retry_initial: float = 0.5,
+        retry_max: float = 30.0,
+    ):
+        if aioredis is None:
+            raise RuntimeError("EVENT_BROKER_URL requires the 'redis' package")
+        super().__init__(queue_size)
+        self.url = url
+        self.channel = channel
+        self.retry_initial = retry_initial
+        self.retry_max = retry_max
+        self._redis = None
+        self._reader: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self._redis = aioredis.from_url(self.url)
+        self._reader = asyncio.create_task(self._read(await self._subscribe()))
+
+    async def _subscribe(self):
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        return pubsub
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._reader is not None:
+            self._reader.cancel()
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    def publish(self, event: Event) -> None:
+        task = asyncio.get_running_loop().create_task(
+            self._redis.publish(self.channel, json.dumps(event))
+        )
+        self._pending.add(task)
+        task.add_done_callback(self._published)
+
+    def _published(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                "Publishing an event to %s failed", self.channel, exc_info=task.exception()
+            )
+
+    async def _read(self, pubsub) -> None:
+        delay = self.retry_initial
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = await self._subscribe()
+                    logger.info("Resubscribed to events on %s", self.channel)
+                delay = self.retry_initial
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        self._fan_out(json.loads(message["data"]))
+                    except ValueError:
+                        logger.warning("Ignoring malformed event on %s", self.channel)
+                raise ConnectionError("Subscription closed by the server")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(
+                    "Event subscription to %s failed, retrying in %.1fs", self.channel, delay
+                )
+            await self._close_pubsub(pubsub)
+            pubsub = None
+            # They may have missed events; SSE clients resync from the change feed
+            for subscription in list(self._subscribers):
+                self._drop(subscription)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.retry_max)
+
+    async def _close_pubsub(self, pubsub) -> None:
+        if pubsub is None:
+            return
+        try:
+            await pubsub.aclose()
+        except Exception:
+            logger.warning(
+                "Closing the event subscription to %s failed", self.channel, exc_info=True
+            )
+
+
+def create_broker() -> EventBroker:
+    """Create the broker configured by ``EVENT_BROKER_URL``."""
+    if settings.EVENT_BROKER_URL:
+        return RedisEventBroker(
+            settings.EVENT_BROKER_URL,
+            settings.EVENT_BROKER_CHANNEL,
+            settings.EVENT_QUEUE_SIZE,
+        )
+    return EventBroker(settings.EVENT_QUEUE_SIZE)
+
+
+broker = create_broker()
+
+
+def queue_event(session, event: Event) -> None:
+    """Publish an event once the session's current transaction commits."""
+    session.info.setdefault("pending_events", []).append(event)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_events(session):
+    for pending in session.info.pop("pending_events", ()):
+        broker.publish(pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_events(session, previous_transaction):
+    # A rolled back savepoint leaves the outer transaction's events queued
+    if not previous_transaction.nested:
+        session.info.pop("pending_events", None)
+
+
+def format_sse(event: Event) -> str:
+    """Format an event as a server-sent event frame."""
+    lines = []
+    if "cursor" in event:
+        lines.append(f"id: {event['cursor']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event)}")
+    return "\n".join(lines) + "\n\n"
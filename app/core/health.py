@@ -0,0 +1,177 @@
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Tuple
+
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import QueuePool
+
+from app.core.admission import ADMISSION_QUEUE_DEPTH
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import DEFAULT_SHARD, shard_router
+from app.core.metrics import Counter
+
+READINESS_FAILURES = Counter(
+    "health_readiness_failures_total", "Failed readiness checks, by check", ["check"]
+)
+
+ALEMBIC_DIR = Path(__file__).resolve().parents[2] / "alembic"
+
+_SELECT_ONE = text("SELECT 1")
+
+
+def _current_revisions(connection) -> Tuple[str, ...]:
+    return tuple(sorted(MigrationContext.configure(connection).get_current_heads()))
+
+
+def pool_status(engine: AsyncEngine, max_saturation: float) -> Dict[str, Any]:
+    """Connections checked out of an engine's pool, against its capacity.
+
+    Pools without a fixed capacity (NullPool, unbounded overflow) are only
+    reported, never unready.
+    """
+    pool = engine.pool
+    checked_out = pool.checkedout()
+    capacity = None
+    if isinstance(pool, QueuePool) and pool._max_overflow >= 0:
+        capacity = pool.size() + pool._max_overflow
+    saturation = checked_out / capacity if capacity else None
+    return {
+        "ok": saturation is None or saturation < max_saturation,
+        "checked_out": checked_out,
+        "capacity": capacity,
+        "saturation": saturation,
+    }
+
+
+class ReadinessCheck:
+    """Whether this worker should be sent traffic.
+
+    Probes every database in ``engines`` with a ``SELECT 1`` and reads the
+    Alembic revision of the default one; the probe result is cached for
+    ``cache_seconds`` and concurrent checks share one probe, so health checks
+    add at most one query per database per interval. Pool saturation and
+    admission queue depths are in-process counters, read on every check.
+
+    The schema is behind when it is at a revision older than the code's
+    head. A schema without a revision (made by ``create_tables``) or at a
+    revision this code doesn't know (migrated ahead of a rolling deploy) is
+    reported but ready.
+    """
+
+    def __init__(
+        self,
+        engines: Mapping[str, AsyncEngine],
+        cache_seconds: float,
+        probe_timeout: float,
+        max_pool_saturation: float,
+        queue_limits: Mapping[str, int],
+        max_queue_fraction: float,
+        script_location: Path = ALEMBIC_DIR,
+    ):
+        self.engines = engines
+        self.probe_timeout = probe_timeout
+        self.max_pool_saturation = max_pool_saturation
+        self.queue_limits = queue_limits
+        self.max_queue_fraction = max_queue_fraction
+        self.script_location = script_location
+        self._probes = TTLCache(ttl=cache_seconds, maxsize=1)
+        self._revisions: Optional[Tuple[Tuple[str, ...], FrozenSet[str]]] = None
+
+    def invalidate(self) -> None:
+        self._probes.clear()
+
+    async def check(self) -> Tuple[bool, Dict[str, Any]]:
+        """Run the checks; returns whether all passed, and their details."""
+        probe = await self._probes.get_or_compute("probe", self._probe)
+        checks = {
+            "database": probe["database"],
+            "migrations": probe["migrations"],
+            "pool": {
+                name: pool_status(engine, self.max_pool_saturation)
+                for name, engine in self.engines.items()
+            },
+            "admission": self._admission_status(),
+        }
+        ready = True
+        for check, results in checks.items():
+            if not all(result["ok"] for result in results.values()):
+                READINESS_FAILURES.inc(check=check)
+                ready = False
+        return ready, checks
+
+    async def _probe(self) -> Dict[str, Any]:
+        heads, known = await self._script_revisions()
+        results = await asyncio.gather(
+            *(self._probe_database(name, engine) for name, engine in self.engines.items())
+        )
+        databases = dict(zip(self.engines, results))
+        revisions = databases.get(DEFAULT_SHARD, {}).pop("revisions", None)
+        if revisions is None:
+            migrations = {"ok": False, "status": "unknown"}
+        elif not revisions:
+            migrations = {"ok": True, "status": "unversioned"}
+        elif set(revisions) == set(heads):
+            migrations = {"ok": True, "status": "current"}
+        elif set(revisions) <= known:
+            migrations = {"ok": False, "status": "behind"}
+        else:
+            migrations = {"ok": True, "status": "ahead"}
+        migrations.update(revision=revisions, head=heads)
+        return {"database": databases, "migrations": {DEFAULT_SHARD: migrations}}
+
+    async def _probe_database(self, name: str, engine: AsyncEngine) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.probe_timeout):
+                async with engine.connect() as conn:
+                    await conn.execute(_SELECT_ONE)
+                    revisions = None
+                    if name == DEFAULT_SHARD:
+                        revisions = await conn.run_sync(_current_revisions)
+        except Exception as exc:
+            # The exception's message may name hosts; the type is enough here
+            return {"ok": False, "error": type(exc).__name__}
+        result = {"ok": True, "latency_seconds": round(time.perf_counter() - start, 6)}
+        if revisions is not None:
+            result["revisions"] = revisions
+        return result
+
+    async def _script_revisions(self) -> Tuple[Tuple[str, ...], FrozenSet[str]]:
+        if self._revisions is None:
+            self._revisions = await asyncio.to_thread(self._load_script_revisions)
+        return self._revisions
+
+    def _load_script_revisions(self) -> Tuple[Tuple[str, ...], FrozenSet[str]]:
+        script = ScriptDirectory(str(self.script_location))
+        known = frozenset(revision.revision for revision in script.walk_revisions())
+        return tuple(sorted(script.get_heads())), known
+
+    def _admission_status(self) -> Dict[str, Any]:
+        status = {}
+        for name, max_queue in self.queue_limits.items():
+            depth = int(ADMISSION_QUEUE_DEPTH.get(route_class=name))
+            status[name] = {
+                "ok": depth <= max_queue * self.max_queue_fraction,
+                "queue_depth": depth,
+                "max_queue": max_queue,
+            }
+        return status
+
+
+readiness = ReadinessCheck(
+    shard_router.engines,
+    cache_seconds=settings.READINESS_CACHE_SECONDS,
+    probe_timeout=settings.READINESS_PROBE_TIMEOUT,
+    max_pool_saturation=settings.READINESS_MAX_POOL_SATURATION,
+    queue_limits=(
+        {"default": settings.ADMISSION_MAX_QUEUE, "auth": settings.ADMISSION_AUTH_MAX_QUEUE}
+        if settings.ADMISSION_ENABLED
+        else {}
+    ),
+    max_queue_fraction=settings.READINESS_MAX_QUEUE_FRACTION,
+)
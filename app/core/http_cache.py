@@ -0,0 +1,287 @@
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.events import broker
+from app.core.metrics import Counter
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    "http_response_cache_total", "Cacheable requests, by response cache outcome", ["result"]
+)
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """How long shared caches may reuse a route's responses.
+
+    ``max_age`` seconds fresh, then served stale for up to
+    ``stale_while_revalidate`` more seconds while a cache refetches it.
+    Responses vary on the ``vary`` request headers.
+    """
+
+    max_age: int
+    stale_while_revalidate: int = 0
+    vary: Sequence[str] = ("Accept",)
+
+    def cache_control(self) -> str:
+        directives = ["public", f"max-age={self.max_age}"]
+        if self.stale_while_revalidate:
+            directives.append(f"stale-while-revalidate={self.stale_while_revalidate}")
+        return ", ".join(directives)
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: str
+
+
+class ResponseCache:
+    """In-process cache of public responses, cleared whenever items change.
+
+    Entries live for at most ``ttl`` seconds. Invalidation clears every
+    entry, since any item write can change any listing page, and bumps a
+    generation number so responses computed before it are not stored.
+    Writes made through this process clear it on commit; other workers'
+    writes arrive as item events through the event broker.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self._entries = TTLCache(ttl=ttl, maxsize=maxsize)
+        # Misses being computed, resolved with whether the result was stored
+        self.pending: Dict[Hashable, asyncio.Future] = {}
+        self.generation = 0
+        self._listener: Optional[asyncio.Task] = None
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        return self._entries.get(key)
+
+    def set(self, key: Hashable, response: CachedResponse, generation: int) -> None:
+        if generation == self.generation:
+            self._entries.set(key, response)
+
+    def invalidate(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    async def start(self) -> None:
+        subscription = broker.subscribe(lambda event: event["type"].startswith("item."))
+        self._listener = asyncio.create_task(self._listen(subscription))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _listen(self, subscription) -> None:
+        try:
+            while True:
+                event = await subscription.get()
+                if event is None:
+                    # Dropped for falling behind; changes may have been missed
+                    self.invalidate()
+                    subscription = broker.subscribe(subscription.predicate)
+                    continue
+                self.invalidate()
+        finally:
+            broker.unsubscribe(subscription)
+
+
+response_cache = ResponseCache(
+    ttl=settings.RESPONSE_CACHE_SECONDS, maxsize=settings.RESPONSE_CACHE_MAX_ENTRIES
+)
+
+
+def invalidate_after_commit(session) -> None:
+    """Clear the response cache once the session's transaction commits."""
+    session.info["invalidate_response_cache"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("invalidate_response_cache", False):
+        response_cache.invalidate()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_invalidation(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop("invalidate_response_cache", None)
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _not_modified(request_headers: Headers, response: CachedResponse) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or response.etag in tags
+
+
+class HTTPCacheMiddleware:
+    """HTTP caching for public GET routes.
+
+    ``policies`` maps route paths, with ``{param}`` placeholders as in the
+    routers, to their CachePolicy. Successful responses on those routes get
+    ``Cache-Control``, ``Vary`` and an ``ETag`` hashed from the body, so
+    every worker validates the same content alike, and requests whose
+    ``If-None-Match`` matches get a 304. There is no ``Last-Modified``: a
+    page's newest ``updated_at`` misses deletes. With a ``cache``, responses
+    are also kept in process by path, normalized query string and the
+    policy's ``vary`` headers, and served from there without running the
+    endpoint; concurrent misses for the same key wait for the first.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        policies: Dict[str, CachePolicy],
+        cache: Optional[ResponseCache] = None,
+    ):
+        self.app = app
+        self.policies = [
+            (compile_path(path)[0], policy) for path, policy in policies.items()
+        ]
+        self.cache = cache
+
+    def policy_for(self, path: str) -> Optional[CachePolicy]:
+        for regex, policy in self.policies:
+            if regex.match(path):
+                return policy
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        policy = None
+        if scope["type"] == "http" and scope["method"] == "GET":
+            policy = self.policy_for(scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        if self.cache is None or "no-cache" in request_headers.get("cache-control", ""):
+            RESPONSE_CACHE_REQUESTS.inc(result="bypass")
+            await self._run(scope, receive, send, policy, request_headers)
+            return
+
+        key = (
+            scope["path"],
+            urlencode(sorted(parse_qsl(scope["query_string"].decode("latin-1"), True))),
+            tuple(request_headers.get(name, "") for name in policy.vary),
+        )
+        while True:
+            cached = self.cache.get(key)
+            if cached is not None:
+                RESPONSE_CACHE_REQUESTS.inc(result="hit")
+                await self._send(send, cached, policy, request_headers)
+                return
+            inflight = self.cache.pending.get(key)
+            if inflight is None:
+                break
+            await asyncio.shield(inflight)
+            if not inflight.result():
+                # Not cacheable; run it like the first request did
+                break
+
+        RESPONSE_CACHE_REQUESTS.inc(result="miss")
+        future = asyncio.get_running_loop().create_future()
+        self.cache.pending.setdefault(key, future)
+        generation = self.cache.generation
+        stored = False
+        try:
+            response = await self._run(scope, receive, send, policy, request_headers)
+            if response is not None:
+                self.cache.set(key, response, generation)
+                stored = True
+        finally:
+            if self.cache.pending.get(key) is future:
+                del self.cache.pending[key]
+            future.set_result(stored)
+
+    async def _run(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        policy: CachePolicy,
+        request_headers: Headers,
+    ) -> Optional[CachedResponse]:
+        """Run the endpoint; returns its response if it can be cached.
+
+        Successful responses are buffered to compute their ETag before the
+        headers go out; anything else is passed through as it comes.
+        """
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+        passthrough = False
+
+        async def buffer(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+            elif message["type"] == "http.response.start":
+                start = message
+                headers = Headers(raw=message.get("headers", []))
+                if message["status"] != 200 or "set-cookie" in headers:
+                    passthrough = True
+                    await send(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, buffer)
+        if passthrough or start is None:
+            return None
+        body = b"".join(chunks)
+        response = CachedResponse(
+            status_code=start["status"],
+            headers=list(start.get("headers", [])),
+            body=body,
+            etag=_etag(body),
+        )
+        await self._send(send, response, policy, request_headers)
+        # Rate limit state is the first caller's, not something to replay
+        response.headers = [
+            (name, value)
+            for name, value in response.headers
+            if not name.lower().startswith(b"ratelimit-")
+        ]
+        return response
+
+    async def _send(
+        self,
+        send: Send,
+        response: CachedResponse,
+        policy: CachePolicy,
+        request_headers: Headers,
+    ) -> None:
+        headers = MutableHeaders(raw=list(response.headers))
+        headers["Cache-Control"] = policy.cache_control()
+        headers["ETag"] = response.etag
+        for name in policy.vary:
+            headers.add_vary_header(name)
+        if _not_modified(request_headers, response):
+            del headers["content-length"]
+            del headers["content-type"]
+            await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send(
+            {"type": "http.response.start", "status": response.status_code, "headers": headers.raw}
+        )
+        await send({"type": "http.response.body", "body": response.body})
@@ -0,0 +1,335 @@
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, delete, exists, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import Counter
+from app.models import IdempotencyKey
+
+IDEMPOTENT_REQUESTS = Counter(
+    "http_idempotent_requests_total",
+    "Requests sent with an Idempotency-Key, by outcome",
+    ["outcome"],
+)
+
+MAX_KEY_LENGTH = 255
+
+_table = IdempotencyKey.__table__
+_KEY_ROW = select(
+    IdempotencyKey.fingerprint,
+    IdempotencyKey.status_code,
+    IdempotencyKey.headers,
+    IdempotencyKey.body,
+).where(IdempotencyKey.key == bindparam("key"))
+_DELETE_EXPIRED_KEY = delete(_table).where(
+    _table.c.key == bindparam("key"), _table.c.expires_at <= bindparam("now")
+)
+# Inserts nothing if the key is taken, so the row count tells whether this
+# request claimed it
+_CLAIM = insert(_table).from_select(
+    ["key", "fingerprint", "expires_at"],
+    select(
+        bindparam("key", type_=_table.c.key.type),
+        bindparam("fingerprint", type_=_table.c.fingerprint.type),
+        bindparam("expires_at", type_=_table.c.expires_at.type),
+    ).where(~exists().where(_table.c.key == bindparam("key"))),
+)
+# Sets the columns named in the parameters
+_COMPLETE = update(_table).where(_table.c.key == bindparam("claimed_key"))
+_RELEASE = delete(_table).where(
+    _table.c.key == bindparam("key"), _table.c.status_code.is_(None)
+)
+_PURGE_EXPIRED = delete(_table).where(_table.c.expires_at <= bindparam("now"))
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+
+
+class IdempotencyConflict(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class IdempotencyStore:
+    """Responses stored by idempotency key in the ``idempotency_keys`` table.
+
+    The first request with a key claims it by inserting a row without a
+    response, which ``complete`` fills in and keeps for ``ttl`` seconds. A
+    claim whose request never finishes (its worker died) lapses after
+    ``lock_timeout`` seconds. Duplicates wait up to ``wait_timeout`` seconds
+    for the claiming request: on a future when it runs in this process, by
+    polling the row when it runs in another.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        ttl: float,
+        lock_timeout: float,
+        wait_timeout: float,
+        poll_interval: float = 0.05,
+        purge_interval: float = 300.0,
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.purge_interval = purge_interval
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._next_purge = 0.0
+
+    async def begin(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        """Claim ``key`` for a new request, or get the response stored for it.
+
+        Returns None when the caller claimed the key and must run the request
+        and then ``complete`` or ``release`` it. Raises IdempotencyConflict
+        if the key was used for a different request, or its request is still
+        running after the wait.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                timeout = max(0.0, deadline - time.monotonic())
+                try:
+                    await asyncio.wait_for(asyncio.shield(inflight), timeout)
+                except asyncio.TimeoutError:
+                    raise _in_progress() from None
+                # Settled: read what it stored, or claim the key if it didn't
+
+            async with self.session_factory() as db:
+                if await self._claim(db, key, fingerprint):
+                    self._inflight[key] = asyncio.get_running_loop().create_future()
+                    return None
+                row = (await db.execute(_KEY_ROW, {"key": key})).first()
+            if row is not None:
+                if row.fingerprint != fingerprint:
+                    raise IdempotencyConflict(
+                        422, "Idempotency-Key was already used for a different request"
+                    )
+                if row.status_code is not None:
+                    return StoredResponse(
+                        row.status_code, [tuple(header) for header in row.headers], row.body
+                    )
+            if time.monotonic() >= deadline:
+                raise _in_progress()
+            await asyncio.sleep(self.poll_interval)
+
+    async def _claim(self, db: AsyncSession, key: str, fingerprint: str) -> bool:
+        now = datetime.now(UTC)
+        try:
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + self.purge_interval
+                await db.execute(_PURGE_EXPIRED, {"now": now})
+            else:
+                await db.execute(_DELETE_EXPIRED_KEY, {"key": key, "now": now})
+            result = await db.execute(
+                _CLAIM,
+                {
+                    "key": key,
+                    "fingerprint": fingerprint,
+                    "expires_at": now + timedelta(seconds=self.lock_timeout),
+                },
+            )
+            await db.commit()
+        except IntegrityError:
+            # Another worker claimed it at the same moment
+            await db.rollback()
+            return False
+        return result.rowcount == 1
+
+    async def complete(self, key: str, response: StoredResponse) -> None:
+        """Store the response to the request that claimed ``key``."""
+        try:
+            async with self.session_factory() as db:
+                await db.execute(
+                    _COMPLETE,
+                    {
+                        "claimed_key": key,
+                        "status_code": response.status_code,
+                        "headers": [list(header) for header in response.headers],
+                        "body": response.body,
+                        "expires_at": datetime.now(UTC) + timedelta(seconds=self.ttl),
+                    },
+                )
+                await db.commit()
+        finally:
+            self._settle(key)
+
+    async def release(self, key: str) -> None:
+        """Give up the claim on ``key`` without storing a response.
+
+        Used when the request failed in a way a retry might not, so the next
+        request with the key runs again.
+        """
+        try:
+            async with self.session_factory() as db:
+                await db.execute(_RELEASE, {"key": key})
+                await db.commit()
+        finally:
+            self._settle(key)
+
+    def _settle(self, key: str) -> None:
+        inflight = self._inflight.pop(key, None)
+        if inflight is not None and not inflight.done():
+            inflight.set_result(None)
+
+
+def _in_progress() -> IdempotencyConflict:
+    return IdempotencyConflict(
+        409, "A request with this Idempotency-Key is still being processed"
+    )
+
+
+class IdempotencyMiddleware:
+    """Run each POST with a given Idempotency-Key once; replay it to retries.
+
+    Applies to POSTs to the exact ``paths`` that carry an ``Idempotency-Key``
+    header. Keys are scoped to the path and the caller's Authorization
+    header. A key reused with a different body gets a 422; retries get the
+    stored response with ``Idempotent-Replayed: true``, without running the
+    endpoint again. Server errors and 429s aren't stored, so retrying them
+    runs the request again.
+    """
+
+    def __init__(self, app: ASGIApp, store: IdempotencyStore, paths: Sequence[str]):
+        self.app = app
+        self.store = store
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get("idempotency-key")
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await _send_json(
+                send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+            )
+            return
+
+        body = await _read_body(receive)
+        key = _digest(scope["path"], headers.get("authorization", ""), idempotency_key)
+        fingerprint = _digest(headers.get("content-type", ""), body)
+        try:
+            stored = await self.store.begin(key, fingerprint)
+        except IdempotencyConflict as exc:
+            IDEMPOTENT_REQUESTS.inc(outcome=f"conflict_{exc.status_code}")
+            await _send_json(send, exc.status_code, exc.detail)
+            return
+        if stored is not None:
+            IDEMPOTENT_REQUESTS.inc(outcome="replayed")
+            await _send_stored(send, stored)
+            return
+
+        IDEMPOTENT_REQUESTS.inc(outcome="executed")
+        response = StoredResponse(0, [], b"")
+        chunks: List[bytes] = []
+        body_sent = False
+
+        async def receive_body() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send_and_record(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response.status_code = message["status"]
+                response.headers = [
+                    (name.decode("latin-1"), value.decode("latin-1"))
+                    for name, value in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_and_record)
+        except BaseException:
+            await self.store.release(key)
+            raise
+        if response.status_code >= 500 or response.status_code in (0, 429):
+            await self.store.release(key)
+            return
+        response.body = b"".join(chunks)
+        await self.store.complete(key, response)
+
+
+def _digest(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def _send_stored(send: Send, stored: StoredResponse) -> None:
+    headers = [
+        (name.encode("latin-1"), value.encode("latin-1")) for name, value in stored.headers
+    ]
+    headers.append((b"idempotent-replayed", b"true"))
+    await send({"type": "http.response.start", "status": stored.status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": stored.body})
+
+
+async def _send_json(send: Send, status_code: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+idempotency_store = IdempotencyStore(
+    AsyncSessionLocal,
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+    lock_timeout=settings.IDEMPOTENCY_LOCK_SECONDS,
+    wait_timeout=settings.IDEMPOTENCY_WAIT_SECONDS,
+)
@@ -0,0 +1,114 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+NDJSON_CONTENT_TYPES = {
+    "application/x-ndjson",
+    "application/ndjson",
+    "application/jsonl",
+    "application/json-seq",
+}
+CSV_CONTENT_TYPES = {"text/csv", "application/csv"}
+
+# (line number, record or None, error message or None)
+ParsedRecord = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+class ImportFormatError(ValueError):
+    """Raised when an upload cannot be parsed any further."""
+
+
+def detect_format(content_type: Optional[str], format: Optional[str] = None) -> str:
+    """Pick "ndjson" or "csv" from an explicit format or the request content type."""
+    if format:
+        if format not in ("ndjson", "csv"):
+            raise ImportFormatError(f"Unsupported import format: {format}")
+        return format
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in NDJSON_CONTENT_TYPES:
+        return "ndjson"
+    if media_type in CSV_CONTENT_TYPES:
+        return "csv"
+    raise ImportFormatError(f"Unsupported import content type: {media_type or 'none'}")
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes], max_length: Optional[int] = None
+) -> AsyncIterator[str]:
+    """Split a stream of UTF-8 chunks into lines, holding at most one line."""
+    max_length = max_length or settings.IMPORT_MAX_LINE_LENGTH
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+        if len(pending) > max_length:
+            raise ImportFormatError(f"Line longer than {max_length} characters")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_ndjson(lines: AsyncIterator[str]) -> AsyncIterator[ParsedRecord]:
+    """Parse one JSON object per line, skipping blank lines."""
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, record, None
+
+
+async def iter_csv(lines: AsyncIterator[str]) -> AsyncIterator[ParsedRecord]:
+    """Parse CSV rows keyed by the header row; empty cells become None.
+
+    Quoted fields may span lines; a row is reported at the line it starts on.
+    """
+    header = None
+    line_number = 0
+    row_start = 0
+    pending = ""
+    async for line in lines:
+        line_number += 1
+        if not pending:
+            row_start = line_number
+        pending = f"{pending}\n{line}" if pending else line
+        # An odd number of quotes means a quoted field continues on the next line
+        if pending.count('"') % 2:
+            if len(pending) > settings.IMPORT_MAX_LINE_LENGTH:
+                raise ImportFormatError("Unterminated quoted field")
+            continue
+        text, pending = pending, ""
+        if not text.strip():
+            continue
+        try:
+            row = next(csv.reader([text]))
+        except csv.Error as exc:
+            yield row_start, None, f"Invalid CSV: {exc}"
+            continue
+        if header is None:
+            header = [name.strip() for name in row]
+            continue
+        if len(row) != len(header):
+            yield row_start, None, f"Expected {len(header)} fields, got {len(row)}"
+            continue
+        yield row_start, {key: value or None for key, value in zip(header, row)}, None
+    if pending:
+        yield row_start, None, "Unterminated quoted field"
+
+
+def iter_records(fmt: str, lines: AsyncIterator[str]) -> AsyncIterator[ParsedRecord]:
+    return iter_ndjson(lines) if fmt == "ndjson" else iter_csv(lines)
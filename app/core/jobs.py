@@ -0,0 +1,234 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import Counter
+from app.core.snapshots import export_snapshot
+from app.models import Job
+from app.repositories import ItemRepository, JobRepository, UserItemStatsRepository
+
+logger = logging.getLogger(__name__)
+
+JOBS_FINISHED = Counter("jobs_finished_total", "Background jobs finished", ["kind", "status"])
+
+# Runs a claimed job and returns the name of its result file in the result
+# directory, if it produced one
+JobHandler = Callable[[AsyncSession, Job, Path], Awaitable[Optional[str]]]
+
+
+class JobRunner:
+    """Runs background jobs on a bounded pool of worker tasks.
+
+    Jobs live in the ``jobs`` table and the in-memory queue only carries hints.
+    A worker claims a job with a conditional UPDATE before running it, and idle
+    workers poll for pending jobs, so jobs submitted to another process or left
+    pending by a restart still run.
+
+    A claim is a lease of ``lease_timeout`` seconds, renewed every third of
+    that while the job runs. A job cancelled by ``stop`` goes back to
+    pending, and so does one whose lease lapsed, taken to belong to a
+    worker that died. Only the claim still holding the job records its
+    outcome.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        workers: int,
+        queue_size: int,
+        result_dir: str,
+        poll_interval: float,
+        lease_timeout: float = 300.0,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.queue_size = queue_size
+        self.result_dir = Path(result_dir)
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self.handlers: Dict[str, JobHandler] = {}
+        self.superuser_only: Set[str] = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def register(
+        self, kind: str, superuser_only: bool = False
+    ) -> Callable[[JobHandler], JobHandler]:
+        """Register the handler for a job kind."""
+
+        def decorator(handler: JobHandler) -> JobHandler:
+            self.handlers[kind] = handler
+            if superuser_only:
+                self.superuser_only.add(kind)
+            return handler
+
+        return decorator
+
+    async def start(self) -> None:
+        self.result_dir.mkdir(parents=True, exist_ok=True)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def submit(self, job_id: str) -> None:
+        """Hint that a committed job is ready; polling picks it up otherwise."""
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            pass
+
+    async def _next_job_ids(self) -> List[str]:
+        try:
+            return [await asyncio.wait_for(self._queue.get(), self.poll_interval)]
+        except asyncio.TimeoutError:
+            async with self.session_factory() as db:
+                job_repo = JobRepository(db)
+                stale = await job_repo.requeue_stale(datetime.now(UTC))
+                if stale:
+                    await db.commit()
+                    logger.warning("Requeued %d jobs whose worker stopped running them", stale)
+                return await job_repo.get_pending_ids(limit=self.workers)
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                for job_id in await self._next_job_ids():
+                    await self.run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job worker error")
+                await asyncio.sleep(self.poll_interval)
+
+    def _lease_until(self) -> datetime:
+        return datetime.now(UTC) + timedelta(seconds=self.lease_timeout)
+
+    @asynccontextmanager
+    async def _leased(self, job_id: str, started_at: datetime) -> AsyncIterator[None]:
+        """Renew the job's lease in the background for the duration."""
+        renewer = asyncio.create_task(self._renew_lease(job_id, started_at))
+        try:
+            yield
+        finally:
+            renewer.cancel()
+            await asyncio.gather(renewer, return_exceptions=True)
+
+    async def _renew_lease(self, job_id: str, started_at: datetime) -> None:
+        while True:
+            await asyncio.sleep(self.lease_timeout / 3)
+            try:
+                # The job's own session is busy running it
+                async with self.session_factory() as db:
+                    renewed = await JobRepository(db).renew(
+                        job_id, started_at, self._lease_until()
+                    )
+                    await db.commit()
+            except Exception:
+                logger.exception("Renewing the lease of job %s failed", job_id)
+                continue
+            if not renewed:
+                logger.warning("Job %s lost its lease and was requeued", job_id)
+                return
+
+    async def run(self, job_id: str) -> None:
+        """Claim and run one job, recording its outcome."""
+        async with self.session_factory() as db:
+            job_repo = JobRepository(db)
+            started_at = await job_repo.claim(job_id, self._lease_until())
+            await db.commit()
+            if started_at is None:
+                return
+
+            job = await job_repo.get_by_id(job_id)
+            # Read before a rollback expires the job
+            kind = job.kind
+            handler = self.handlers.get(kind)
+            try:
+                if handler is None:
+                    raise ValueError(f"Unknown job kind: {kind}")
+                async with self._leased(job_id, started_at):
+                    result_path = await handler(db, job, self.result_dir)
+            except asyncio.CancelledError:
+                await db.rollback()
+                await job_repo.release(job_id, started_at)
+                await db.commit()
+                raise
+            except Exception as exc:
+                logger.exception("Job %s (%s) failed", job_id, kind)
+                await db.rollback()
+                finished = await job_repo.finish(
+                    job_id, started_at, error=str(exc) or type(exc).__name__
+                )
+                status = "failed"
+            else:
+                finished = await job_repo.finish(job_id, started_at, result_path=result_path)
+                status = "succeeded"
+            await db.commit()
+            if not finished:
+                logger.warning("Job %s was requeued while running, outcome discarded", job_id)
+                status = "superseded"
+            JOBS_FINISHED.inc(kind=kind, status=status)
+
+
+job_runner = JobRunner(
+    AsyncSessionLocal,
+    workers=settings.JOB_WORKERS,
+    queue_size=settings.JOB_QUEUE_SIZE,
+    result_dir=settings.JOB_RESULT_DIR,
+    poll_interval=settings.JOB_POLL_SECONDS,
+    lease_timeout=settings.JOB_LEASE_SECONDS,
+)
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+@job_runner.register("export_items")
+async def export_items(db: AsyncSession, job: Job, result_dir: Path) -> str:
+    """Export items as NDJSON, only those of ``params["owner_id"]`` if given."""
+    owner_id = (job.params or {}).get("owner_id")
+    path = result_dir / f"{job.id}.ndjson"
+    with path.open("w", encoding="utf-8") as result_file:
+        async for rows in ItemRepository(db).stream_rows(owner_id=owner_id):
+            chunk = "".join(json.dumps(row, default=_json_default) + "\n" for row in rows)
+            await asyncio.to_thread(result_file.write, chunk)
+    return path.name
+
+
+@job_runner.register("rebuild_stats", superuser_only=True)
+async def rebuild_stats(db: AsyncSession, job: Job, result_dir: Path) -> None:
+    """Recompute user item stats, only for ``params["user_id"]`` if given."""
+    await UserItemStatsRepository(db).rebuild((job.params or {}).get("user_id"))
+
+
+@job_runner.register("export_snapshot", superuser_only=True)
+async def export_snapshot_job(db: AsyncSession, job: Job, result_dir: Path) -> str:
+    """Export users and items to SNAPSHOT_DIR as Parquet or Arrow IPC files.
+
+    ``params["format"]`` overrides SNAPSHOT_FORMAT and ``params["full"]``
+    rewrites every partition. The result file is the export report.
+    """
+    params = job.params or {}
+    report = await export_snapshot(db, format=params.get("format"), full=params.get("full", False))
+    path = result_dir / f"{job.id}.json"
+    await asyncio.to_thread(path.write_text, json.dumps(report), "utf-8")
+    return path.name
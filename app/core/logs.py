@@ -0,0 +1,291 @@
+import asyncio
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Callable, Optional, Sequence, TextIO
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import Counter
+
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Structured log records not written, by reason",
+    ["logger", "reason"],
+)
+
+access_logger = logging.getLogger("app.access")
+query_logger = logging.getLogger("app.query")
+
+# Incoming request ids are echoed back and logged, so only plain tokens
+_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+
+@dataclass
+class RequestLog:
+    """What the access log records about the request being handled."""
+
+    request_id: str
+    # Path template of the matched route, set by AppRoute
+    route: Optional[str] = None
+    db_seconds: float = 0.0
+    db_queries: int = 0
+
+
+current_request: ContextVar[Optional[RequestLog]] = ContextVar("current_request", default=None)
+
+
+class LogSampler:
+    """Picks which records of a log to write.
+
+    A ``rate`` share of records is kept at random; records marked ``always``
+    (errors, slow requests) skip that. Either way at most ``max_per_second``
+    records are kept per second, 0 meaning no cap.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        max_per_second: int = 0,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.name = name
+        self.rate = rate
+        self.max_per_second = max_per_second
+        self._rng = rng
+        self._second = 0
+        self._kept = 0
+
+    def keep(self, always: bool = False) -> bool:
+        if not always and self.rate < 1.0 and self._rng() >= self.rate:
+            LOG_RECORDS_DROPPED.inc(logger=self.name, reason="sampled")
+            return False
+        if self.max_per_second:
+            second = int(time.monotonic())
+            if second != self._second:
+                self._second, self._kept = second, 0
+            if self._kept >= self.max_per_second:
+                LOG_RECORDS_DROPPED.inc(logger=self.name, reason="capped")
+                return False
+            self._kept += 1
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with the fields passed as ``extra={"fields": ...}``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, UTC).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            entry["request_id"] = request_id
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _RequestIdFilter(logging.Filter):
+    """Stamps records with the current request's id while still on its task."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            request = current_request.get()
+            record.request_id = request.request_id if request is not None else None
+        return True
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Drops records when the queue is full instead of blocking the loop."""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(logger=record.name, reason="queue_full")
+
+
+class LogPipeline:
+    """Writes the structured ``loggers`` as JSON lines from a background thread.
+
+    Logging calls only put the record on a queue of at most ``queue_size``
+    records; formatting and the write to ``stream`` happen on the
+    QueueListener's thread, so a slow stdout never blocks the event loop.
+    Until ``start`` the loggers are disabled, and logging to them is a
+    level check.
+    """
+
+    def __init__(
+        self,
+        loggers: Sequence[logging.Logger],
+        queue_size: int,
+        stream: Optional[TextIO] = None,
+    ):
+        self.loggers = loggers
+        self.queue_size = queue_size
+        self.stream = stream
+        self._handler: Optional[logging.Handler] = None
+        self._listener: Optional[logging.handlers.QueueListener] = None
+
+    async def start(self) -> None:
+        records: queue.Queue = queue.Queue(self.queue_size)
+        output = logging.StreamHandler(self.stream or sys.stdout)
+        output.setFormatter(JSONFormatter())
+        self._listener = logging.handlers.QueueListener(records, output)
+        self._listener.start()
+        self._handler = _DroppingQueueHandler(records)
+        self._handler.addFilter(_RequestIdFilter())
+        for logger in self.loggers:
+            logger.addHandler(self._handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+    async def stop(self) -> None:
+        """Stop logging and wait for the queued records to be written."""
+        if self._listener is None:
+            return
+        for logger in self.loggers:
+            logger.removeHandler(self._handler)
+            logger.setLevel(logging.NOTSET)
+            logger.propagate = True
+        await asyncio.to_thread(self._listener.stop)
+        self._handler = self._listener = None
+
+
+log_pipeline = LogPipeline([access_logger, query_logger], queue_size=settings.LOG_QUEUE_SIZE)
+
+access_sampler = LogSampler(
+    "app.access", settings.ACCESS_LOG_SAMPLE_RATE, settings.LOG_MAX_RECORDS_PER_SECOND
+)
+query_sampler = LogSampler(
+    "app.query", settings.QUERY_LOG_SAMPLE_RATE, settings.LOG_MAX_RECORDS_PER_SECOND
+)
+
+
+def instrument_queries(engine: AsyncEngine, database: str = "default") -> None:
+    """Add query time to the current request's log, and log queries if enabled."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started_at"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started_at", None)
+        if started is None:
+            return
+        duration = time.perf_counter() - started
+        request = current_request.get()
+        if request is not None:
+            request.db_seconds += duration
+            request.db_queries += 1
+        if (
+            (settings.QUERY_LOG_ENABLED or settings.DEBUG)
+            and query_logger.isEnabledFor(logging.INFO)
+            and query_sampler.keep(always=duration >= settings.QUERY_LOG_SLOW_SECONDS)
+        ):
+            query_logger.info(
+                statement,
+                extra={
+                    "fields": {
+                        "database": database,
+                        "duration_seconds": round(duration, 6),
+                        "executemany": executemany,
+                    }
+                },
+            )
+
+
+class AccessLogMiddleware:
+    """Logs one structured record per HTTP request to ``app.access``.
+
+    Each request gets an id, taken from its ``X-Request-ID`` header when it
+    has a usable one, which is sent back in the response and attached to its
+    query logs. Records carry the route template, status, latency and the
+    time spent in database queries. Requests under the ``exclude_prefixes``
+    (health checks, metrics scrapes) aren't logged.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sampler: LogSampler,
+        slow_seconds: float,
+        exclude_prefixes: Sequence[str] = (),
+    ):
+        self.app = app
+        self.sampler = sampler
+        self.slow_seconds = slow_seconds
+        self.exclude_prefixes = tuple(exclude_prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = Headers(scope=scope).get("x-request-id", "")
+        if not _REQUEST_ID.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        request = RequestLog(request_id)
+        token = current_request.set(request)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            current_request.reset(token)
+            self._log(scope, request, status_code, time.perf_counter() - start)
+
+    def _log(self, scope: Scope, request: RequestLog, status_code: int, duration: float) -> None:
+        if not access_logger.isEnabledFor(logging.INFO) or scope["path"].startswith(
+            self.exclude_prefixes
+        ):
+            return
+        if not self.sampler.keep(always=status_code >= 500 or duration >= self.slow_seconds):
+            return
+        route = request.route or getattr(scope.get("route"), "path", None)
+        access_logger.info(
+            "%s %s %d",
+            scope["method"],
+            scope["path"],
+            status_code,
+            extra={
+                "request_id": request.request_id,
+                "fields": {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route,
+                    "status": status_code,
+                    "duration_seconds": round(duration, 6),
+                    "db_seconds": round(request.db_seconds, 6),
+                    "db_queries": request.db_queries,
+                    "client": scope["client"][0] if scope.get("client") else None,
+                },
+            },
+        )
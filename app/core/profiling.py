@@ -0,0 +1,173 @@
+import asyncio
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter as StackCounter
+from types import CodeType, FrameType
+from typing import Any, Dict, List, Optional
+
+from app.core.metrics import Counter
+
+PROFILES_TAKEN = Counter("debug_profiles_total", "Debug profiles taken", ["kind"])
+
+# Frames kept per traced allocation while /debug/memory runs
+TRACEMALLOC_FRAMES = 1
+
+_TRACEMALLOC_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class ProfilerBusyError(Exception):
+    pass
+
+
+def _short_path(filename: str) -> str:
+    """A file's path relative to the sys.path entry it was imported from."""
+    for prefix in sorted(sys.path, key=len, reverse=True):
+        if prefix and filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1 :]
+    return filename
+
+
+class SamplingProfiler:
+    """Samples every thread's stack ``interval`` seconds apart.
+
+    Sampling happens on a background thread that reads the other threads'
+    current frames, so the profiled code runs unmodified (no tracing hooks)
+    and the overhead is one stack walk per thread per sample.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        self._stacks: StackCounter = StackCounter()
+        self._labels: Dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def sample(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        frames: Dict[int, FrameType] = sys._current_frames()
+        for ident, frame in frames.items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self._stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed format of flamegraph.pl and speedscope.
+
+        One line per distinct stack, root (the thread name) first, then the
+        number of samples it was seen in.
+        """
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self._stacks.most_common()
+        )
+
+
+# Only one profile runs at a time, so a worker is never slowed down twice
+_profile_lock = asyncio.Lock()
+
+
+async def profile_cpu(seconds: float, interval: float) -> str:
+    """Sample all threads for ``seconds`` and return the collapsed stacks."""
+    if _profile_lock.locked():
+        raise ProfilerBusyError("A profile is already running")
+    async with _profile_lock:
+        profiler = SamplingProfiler(interval)
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+        PROFILES_TAKEN.inc(kind="cpu")
+        return profiler.collapsed()
+
+
+def _filtered_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_TRACEMALLOC_FILTERS)
+
+
+def _top_allocations(
+    before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int
+) -> List[Dict[str, Any]]:
+    top: List[Dict[str, Any]] = []
+    for stat in after.compare_to(before, "lineno")[:limit]:
+        frame = stat.traceback[0]
+        top.append(
+            {
+                "location": f"{_short_path(frame.filename)}:{frame.lineno}",
+                "size": stat.size,
+                "size_diff": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+        )
+    return top
+
+
+async def profile_memory(seconds: float, limit: int) -> Dict[str, Any]:
+    """Diff tracemalloc snapshots taken ``seconds`` apart.
+
+    Returns the ``limit`` source lines whose live allocations grew (or
+    shrank) the most. Tracing slows allocations down, so unless it was
+    already on (``PYTHONTRACEMALLOC``) it only runs for the duration.
+    Snapshots and the diff walk every traced allocation, so they run in a
+    thread rather than on the event loop.
+    """
+    if _profile_lock.locked():
+        raise ProfilerBusyError("A profile is already running")
+    async with _profile_lock:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        try:
+            before = await asyncio.to_thread(_filtered_snapshot)
+            await asyncio.sleep(seconds)
+            after = await asyncio.to_thread(_filtered_snapshot)
+            traced, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started:
+                tracemalloc.stop()
+        PROFILES_TAKEN.inc(kind="memory")
+
+    top = await asyncio.to_thread(_top_allocations, before, after, limit)
+    return {
+        "seconds": seconds,
+        "tracing_started": started,
+        "traced_bytes": traced,
+        "peak_bytes": peak,
+        "top": top,
+    }
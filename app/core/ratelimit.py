@@ -0,0 +1,184 @@
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import Counter
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:  # pragma: no cover - optional dependency
+    aioredis = None
+
+RATE_LIMITED = Counter(
+    "http_rate_limited_total", "Requests rejected by a rate limit", ["limit"]
+)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """A token bucket of ``burst`` tokens refilled at ``rate`` tokens a second."""
+
+    burst: int
+    rate: float
+
+    @classmethod
+    def parse(cls, value: str) -> Optional["RateLimit"]:
+        """Parse ``"<count>/<second|minute|hour|day>"``; empty means no limit.
+
+        The bucket holds ``count`` tokens and refills completely over the
+        period, so bursts of up to ``count`` requests are allowed.
+        """
+        if not value:
+            return None
+        count, _, period = value.partition("/")
+        seconds = PERIODS.get(period.strip().lower().rstrip("s"))
+        if seconds is None or int(count) < 1:
+            raise ValueError(f"Invalid rate limit: {value!r}")
+        return cls(burst=int(count), rate=int(count) / seconds)
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    # Seconds until the bucket is full again, and until a rejected request
+    # could succeed
+    reset_after: float
+    retry_after: float
+
+    def headers(self) -> Dict[str, str]:
+        """Rate limit headers as in the IETF RateLimit header fields draft."""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def _result(limit: RateLimit, allowed: bool, tokens: float, cost: int) -> RateLimitResult:
+    return RateLimitResult(
+        allowed=allowed,
+        limit=limit.burst,
+        remaining=int(tokens),
+        reset_after=(limit.burst - tokens) / limit.rate,
+        retry_after=0.0 if allowed else (cost - tokens) / limit.rate,
+    )
+
+
+class RateLimitBackend(ABC):
+    """Token bucket storage shared by every limit, keyed by string."""
+
+    @abstractmethod
+    async def hit(self, key: str, limit: RateLimit, cost: int = 1) -> RateLimitResult:
+        """Take ``cost`` tokens from the bucket at ``key`` if it has them."""
+
+    async def close(self) -> None:
+        pass
+
+
+class _Shard:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> (tokens, last refill, time the bucket is full again)
+        self.buckets: Dict[str, Tuple[float, float, float]] = {}
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Buckets in process memory, for single-worker deployments.
+
+    Keys are spread over ``shards`` dicts with their own locks, so threads
+    contend less and an overgrown shard is swept on its own: once it holds
+    more than ``max_keys_per_shard`` buckets, the ones that have refilled
+    completely (and so equal a fresh bucket) are dropped.
+    """
+
+    def __init__(self, shards: int = 16, max_keys_per_shard: int = 10_000):
+        self._shards: List[_Shard] = [_Shard() for _ in range(shards)]
+        self.max_keys_per_shard = max_keys_per_shard
+
+    async def hit(self, key: str, limit: RateLimit, cost: int = 1) -> RateLimitResult:
+        shard = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with shard.lock:
+            bucket = shard.buckets.get(key)
+            tokens = (
+                min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+                if bucket is not None
+                else limit.burst
+            )
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            shard.buckets[key] = (tokens, now, now + (limit.burst - tokens) / limit.rate)
+            if len(shard.buckets) > self.max_keys_per_shard:
+                shard.buckets = {
+                    key: bucket for key, bucket in shard.buckets.items() if bucket[2] > now
+                }
+        return _result(limit, allowed, tokens, cost)
+
+
+# Refills and takes tokens in one step on the Redis server, using its clock so
+# that every worker sees the same time. Idle buckets expire once full again.
+_TOKEN_BUCKET_SCRIPT = """
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Buckets in Redis, shared by every worker and instance.
+
+    Each hit is a single atomic script call, so concurrent requests from
+    different workers can't both take the last token.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        if aioredis is None:
+            raise RuntimeError("RATE_LIMIT_STORAGE_URL requires the 'redis' package")
+        self._redis = aioredis.from_url(url)
+        self._script = self._redis.register_script(_TOKEN_BUCKET_SCRIPT)
+        self.prefix = prefix
+
+    async def hit(self, key: str, limit: RateLimit, cost: int = 1) -> RateLimitResult:
+        allowed, tokens = await self._script(
+            keys=[self.prefix + key], args=[limit.burst, limit.rate, cost]
+        )
+        return _result(limit, bool(allowed), float(tokens), cost)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def create_rate_limit_backend() -> RateLimitBackend:
+    """Create the backend configured by ``RATE_LIMIT_STORAGE_URL``."""
+    if settings.RATE_LIMIT_STORAGE_URL:
+        return RedisRateLimitBackend(settings.RATE_LIMIT_STORAGE_URL)
+    return MemoryRateLimitBackend(settings.RATE_LIMIT_MEMORY_SHARDS)
+
+
+rate_limit_backend = create_rate_limit_backend()
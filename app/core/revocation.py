@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import UTC, datetime
+from typing import Callable, Dict, Iterable, Optional
+
+from sqlalchemy import bindparam, delete, exists, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import Counter, Gauge
+from app.models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+DENYLIST_CHECKS = Counter(
+    "token_denylist_checks_total",
+    "Token revocation checks, by whether the Bloom filter settled them",
+    ["result"],
+)
+DENYLIST_ENTRIES = Gauge("token_denylist_entries", "Revoked token ids in the Bloom filter")
+
+_REVOKED_ROWS_AFTER = (
+    select(RevokedToken.id, RevokedToken.jti)
+    .where(RevokedToken.id > bindparam("after_id"))
+    .where(RevokedToken.expires_at > bindparam("now"))
+    .order_by(RevokedToken.id)
+)
+_REVOKED_ROWS_IN = select(RevokedToken.id, RevokedToken.jti).where(
+    RevokedToken.id.in_(bindparam("ids", expanding=True))
+)
+_REVOKED_COUNT = select(func.count()).where(
+    RevokedToken.jti.in_(bindparam("jtis", expanding=True))
+)
+# Inserts nothing if the id is already revoked, so the row count tells a new
+# revocation apart from a repeated one without a failed statement
+_REVOKE = insert(RevokedToken.__table__).from_select(
+    ["jti", "expires_at"],
+    select(
+        bindparam("jti", type_=RevokedToken.jti.type),
+        bindparam("expires_at", type_=RevokedToken.expires_at.type),
+    ).where(~exists().where(RevokedToken.jti == bindparam("jti"))),
+)
+# How far below the newest id a rebuild looks for revocations still being
+# committed; older gaps are rows already purged
+_REBUILD_GAP_IDS = 1000
+_PURGE_EXPIRED = delete(RevokedToken).where(RevokedToken.expires_at <= bindparam("now"))
+
+
+def family_key(family: str) -> str:
+    """Denylist entry that revokes every token of a session family."""
+    return f"fam:{family}"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+
+    Sized for ``capacity`` entries at ``error_rate`` false positives; the
+    ``hashes`` bit positions of a key come from one blake2b digest by double
+    hashing. Never gives false negatives, so a miss means "not present".
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return ((first + i * second) % size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class TokenDenylist:
+    """Revoked token ids, checked on every authenticated request.
+
+    The exact list lives in the ``revoked_tokens`` table; each process keeps
+    a Bloom filter of it in memory, so the usual check (a token that isn't
+    revoked) is a few hashes and no query. Only Bloom hits, i.e. revoked
+    tokens and the rare false positive, are confirmed in the database.
+
+    Revocations made by this process enter its filter at once. Other
+    processes poll the table for rows past the last id they have seen every
+    ``sync_interval`` seconds, so a revocation reaches every worker within
+    that interval. Expired rows are purged, and the filter rebuilt without
+    them, every ``purge_interval`` seconds.
+
+    Ids are handed out when a row is inserted, not when it commits, so a
+    revocation can become visible after rows with higher ids have been
+    synced. The ids a sync skips over are therefore checked again on every
+    sync for ``gap_timeout`` seconds; a gap still empty by then belongs to
+    a rolled-back or expired revocation.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        capacity: int,
+        error_rate: float,
+        sync_interval: float,
+        purge_interval: float = 3600.0,
+        gap_timeout: float = 60.0,
+    ):
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.purge_interval = purge_interval
+        self.gap_timeout = gap_timeout
+        self._filter = BloomFilter(capacity, error_rate)
+        self._last_id = 0
+        # Skipped ids, to the monotonic time they stop being checked
+        self._gaps: Dict[int, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await self.rebuild()
+        self._task = asyncio.create_task(self._sync_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def is_revoked(self, jti: Optional[str], family: Optional[str] = None) -> bool:
+        """Whether the token ``jti`` or its session ``family`` is revoked."""
+        keys = [key for key in (jti, family and family_key(family)) if key]
+        candidates = [key for key in keys if key in self._filter]
+        if not candidates:
+            DENYLIST_CHECKS.inc(result="miss")
+            return False
+        DENYLIST_CHECKS.inc(result="hit")
+        async with self.session_factory() as db:
+            return bool(await db.scalar(_REVOKED_COUNT, {"jtis": candidates}))
+
+    async def revoke(self, db: AsyncSession, jti: str, expires_at: datetime) -> bool:
+        """Revoke ``jti`` until ``expires_at`` in the caller's transaction.
+
+        Returns False if it was already revoked. The id enters this
+        process's filter right away; if the transaction is rolled back, that
+        only costs a database check for the id later.
+        """
+        result = await db.execute(_REVOKE, {"jti": jti, "expires_at": expires_at})
+        self._add(jti)
+        return result.rowcount == 1
+
+    def _add(self, jti: str) -> None:
+        self._filter.add(jti)
+        DENYLIST_ENTRIES.set(self._filter.count)
+
+    async def sync(self) -> None:
+        """Add the revocations made since the last sync, by any process."""
+        now = time.monotonic()
+        self._gaps = {id_: until for id_, until in self._gaps.items() if until > now}
+        async with self.session_factory() as db:
+            rows = (
+                await db.execute(
+                    _REVOKED_ROWS_AFTER, {"after_id": self._last_id, "now": datetime.now(UTC)}
+                )
+            ).all()
+            late = (
+                (await db.execute(_REVOKED_ROWS_IN, {"ids": list(self._gaps)})).all()
+                if self._gaps
+                else []
+            )
+        for row in late:
+            del self._gaps[row.id]
+            self._add(row.jti)
+        until = now + self.gap_timeout
+        for row in rows:
+            self._gaps.update(dict.fromkeys(range(self._last_id + 1, row.id), until))
+            self._add(row.jti)
+            self._last_id = row.id
+
+    async def rebuild(self) -> None:
+        """Reload the filter from the unexpired revocations.
+
+        The new filter is sized for at least twice the current entries, so
+        it keeps its error rate as revocations accumulate. Ids missing below
+        the newest one that sync hasn't already stepped over become gaps,
+        checked again like those sync skips.
+        """
+        async with self.session_factory() as db:
+            rows = (
+                await db.execute(_REVOKED_ROWS_AFTER, {"after_id": 0, "now": datetime.now(UTC)})
+            ).all()
+        bloom = BloomFilter(max(self.capacity, 2 * len(rows)), self.error_rate)
+        for row in rows:
+            bloom.add(row.jti)
+        loaded = {row.id for row in rows}
+        last_id = rows[-1].id if rows else 0
+        until = time.monotonic() + self.gap_timeout
+        gaps = {id_: pending for id_, pending in self._gaps.items() if id_ not in loaded}
+        for id_ in range(max(self._last_id, last_id - _REBUILD_GAP_IDS) + 1, last_id):
+            if id_ not in loaded:
+                gaps[id_] = until
+        self._filter = bloom
+        self._gaps = gaps
+        self._last_id = last_id
+        DENYLIST_ENTRIES.set(bloom.count)
+
+    async def purge(self) -> None:
+        """Delete expired revocations and rebuild the filter without them."""
+        async with self.session_factory() as db:
+            await db.execute(_PURGE_EXPIRED, {"now": datetime.now(UTC)})
+            await db.commit()
+        await self.rebuild()
+
+    async def _sync_forever(self) -> None:
+        next_purge = time.monotonic() + self.purge_interval
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                if time.monotonic() >= next_purge:
+                    next_purge = time.monotonic() + self.purge_interval
+                    await self.purge()
+                else:
+                    await self.sync()
+            except Exception:
+                logger.exception("Token denylist sync failed")
+
+
+token_denylist = TokenDenylist(
+    AsyncSessionLocal,
+    capacity=settings.TOKEN_DENYLIST_CAPACITY,
+    error_rate=settings.TOKEN_DENYLIST_ERROR_RATE,
+    sync_interval=settings.TOKEN_DENYLIST_SYNC_SECONDS,
+)
@@ -1,13 +1,47 @@
+import uuid
 from datetime import UTC, datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Sequence, Tuple
 
-from jose import JWTError, jwt
+from jose import JWTError
 from passlib.context import CryptContext
 
+from app.core import revocation
 from app.core.config import settings
+from app.core.tokens import JWTCodec
+
+
+def create_password_context(
+    schemes: Sequence[str] = settings.PASSWORD_SCHEMES,
+    bcrypt_rounds: int = settings.PASSWORD_BCRYPT_ROUNDS,
+    argon2_time_cost: int = settings.PASSWORD_ARGON2_TIME_COST,
+    argon2_memory_cost: int = settings.PASSWORD_ARGON2_MEMORY_COST,
+    argon2_parallelism: int = settings.PASSWORD_ARGON2_PARALLELISM,
+) -> CryptContext:
+    """Build the password hashing context.
+
+    New hashes use the first scheme; the others are still verified but
+    deprecated. Costs are pinned (min = max = configured), so hashes made with
+    an older scheme or different cost parameters report ``needs_update`` and
+    are rehashed on the next successful login.
+    """
+    return CryptContext(
+        schemes=list(schemes),
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        # argon2id; passlib calls the time cost "rounds", the memory cost is KiB
+        argon2__type="ID",
+        argon2__rounds=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__max_rounds=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = create_password_context()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -15,11 +49,28 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password and, if its hash is outdated, return a new hash."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     """Hash a password."""
     return pwd_context.hash(password)
 
 
+# Keys are parsed once here rather than on every token
+jwt_codec = JWTCodec(
+    settings.ALGORITHM,
+    secret_key=settings.SECRET_KEY,
+    private_key=settings.JWT_PRIVATE_KEY,
+    public_key=settings.JWT_PUBLIC_KEY,
+    cache_size=settings.TOKEN_CACHE_SIZE,
+)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -27,18 +78,63 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.now(UTC) + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
+    to_encode.setdefault("type", "access")
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt_codec.encode(to_encode)
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify a JWT token and return the username."""
+def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None):
+    """Create a JWT refresh token, only accepted by the refresh endpoint."""
+    return create_access_token(
+        {**data, "type": "refresh"},
+        expires_delta or timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+
+
+def create_token_pair(username: str, family: Optional[str] = None) -> Dict[str, str]:
+    """Issue an access and a refresh token for one login session.
+
+    Both carry the session ``family`` id, a new one for a fresh login, so
+    revoking the family logs the whole session out.
+    """
+    data = {"sub": username, "fam": family or uuid.uuid4().hex}
+    return {
+        "access_token": create_access_token(
+            data, timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        ),
+        "refresh_token": create_refresh_token(data),
+        "token_type": "bearer",
+    }
+
+
+def decode_token(token: str) -> Optional[Dict[str, Any]]:
+    """Decode a JWT token, or None if it is invalid or expired.
+
+    Tokens issued before token types existed count as access tokens.
+    Signatures are only verified the first time a token is seen, see
+    ``JWTCodec``.
+    """
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-        return username
+        payload = jwt_codec.decode(token)
     except JWTError:
         return None
+    if payload.get("sub") is None:
+        return None
+    payload.setdefault("type", "access")
+    return payload
+
+
+async def verify_token(token: str, token_type: str = "access") -> Optional[str]:
+    """Verify a JWT token and return the username.
+
+    Rejects tokens of another type and revoked tokens; the revocation check
+    stays in memory unless the token is (probably) revoked.
+    """
+    payload = decode_token(token)
+    if payload is None or payload["type"] != token_type:
+        return None
+    if await revocation.token_denylist.is_revoked(payload.get("jti"), payload.get("fam")):
+        return None
+    return payload["sub"]
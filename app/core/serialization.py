@@ -0,0 +1,80 @@
+from typing import Any, Dict
+
+from starlette.responses import Response
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack"}
+
+
+def msgpack_available() -> bool:
+    return msgpack is not None
+
+
+def media_type(content_type: str) -> str:
+    return content_type.split(";")[0].strip().lower()
+
+
+def is_msgpack(content_type: str) -> bool:
+    return media_type(content_type) in MSGPACK_MEDIA_TYPES
+
+
+def _accept_qualities(header: str) -> Dict[str, float]:
+    """Map each media range in an Accept header to its q-value."""
+    accepted = {}
+    for part in header.split(","):
+        media_range, *params = part.split(";")
+        media_range = media_range.strip().lower()
+        if not media_range:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[media_range] = quality
+    return accepted
+
+
+def prefers_msgpack(accept: str) -> bool:
+    """Whether an Accept header asks for MessagePack over JSON.
+
+    MessagePack has to be named explicitly; wildcards only ever match JSON,
+    so clients that don't know about it keep getting JSON.
+    """
+    if msgpack is None or not accept:
+        return False
+    accepted = _accept_qualities(accept)
+    msgpack_quality = max(accepted.get(media, 0.0) for media in MSGPACK_MEDIA_TYPES)
+    json_quality = accepted.get(
+        "application/json", accepted.get("application/*", accepted.get("*/*", 0.0))
+    )
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, use_bin_type=True)
+
+
+def unpackb(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
+
+
+class MsgPackResponse(Response):
+    """Response rendered as MessagePack instead of JSON.
+
+    Content is expected in JSON mode (as response models serialize it), so
+    both formats carry exactly the same values.
+    """
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
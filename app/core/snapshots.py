@@ -0,0 +1,252 @@
+import asyncio
+import itertools
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_shard_router
+from app.models import Item, User
+from app.repositories import ItemRepository, UserRepository
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+
+class SnapshotUnavailableError(RuntimeError):
+    """Raised when the optional snapshot dependencies are not installed."""
+
+
+SNAPSHOT_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+MANIFEST_NAME = "manifest.json"
+
+USER_COLUMNS = [column for column in User.__table__.columns if column.key != "hashed_password"]
+ITEM_COLUMNS = list(Item.__table__.columns)
+
+# Serializes exports within the process; they rewrite shared files
+_export_lock = asyncio.Lock()
+
+# Rows are stamped with the start time of the transaction writing them, so
+# one still open at export time can commit rows older than the export
+_OLDEST_TRANSACTION_START = text(
+    "SELECT min(xact_start) FROM pg_stat_activity WHERE datname = current_database()"
+)
+
+
+def arrow_schema(columns: List[Any]) -> "pa.Schema":
+    types = {
+        int: pa.int64(),
+        str: pa.string(),
+        bool: pa.bool_(),
+        datetime: pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema(
+        [pa.field(column.key, types[column.type.python_type], column.nullable) for column in columns]
+    )
+
+
+class _PartitionWriter:
+    """Writes one partition file, replacing the previous one when closed."""
+
+    def __init__(self, path: Path, schema: "pa.Schema", format: str):
+        self.path = path
+        self.temp_path = path.with_name(path.name + ".tmp")
+        if format == "parquet":
+            self.writer = pq.ParquetWriter(self.temp_path, schema)
+        else:
+            self.writer = pa.ipc.new_file(str(self.temp_path), schema)
+        self.rows = 0
+
+    def write(self, batch: "pa.RecordBatch") -> None:
+        self.writer.write_batch(batch)
+        self.rows += batch.num_rows
+
+    def close(self) -> None:
+        self.writer.close()
+        os.replace(self.temp_path, self.path)
+
+
+async def _export_horizon(db: AsyncSession) -> datetime:
+    """Database time before which every write, on every shard, has committed.
+
+    On PostgreSQL that is the start of the oldest open transaction (whose
+    ``xact_start`` the database role must be allowed to see). Elsewhere it
+    is the current time, less a second for coarse timestamps.
+    """
+    shards = get_shard_router(db)
+    horizons = []
+    for shard, shard_engine in shards.engines.items():
+        bind = {"shard_id": shard}
+        horizon = await db.scalar(select(func.now()), bind_arguments=bind)
+        if shard_engine.dialect.name == "postgresql":
+            oldest = await db.scalar(_OLDEST_TRANSACTION_START, bind_arguments=bind)
+            horizons.append(min(horizon, oldest) if oldest is not None else horizon)
+        else:
+            horizons.append(horizon - timedelta(seconds=1))
+    return min(horizons)
+
+
+def _read_manifest(directory: Path) -> Optional[Dict[str, Any]]:
+    path = directory / MANIFEST_NAME
+    if not path.is_file():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+async def _export_table(
+    repo,
+    columns: List[Any],
+    directory: Path,
+    format: str,
+    partition_size: int,
+    chunk_size: int,
+    previous: Optional[Dict[str, int]],
+    since: Optional[datetime],
+) -> Dict[str, Any]:
+    """Rewrite the partitions of one table that changed since the last export."""
+    current = await repo.get_export_partitions(partition_size, since)
+    if previous is None:
+        dirty = set(current)
+        removed = set()
+    else:
+        dirty = {
+            partition
+            for partition, (rows, changed) in current.items()
+            if changed or previous.get(str(partition)) != rows
+        }
+        removed = {int(partition) for partition in previous} - set(current)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = SNAPSHOT_FORMATS[format]
+    schema = arrow_schema(columns)
+    written: Dict[int, int] = {}
+    writer: Optional[_PartitionWriter] = None
+    if dirty:
+        async for rows in repo.stream_export(columns, partition_size, sorted(dirty), chunk_size):
+            # Rows come in id order and the id is the first column
+            for partition, group in itertools.groupby(rows, lambda row: row[0] // partition_size):
+                if partition not in written:
+                    if writer is not None:
+                        await asyncio.to_thread(writer.close)
+                    writer = _PartitionWriter(
+                        directory / f"part-{partition:08d}{suffix}", schema, format
+                    )
+                    written[partition] = 0
+                group = list(group)
+                batch = pa.RecordBatch.from_arrays(
+                    [
+                        pa.array(values, type=field.type)
+                        for values, field in zip(zip(*group), schema)
+                    ],
+                    schema=schema,
+                )
+                await asyncio.to_thread(writer.write, batch)
+                written[partition] = writer.rows
+        if writer is not None:
+            await asyncio.to_thread(writer.close)
+
+    # Partitions emptied since they were counted are removed as well
+    removed |= dirty - set(written)
+    for partition in removed:
+        (directory / f"part-{partition:08d}{suffix}").unlink(missing_ok=True)
+
+    partition_rows = {
+        partition: written.get(partition, rows)
+        for partition, (rows, _) in current.items()
+        if partition not in removed
+    }
+    return {
+        "partitions": {str(partition): rows for partition, rows in sorted(partition_rows.items())},
+        "rewritten": sorted(written),
+        "removed": sorted(removed),
+        "rows": sum(partition_rows.values()),
+    }
+
+
+async def export_snapshot(
+    db: AsyncSession,
+    directory: Optional[str] = None,
+    format: Optional[str] = None,
+    full: bool = False,
+    chunk_size: Optional[int] = None,
+    partition_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Export users (without password hashes) and items as columnar files.
+
+    Each table is written to ``<directory>/<table>/part-NNNNNNNN.<format>``,
+    one file per ``id // partition_size`` range, in record batches of
+    ``chunk_size`` rows read with a server-side cursor. ``manifest.json``
+    records the rows per partition and the time every earlier write had
+    committed by; the next export only rewrites partitions with rows created
+    or updated since then, or whose row count changed (deletes), unless
+    ``full`` is set or the format or partition size changed.
+    """
+    if pa is None:
+        raise SnapshotUnavailableError("Snapshot export requires the 'pyarrow' package")
+    format = format or settings.SNAPSHOT_FORMAT
+    if format not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Unknown snapshot format: {format}")
+    directory = Path(directory or settings.SNAPSHOT_DIR)
+    chunk_size = chunk_size or settings.SNAPSHOT_CHUNK_SIZE
+    partition_size = partition_size or settings.SNAPSHOT_PARTITION_ROWS
+
+    async with _export_lock:
+        manifest = await asyncio.to_thread(_read_manifest, directory)
+        incremental = (
+            not full
+            and manifest is not None
+            and manifest["format"] == format
+            and manifest["partition_size"] == partition_size
+        )
+        since = datetime.fromisoformat(manifest["exported_at"]) if incremental else None
+        # Writes stamped later than this may not be visible to this export,
+        # so they count as changed next time
+        exported_at = await _export_horizon(db)
+
+        tables = {}
+        for name, repo, columns in (
+            ("users", UserRepository(db), USER_COLUMNS),
+            ("items", ItemRepository(db), ITEM_COLUMNS),
+        ):
+            tables[name] = await _export_table(
+                repo,
+                columns,
+                directory / name,
+                format,
+                partition_size,
+                chunk_size,
+                manifest["tables"].get(name) if incremental else None,
+                since,
+            )
+
+        manifest = {
+            "format": format,
+            "partition_size": partition_size,
+            "exported_at": exported_at.isoformat(),
+            "tables": {name: table["partitions"] for name, table in tables.items()},
+        }
+        manifest_path = directory / MANIFEST_NAME
+        temp_path = manifest_path.with_name(MANIFEST_NAME + ".tmp")
+        await asyncio.to_thread(temp_path.write_text, json.dumps(manifest), "utf-8")
+        await asyncio.to_thread(os.replace, temp_path, manifest_path)
+
+    return {
+        "format": format,
+        "directory": str(directory),
+        "incremental": incremental,
+        "exported_at": exported_at.isoformat(),
+        "tables": {
+            name: {key: table[key] for key in ("rows", "rewritten", "removed")}
+            for name, table in tables.items()
+        },
+    }
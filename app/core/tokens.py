@@ -0,0 +1,179 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+    Ed25519PrivateKey,
+    Ed25519PublicKey,
+)
+from jose import jwk, jwt
+from jose.exceptions import JWKError
+
+from app.core.metrics import Counter
+
+TOKEN_CACHE = Counter(
+    "token_verify_cache_total", "Token verifications, by whether the cache had them", ["result"]
+)
+
+ASYMMETRIC_ALGORITHMS = ("ES256", "EdDSA")
+
+
+class EdDSAKey(jwk.Key):
+    """Ed25519 key for the "EdDSA" JWS algorithm, which python-jose lacks.
+
+    Registered with jose below, so ``jwt.encode`` and ``jwt.decode`` handle
+    EdDSA like any other algorithm.
+    """
+
+    def __init__(self, key, algorithm: str):
+        if algorithm != "EdDSA":
+            raise JWKError(f"Unsupported algorithm for an Ed25519 key: {algorithm}")
+        if isinstance(key, str):
+            key = key.encode()
+        if isinstance(key, bytes):
+            try:
+                key = serialization.load_pem_private_key(key, password=None)
+            except ValueError:
+                key = serialization.load_pem_public_key(key)
+        if not isinstance(key, (Ed25519PrivateKey, Ed25519PublicKey)):
+            raise JWKError("Not an Ed25519 key")
+        self._key = key
+        self._algorithm = algorithm
+
+    def is_public(self) -> bool:
+        return isinstance(self._key, Ed25519PublicKey)
+
+    def sign(self, msg: bytes) -> bytes:
+        if self.is_public():
+            raise JWKError("A public key can't sign")
+        return self._key.sign(msg)
+
+    def verify(self, msg: bytes, sig: bytes) -> bool:
+        key = self._key if self.is_public() else self._key.public_key()
+        try:
+            key.verify(sig, msg)
+        except InvalidSignature:
+            return False
+        return True
+
+    def public_key(self) -> "EdDSAKey":
+        return self if self.is_public() else EdDSAKey(self._key.public_key(), self._algorithm)
+
+
+jwk.register_key("EdDSA", EdDSAKey)
+
+
+def load_token_keys(
+    algorithm: str,
+    secret_key: str,
+    private_key: Optional[str] = None,
+    public_key: Optional[str] = None,
+) -> Tuple[Optional[jwk.Key], jwk.Key]:
+    """Parse the signing and verification keys once, up front.
+
+    HMAC algorithms sign and verify with ``secret_key``. Asymmetric ones sign
+    with the PEM ``private_key`` and verify with the PEM ``public_key``
+    (derived from the private key if not given); without a private key the
+    signing key is None and tokens can only be verified.
+    """
+    if algorithm not in ASYMMETRIC_ALGORITHMS:
+        key = jwk.construct(secret_key, algorithm)
+        return key, key
+    if private_key is None and public_key is None:
+        raise ValueError(f"{algorithm} requires JWT_PRIVATE_KEY or JWT_PUBLIC_KEY")
+    signing_key = jwk.construct(private_key, algorithm) if private_key else None
+    verification_key = (
+        jwk.construct(public_key, algorithm) if public_key else signing_key.public_key()
+    )
+    return signing_key, verification_key
+
+
+class VerifiedTokenCache:
+    """LRU of tokens whose signature was verified, with their claims.
+
+    Keyed by a digest of the token, so entries stay small. An entry is only
+    used before the token's ``exp``; after that it is dropped and the token
+    goes through full verification again, which rejects it.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+        return dict(entry[0])
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        if self.max_size <= 0:
+            return
+        expires = claims.get("exp")
+        entry = (dict(claims), float(expires) if expires is not None else float("inf"))
+        digest = self._digest(token)
+        with self._lock:
+            self._entries[digest] = entry
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class JWTCodec:
+    """Signs and verifies JWTs with pre-loaded keys and a verification cache.
+
+    Repeat presentations of a token are answered from the cache, skipping
+    signature verification; ``cache_size=0`` disables it.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        secret_key: str = "",
+        private_key: Optional[str] = None,
+        public_key: Optional[str] = None,
+        cache_size: int = 10_000,
+    ):
+        self.algorithm = algorithm
+        self.signing_key, self.verification_key = load_token_keys(
+            algorithm, secret_key, private_key, public_key
+        )
+        self.cache = VerifiedTokenCache(cache_size)
+
+    def encode(self, claims: Dict[str, Any]) -> str:
+        if self.signing_key is None:
+            raise RuntimeError(f"Issuing {self.algorithm} tokens requires JWT_PRIVATE_KEY")
+        return jwt.encode(claims, self.signing_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        """Verify a token and return its claims; raises JWTError if invalid."""
+        claims = self.cache.get(token)
+        if claims is not None:
+            TOKEN_CACHE.inc(result="hit")
+            return claims
+        TOKEN_CACHE.inc(result="miss")
+        claims = jwt.decode(token, self.verification_key, algorithms=[self.algorithm])
+        self.cache.put(token, claims)
+        return claims
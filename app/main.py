@@ -3,19 +3,46 @@ from contextlib import asynccontextmanager
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from app.api.v1 import auth, items, users
+from app.api.ratelimit import rate_limit_dependencies
+from app.api.v1 import auth, debug, items, jobs, users
+from app.core import health
+from app.core.admission import AdmissionMiddleware, RouteClass
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
 from app.core.database import create_tables
+from app.core.events import broker
+from app.core.http_cache import CachePolicy, HTTPCacheMiddleware, response_cache
+from app.core.idempotency import IdempotencyMiddleware, idempotency_store
+from app.core.jobs import job_runner
+from app.core.logs import AccessLogMiddleware, access_sampler, log_pipeline
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import render_metrics
+from app.core.ratelimit import rate_limit_backend
+from app.core.revocation import token_denylist
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    await log_pipeline.start()
+    if settings.LOOP_MONITOR_ENABLED:
+        await loop_monitor.start()
     await create_tables()
+    await token_denylist.start()
+    await broker.start()
+    await response_cache.start()
+    await job_runner.start()
     yield
     # Shutdown
-    pass
+    await job_runner.stop()
+    await response_cache.stop()
+    await broker.stop()
+    await token_denylist.stop()
+    await rate_limit_backend.close()
+    await loop_monitor.stop()
+    await log_pipeline.stop()
 
 
 def create_app() -> FastAPI:
@@ -26,6 +53,48 @@ def create_app() -> FastAPI:
         lifespan=lifespan,
     )
 
+    if settings.IDEMPOTENCY_ENABLED:
+        # Innermost, so it stores responses before they are compressed and
+        # duplicates shed by admission control never reach it
+        app.add_middleware(
+            IdempotencyMiddleware,
+            store=idempotency_store,
+            paths=settings.IDEMPOTENCY_PATHS,
+        )
+
+    if settings.ADMISSION_ENABLED:
+        # Added early so the middlewares below wrap its 503 responses
+        app.add_middleware(
+            AdmissionMiddleware,
+            default=RouteClass(
+                "default",
+                prefixes=(),
+                limit=settings.ADMISSION_LIMIT,
+                max_queue=settings.ADMISSION_MAX_QUEUE,
+                queue_timeout=settings.ADMISSION_QUEUE_SECONDS,
+            ),
+            route_classes=[
+                RouteClass(
+                    "auth",
+                    prefixes=settings.ADMISSION_AUTH_PATHS,
+                    limit=settings.ADMISSION_AUTH_LIMIT,
+                    max_queue=settings.ADMISSION_AUTH_MAX_QUEUE,
+                    queue_timeout=settings.ADMISSION_AUTH_QUEUE_SECONDS,
+                ),
+            ],
+            exempt_prefixes=settings.ADMISSION_EXEMPT_PATHS,
+            retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+        )
+
+    # Outside admission control, so cached responses are served under load
+    app.add_middleware(
+        HTTPCacheMiddleware,
+        policies={
+            path: CachePolicy(**policy) for path, policy in settings.HTTP_CACHE_POLICIES.items()
+        },
+        cache=response_cache if settings.RESPONSE_CACHE_ENABLED else None,
+    )
+
     # CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -35,10 +104,54 @@ def create_app() -> FastAPI:
         allow_headers=settings.ALLOWED_HEADERS,
     )
 
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+            encodings=settings.COMPRESSION_ENCODINGS,
+            levels={
+                "gzip": settings.COMPRESSION_GZIP_LEVEL,
+                "br": settings.COMPRESSION_BROTLI_LEVEL,
+                "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+            },
+        )
+
+    if settings.ACCESS_LOG_ENABLED:
+        # Outermost, so latency covers every other middleware
+        app.add_middleware(
+            AccessLogMiddleware,
+            sampler=access_sampler,
+            slow_seconds=settings.ACCESS_LOG_SLOW_SECONDS,
+            exclude_prefixes=settings.ACCESS_LOG_EXCLUDE_PATHS,
+        )
+
     # Include routers
-    app.include_router(auth.router, prefix="/api/v1/auth", tags=["authentication"])
-    app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
-    app.include_router(items.router, prefix="/api/v1/items", tags=["items"])
+    app.include_router(
+        auth.router,
+        prefix="/api/v1/auth",
+        tags=["authentication"],
+        dependencies=rate_limit_dependencies("auth", settings.RATE_LIMIT_AUTH, per_user=False),
+    )
+    app.include_router(
+        users.router,
+        prefix="/api/v1/users",
+        tags=["users"],
+        dependencies=rate_limit_dependencies("users", settings.RATE_LIMIT_USERS),
+    )
+    app.include_router(
+        items.router,
+        prefix="/api/v1/items",
+        tags=["items"],
+        dependencies=rate_limit_dependencies("items", settings.RATE_LIMIT_ITEMS),
+    )
+    app.include_router(
+        jobs.router,
+        prefix="/api/v1/jobs",
+        tags=["jobs"],
+        dependencies=rate_limit_dependencies("jobs", settings.RATE_LIMIT_JOBS),
+    )
+    # Answers 404 unless DEBUG_ENDPOINTS_ENABLED
+    app.include_router(debug.router, prefix="/debug", tags=["debug"], include_in_schema=False)
 
     @app.get("/")
     async def root():
@@ -48,6 +161,29 @@ def create_app() -> FastAPI:
     async def health_check():
         return {"status": "healthy"}
 
+    @app.get("/health/live")
+    async def liveness_check():
+        """The process is up and its event loop is serving requests."""
+        return {"status": "alive"}
+
+    @app.get("/health/ready")
+    async def readiness_check():
+        """Whether to send this worker traffic; 503 with the failed checks if not."""
+        ready, checks = await health.readiness.check()
+        return JSONResponse(
+            {"status": "ready" if ready else "unready", "checks": checks},
+            status_code=200 if ready else 503,
+            headers={"Cache-Control": "no-store"},
+        )
+
+    if settings.METRICS_ENABLED:
+
+        @app.get("/metrics", include_in_schema=False)
+        async def metrics():
+            return PlainTextResponse(
+                render_metrics(), media_type="text/plain; version=0.0.4"
+            )
+
     return app
 
 
@@ -60,4 +196,6 @@ if __name__ == "__main__":
         port=settings.PORT,
         reload=settings.DEBUG,
         log_level=settings.LOG_LEVEL,
+        # Replaced by the structured access log
+        access_log=not settings.ACCESS_LOG_ENABLED,
     )
@@ -1,12 +1,30 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.core.database import Base
 
+# Item ids span the id ranges of all item shards; SQLite needs plain INTEGER
+# for its rowid alias
+ItemId = BigInteger().with_variant(Integer, "sqlite")
+
 
 class User(Base):
     __tablename__ = "users"
+    # Fetch server-generated columns with RETURNING as part of the flush
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(50), unique=True, index=True, nullable=False)
@@ -16,7 +34,9 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), default=func.now(), onupdate=func.now()
+    )
 
     # Relationship with lazy loading to avoid greenlet issues
     items = relationship("Item", back_populates="owner", lazy="select")
@@ -24,15 +44,104 @@ class User(Base):
 
 class Item(Base):
     __tablename__ = "items"
+    __mapper_args__ = {"eager_defaults": True}
+    # Serves per-owner listings and the min/max price lookups of UserItemStats.
+    # AUTOINCREMENT keeps SQLite on the id range of its shard, see ShardRouter.
+    __table_args__ = (
+        Index("ix_items_owner_id_price", "owner_id", "price"),
+        {"sqlite_autoincrement": True},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(ItemId, primary_key=True, index=True)
     title = Column(String(100), index=True, nullable=False)
     description = Column(Text)
     price = Column(Integer)  # Store price in cents
     is_active = Column(Boolean, default=True)
     owner_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), default=func.now(), onupdate=func.now()
+    )
 
     # Relationship with lazy loading to avoid greenlet issues
     owner = relationship("User", back_populates="items", lazy="select")
+
+
+class ItemChange(Base):
+    """Append-only log of item writes, including tombstones for deletes.
+
+    The auto-incrementing id is the cursor of the item change feed.
+    """
+
+    __tablename__ = "item_changes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    item_id = Column(ItemId, index=True, nullable=False)
+    owner_id = Column(Integer)
+    operation = Column(String(10), nullable=False)  # "create", "update" or "delete"
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class UserItemStats(Base):
+    """Per-user item summary, kept up to date by ItemRepository writes."""
+
+    __tablename__ = "user_item_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    item_count = Column(Integer, nullable=False, default=0)
+    active_count = Column(Integer, nullable=False, default=0)
+    price_sum = Column(BigInteger, nullable=False, default=0)  # In cents
+    price_min = Column(Integer)
+    price_max = Column(Integer)
+
+
+class Job(Base):
+    """A background job, see app.core.jobs."""
+
+    __tablename__ = "jobs"
+    __mapper_args__ = {"eager_defaults": True}
+
+    id = Column(String(36), primary_key=True)
+    kind = Column(String(50), nullable=False)
+    status = Column(String(20), index=True, nullable=False, default="pending")
+    params = Column(JSON)
+    owner_id = Column(Integer, ForeignKey("users.id"))
+    result_path = Column(String(255))
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    # Renewed by the worker running the job; once it lapses the job is
+    # requeued
+    lease_until = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+
+class RevokedToken(Base):
+    """A revoked token id or token family, kept until the token expires.
+
+    The auto-incrementing id lets workers pick up each other's revocations,
+    see app.core.revocation.
+    """
+
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(64), unique=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
+
+
+class IdempotencyKey(Base):
+    """The stored response to a request sent with an Idempotency-Key.
+
+    Rows without a status code are claims by a request still running, see
+    app.core.idempotency.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(64), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer)
+    headers = Column(JSON)
+    body = Column(LargeBinary)
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
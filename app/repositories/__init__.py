@@ -1,12 +1,166 @@
-from typing import List, Optional
+import asyncio
+import heapq
+import uuid
+from datetime import UTC, datetime, timedelta
+from itertools import islice
+from typing import Any, AsyncIterator, Collection, Dict, List, Optional, Sequence, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import and_, bindparam, case, delete, func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.core.security import get_password_hash, verify_password
-from app.models import Item, User
-from app.schemas import ItemCreate, ItemUpdate, UserCreate, UserUpdate
+from app.core.config import settings
+from app.core.database import get_shard_router
+from app.core.events import queue_event
+from app.core.http_cache import invalidate_after_commit
+from app.core.security import get_password_hash, verify_and_update_password
+from app.models import Item, ItemChange, Job, User, UserItemStats
+from app.schemas import ItemCreate, ItemInDB, ItemUpdate, UserCreate, UserUpdate
+
+# Repositories only flush their changes. The caller owns the transaction: API
+# requests commit once when the endpoint returns (see app.api.routing.AppRoute),
+# other callers commit the session themselves.
+
+# Hot-path statements are built once and executed with bound parameters, so
+# SQLAlchemy reuses their memoized cache key and compiled form on every call
+# instead of rebuilding the construct per request.
+_USER_BY_ID = (
+    select(User)
+    .options(selectinload(User.items))
+    .where(User.id == bindparam("user_id"))
+)
+_USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+_USERS_PAGE = (
+    select(User)
+    .options(selectinload(User.items))
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+_ITEM_BY_ID = (
+    select(Item)
+    .options(selectinload(Item.owner))
+    .where(Item.id == bindparam("item_id"))
+)
+_ITEMS_PAGE = (
+    select(Item)
+    .options(selectinload(Item.owner))
+    .order_by(Item.id)
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+_ITEMS_PAGE_BY_OWNER = _ITEMS_PAGE.where(Item.owner_id == bindparam("owner_id"))
+
+# Column-level read path: exactly the ``ItemResponse`` columns, with the owner
+# joined in when requested, mapped straight to dicts without ORM hydration.
+# When items live on other databases than users (see ShardRouter), the
+# ``_OWNER_ID`` variants select the owner id instead and owners are looked up
+# separately.
+_ITEM_ROW_KEYS = ("id", "title", "description", "price", "is_active", "created_at")
+_OWNER_ROW_KEYS = ("id", "username", "email", "full_name", "is_active", "created_at")
+_ITEM_ROW_COLUMNS = [getattr(Item, key) for key in _ITEM_ROW_KEYS]
+_OWNER_ROW_COLUMNS = [getattr(User, key) for key in _OWNER_ROW_KEYS]
+_ITEM_ROWS = select(*_ITEM_ROW_COLUMNS).order_by(Item.id)
+_ITEM_OWNER_ROWS = _ITEM_ROWS.add_columns(*_OWNER_ROW_COLUMNS).outerjoin(
+    User, Item.owner_id == User.id
+)
+_ITEM_OWNER_ID_ROWS = _ITEM_ROWS.add_columns(Item.owner_id)
+_ITEM_ROWS_PAGE = (
+    _ITEM_ROWS.where(Item.id > bindparam("after_id"))
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+_ITEM_ROWS_PAGE_BY_OWNER = _ITEM_ROWS_PAGE.where(Item.owner_id == bindparam("owner_id"))
+_ITEM_OWNER_ROWS_PAGE = (
+    _ITEM_OWNER_ROWS.where(Item.id > bindparam("after_id"))
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+_ITEM_OWNER_ROWS_PAGE_BY_OWNER = _ITEM_OWNER_ROWS_PAGE.where(
+    Item.owner_id == bindparam("owner_id")
+)
+_ITEM_OWNER_ID_ROWS_PAGE = _ITEM_ROWS_PAGE.add_columns(Item.owner_id)
+_ITEM_OWNER_ID_ROWS_PAGE_BY_OWNER = _ITEM_ROWS_PAGE_BY_OWNER.add_columns(Item.owner_id)
+_ITEM_OWNER_ROWS_BY_IDS = _ITEM_OWNER_ROWS.where(
+    Item.id.in_(bindparam("item_ids", expanding=True))
+)
+_ITEM_OWNER_ID_ROWS_BY_IDS = _ITEM_OWNER_ID_ROWS.where(
+    Item.id.in_(bindparam("item_ids", expanding=True))
+)
+_OWNER_ROWS_BY_IDS = select(*_OWNER_ROW_COLUMNS).where(
+    User.id.in_(bindparam("owner_ids", expanding=True))
+)
+
+_ITEM_EVENT_TYPES = {
+    "create": "item.created",
+    "update": "item.updated",
+    "delete": "item.deleted",
+}
+_ITEM_CHANGES_SINCE = (
+    select(
+        ItemChange.id, ItemChange.item_id, ItemChange.operation, ItemChange.changed_at
+    )
+    .where(ItemChange.id > bindparam("since"))
+    .order_by(ItemChange.id)
+    .limit(bindparam("limit"))
+)
+
+
+def _before_recent_gap(rows, since: int) -> int:
+    """How many of the change ``rows`` come before a gap that may still fill."""
+    horizon = datetime.now(UTC) - timedelta(seconds=settings.CHANGE_FEED_GAP_SECONDS)
+    previous = since
+    for index, row in enumerate(rows):
+        changed_at = row.changed_at
+        if changed_at.tzinfo is None:
+            # SQLite returns naive UTC timestamps
+            changed_at = changed_at.replace(tzinfo=UTC)
+        if row.id > previous + 1 and changed_at > horizon:
+            return index
+        previous = row.id
+    return len(rows)
+
+
+def _item_rows_to_dicts(rows, include_owner: bool) -> List[Dict[str, Any]]:
+    """Map ``_ITEM_*ROWS*`` result tuples to response-shaped dicts."""
+    split = len(_ITEM_ROW_KEYS)
+    items = []
+    for row in rows:
+        item = dict(zip(_ITEM_ROW_KEYS, row[:split]))
+        if include_owner:
+            owner = row[split:]
+            item["owner"] = (
+                dict(zip(_OWNER_ROW_KEYS, owner)) if owner[0] is not None else None
+            )
+        items.append(item)
+    return items
+
+
+def _export_partitions_query(model, partition_size: int, since: Optional[datetime]):
+    """Rows per id-range partition, and whether any changed since ``since``."""
+    partition = (model.id // partition_size).label("partition")
+    changed = (
+        func.max(
+            case((func.coalesce(model.updated_at, model.created_at) >= since, 1), else_=0)
+        )
+        if since is not None
+        else literal(1)
+    )
+    return select(partition, func.count(), changed).group_by(partition)
+
+
+def _export_rows_query(
+    model, columns: List[Any], partition_size: int, partitions: Optional[Collection[int]]
+):
+    query = select(*columns).order_by(model.id)
+    if partitions is not None:
+        query = query.where((model.id // partition_size).in_(list(partitions)))
+    return query
+
+
+def _partition_summary(rows) -> Dict[int, Tuple[int, bool]]:
+    return {partition: (count, bool(changed)) for partition, count, changed in rows}
 
 
 class UserRepository:
@@ -14,30 +168,26 @@ class UserRepository:
         self.db = db
 
     async def get_by_id(self, user_id: int) -> Optional[User]:
-        result = await self.db.execute(
-            select(User).options(selectinload(User.items)).where(User.id == user_id)
-        )
+        result = await self.db.execute(_USER_BY_ID, {"user_id": user_id})
         return result.scalar_one_or_none()
 
     async def get_by_username(self, username: str) -> Optional[User]:
-        result = await self.db.execute(select(User).where(User.username == username))
+        result = await self.db.execute(_USER_BY_USERNAME, {"username": username})
         return result.scalar_one_or_none()
 
     async def get_by_email(self, email: str) -> Optional[User]:
-        result = await self.db.execute(select(User).where(User.email == email))
+        result = await self.db.execute(_USER_BY_EMAIL, {"email": email})
         return result.scalar_one_or_none()
 
     async def get_multi(self, skip: int = 0, limit: int = 100) -> List[User]:
-        result = await self.db.execute(
-            select(User).options(selectinload(User.items)).offset(skip).limit(limit)
-        )
+        result = await self.db.execute(_USERS_PAGE, {"skip": skip, "limit": limit})
         return result.scalars().all()
 
     async def create(self, user_data) -> User:
         """Create a new user. Accepts either UserCreate or dict."""
         if isinstance(user_data, UserCreate):
             # Handle UserCreate schema - hash the password
-            hashed_password = get_password_hash(user_data.password)
+            hashed_password = await asyncio.to_thread(get_password_hash, user_data.password)
             db_user = User(
                 username=user_data.username,
                 email=user_data.email,
@@ -49,8 +199,9 @@ class UserRepository:
             db_user = User(**user_data)
 
         self.db.add(db_user)
-        await self.db.commit()
-        await self.db.refresh(db_user)
+        await self.db.flush()
+        self.db.add(UserItemStats(user_id=db_user.id))
+        await self.db.flush()
         return db_user
 
     async def update(self, user_id: int, user_update: UserUpdate) -> Optional[User]:
@@ -62,8 +213,7 @@ class UserRepository:
         for field, value in update_data.items():
             setattr(db_user, field, value)
 
-        await self.db.commit()
-        await self.db.refresh(db_user)
+        await self.db.flush()
         return db_user
 
     async def delete(self, user_id: int) -> bool:
@@ -71,38 +221,531 @@ class UserRepository:
         if not db_user:
             return False
 
+        await self.db.execute(
+            delete(UserItemStats).where(UserItemStats.user_id == user_id),
+            bind_arguments={"shard_id": get_shard_router(self.db).for_owner(user_id)},
+        )
         await self.db.delete(db_user)
-        await self.db.commit()
+        await self.db.flush()
         return True
 
     async def authenticate(self, username: str, password: str) -> Optional[User]:
+        """Check a user's password, rehashing it if its hash is outdated.
+
+        Hashing is deliberately slow, so it runs in a worker thread to keep
+        the event loop responsive.
+        """
         user = await self.get_by_username(username)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        valid, new_hash = await asyncio.to_thread(
+            verify_and_update_password, password, user.hashed_password
+        )
+        if not valid:
             return None
+        if new_hash is not None:
+            user.hashed_password = new_hash
+            await self.db.flush()
         return user
 
+    async def get_export_partitions(
+        self, partition_size: int, since: Optional[datetime] = None
+    ) -> Dict[int, Tuple[int, bool]]:
+        """Map each ``id // partition_size`` partition to its row count and
+        whether any of its rows was created or updated since ``since``."""
+        result = await self.db.execute(_export_partitions_query(User, partition_size, since))
+        return _partition_summary(result)
+
+    async def stream_export(
+        self,
+        columns: List[Any],
+        partition_size: int,
+        partitions: Optional[Collection[int]] = None,
+        chunk_size: int = 10_000,
+    ) -> AsyncIterator[List[Any]]:
+        """Stream ``columns`` of the users in ``partitions`` (all if None) in id
+        order, ``chunk_size`` rows at a time, with a server-side cursor."""
+        query = _export_rows_query(User, columns, partition_size, partitions)
+        result = await self.db.stream(query.execution_options(yield_per=chunk_size))
+        async for rows in result.partitions(chunk_size):
+            yield rows
+
+
+class UserItemStatsRepository:
+    """Reads and maintains the per-user item summary in ``user_item_stats``.
+
+    Counts and sums are adjusted with atomic ``col = col + delta`` updates in
+    the caller's transaction; min/max are widened on insert and re-read from
+    the (owner_id, price) index when a price goes away.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.shards = get_shard_router(db)
+
+    async def get(self, user_id: int) -> Optional[UserItemStats]:
+        """Get a user's stats, building them if missing; None for unknown users."""
+        stats = await self.db.get(UserItemStats, user_id, populate_existing=True)
+        if stats is None:
+            user_exists = await self.db.scalar(select(User.id).where(User.id == user_id))
+            if user_exists is None:
+                return None
+            await self.rebuild(user_id)
+            stats = await self.db.get(UserItemStats, user_id, populate_existing=True)
+        return stats
+
+    async def apply(
+        self,
+        owner_id: Optional[int],
+        count: int = 0,
+        active: int = 0,
+        price_sum: int = 0,
+        added_prices: Optional[List[int]] = None,
+        recompute_bounds: bool = False,
+    ) -> None:
+        """Apply the effect of flushed item writes to the owner's stats."""
+        if owner_id is None:
+            return
+        values = {
+            "item_count": UserItemStats.item_count + count,
+            "active_count": UserItemStats.active_count + active,
+            "price_sum": UserItemStats.price_sum + price_sum,
+        }
+        if recompute_bounds:
+            owned = Item.owner_id == owner_id
+            values["price_min"] = select(func.min(Item.price)).where(owned).scalar_subquery()
+            values["price_max"] = select(func.max(Item.price)).where(owned).scalar_subquery()
+        elif added_prices:
+            low, high = min(added_prices), max(added_prices)
+            values["price_min"] = case(
+                (UserItemStats.price_min.is_(None), low),
+                (UserItemStats.price_min > low, low),
+                else_=UserItemStats.price_min,
+            )
+            values["price_max"] = case(
+                (UserItemStats.price_max.is_(None), high),
+                (UserItemStats.price_max < high, high),
+                else_=UserItemStats.price_max,
+            )
+        stmt = (
+            update(UserItemStats)
+            .where(UserItemStats.user_id == owner_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        shard = {"shard_id": self.shards.for_owner(owner_id)}
+        result = await self.db.execute(stmt, bind_arguments=shard)
+        if result.rowcount:
+            return
+        # No stats row yet (e.g. a user created before stats existed): build it
+        # from the items table, which already includes the flushed writes.
+        try:
+            async with self.db.begin_nested():
+                await self.rebuild(owner_id)
+        except IntegrityError:
+            # A concurrent transaction created the row first
+            await self.db.execute(stmt, bind_arguments=shard)
+
+    async def get_top_by_value(
+        self, limit: int = 20, user_id: Optional[int] = None
+    ) -> List[UserItemStats]:
+        """Get stats rows ordered by the total price of the user's items."""
+        def sort_key(stats: UserItemStats):
+            return -stats.price_sum, stats.user_id
+
+        query = select(UserItemStats).order_by(
+            UserItemStats.price_sum.desc(), UserItemStats.user_id
+        )
+        shards = self.shards.item_shards
+        if user_id:
+            query = query.where(UserItemStats.user_id == user_id)
+            shards = [self.shards.for_owner(user_id)]
+        pages = []
+        for shard in shards:
+            result = await self.db.execute(
+                query.limit(limit), bind_arguments={"shard_id": shard}
+            )
+            pages.append(result.scalars().all())
+        return list(islice(heapq.merge(*pages, key=sort_key), limit))
+
+    async def rebuild(self, user_id: Optional[int] = None) -> int:
+        """Recompute stats from the items table for one user, or for everyone.
+
+        With items sharded away from users, a full rebuild only covers users
+        owning items; the others get their row on first read.
+        """
+        columns = [
+            func.count(Item.id),
+            func.coalesce(func.sum(case((Item.is_active.is_(True), 1), else_=0)), 0),
+            func.coalesce(func.sum(Item.price), 0),
+            func.min(Item.price),
+            func.max(Item.price),
+        ]
+        clear = delete(UserItemStats)
+        if user_id is not None:
+            # Aggregating without GROUP BY yields a row even without items
+            aggregates = select(literal(user_id), *columns).where(Item.owner_id == user_id)
+            clear = clear.where(UserItemStats.user_id == user_id)
+            shards = [self.shards.for_owner(user_id)]
+        elif self.shards.colocated:
+            aggregates = (
+                select(User.id, *columns)
+                .select_from(User)
+                .outerjoin(Item, Item.owner_id == User.id)
+                .group_by(User.id)
+            )
+            shards = self.shards.item_shards
+        else:
+            aggregates = (
+                select(Item.owner_id, *columns)
+                .where(Item.owner_id.is_not(None))
+                .group_by(Item.owner_id)
+            )
+            shards = self.shards.item_shards
+
+        rebuilt = 0
+        for shard in shards:
+            await self.db.execute(clear, bind_arguments={"shard_id": shard})
+            result = await self.db.execute(
+                insert(UserItemStats).from_select(
+                    [
+                        "user_id",
+                        "item_count",
+                        "active_count",
+                        "price_sum",
+                        "price_min",
+                        "price_max",
+                    ],
+                    aggregates,
+                ),
+                bind_arguments={"shard_id": shard},
+            )
+            rebuilt += result.rowcount
+        return rebuilt
+
 
 class ItemRepository:
+    """Item reads and writes, routed to the item shard of the owner.
+
+    Single-owner and single-item operations run on one shard; listings across
+    owners query every shard and merge the results in id order.
+    """
+
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.shards = get_shard_router(db)
+        self.stats = UserItemStatsRepository(db)
+
+    def _shards_for(self, owner_id: Optional[int]) -> List[str]:
+        return [self.shards.for_owner(owner_id)] if owner_id else self.shards.item_shards
 
     async def get_by_id(self, item_id: int) -> Optional[Item]:
         result = await self.db.execute(
-            select(Item).options(selectinload(Item.owner)).where(Item.id == item_id)
+            _ITEM_BY_ID,
+            {"item_id": item_id},
+            bind_arguments={"shard_id": self.shards.for_item(item_id)},
         )
         return result.scalar_one_or_none()
 
     async def get_multi(
         self, skip: int = 0, limit: int = 100, owner_id: Optional[int] = None
     ) -> List[Item]:
-        query = select(Item).options(selectinload(Item.owner))
+        shards = self._shards_for(owner_id)
+        params = {"skip": skip, "limit": limit}
+        if len(shards) > 1:
+            params = {"skip": 0, "limit": skip + limit}
+        query = _ITEMS_PAGE
+        if owner_id:
+            query = _ITEMS_PAGE_BY_OWNER
+            params["owner_id"] = owner_id
+        pages = []
+        for shard in shards:
+            result = await self.db.execute(query, params, bind_arguments={"shard_id": shard})
+            pages.append(result.scalars().all())
+        if len(pages) == 1:
+            return pages[0]
+        return list(islice(heapq.merge(*pages, key=lambda item: item.id), skip, skip + limit))
+
+    async def get_multi_rows(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        owner_id: Optional[int] = None,
+        include_owner: bool = True,
+        after_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get a page of items as plain dicts shaped like ``ItemResponse``.
+
+        Only the response columns are selected, so no ORM objects are built and
+        nothing is added to the session's identity map. Rows are ordered by id
+        and start after ``after_id`` if given, which is the cheap way to page
+        across shards: each shard then returns at most ``limit`` rows, where
+        ``skip`` makes each return ``skip + limit``.
+        """
+        shards = self._shards_for(owner_id)
+        join_owner = include_owner and self.shards.colocated
+        params = {"after_id": after_id or 0, "skip": skip, "limit": limit}
+        if len(shards) > 1:
+            params.update(skip=0, limit=skip + limit)
+        if owner_id:
+            params["owner_id"] = owner_id
+            if join_owner:
+                query = _ITEM_OWNER_ROWS_PAGE_BY_OWNER
+            elif include_owner:
+                query = _ITEM_OWNER_ID_ROWS_PAGE_BY_OWNER
+            else:
+                query = _ITEM_ROWS_PAGE_BY_OWNER
+        elif join_owner:
+            query = _ITEM_OWNER_ROWS_PAGE
+        elif include_owner:
+            query = _ITEM_OWNER_ID_ROWS_PAGE
+        else:
+            query = _ITEM_ROWS_PAGE
+
+        pages = []
+        for shard in shards:
+            result = await self.db.execute(query, params, bind_arguments={"shard_id": shard})
+            pages.append(result.all())
+        if len(pages) == 1:
+            rows = pages[0]
+        else:
+            rows = list(islice(heapq.merge(*pages, key=lambda row: row[0]), skip, skip + limit))
+        if include_owner and not join_owner:
+            return await self._rows_with_owners(rows)
+        return _item_rows_to_dicts(rows, include_owner)
+
+    async def _rows_with_owners(self, rows) -> List[Dict[str, Any]]:
+        """Map ``_OWNER_ID`` rows to dicts, looking their owners up by id."""
+        items = _item_rows_to_dicts(rows, include_owner=False)
+        owner_ids = list({row[-1] for row in rows if row[-1] is not None})
+        owners = {}
+        if owner_ids:
+            result = await self.db.execute(_OWNER_ROWS_BY_IDS, {"owner_ids": owner_ids})
+            owners = {row[0]: dict(zip(_OWNER_ROW_KEYS, row)) for row in result}
+        for item, row in zip(items, rows):
+            item["owner"] = owners.get(row[-1])
+        return items
+
+    async def stream_rows(
+        self,
+        owner_id: Optional[int] = None,
+        include_owner: bool = True,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream all items as response-shaped dicts, ``chunk_size`` at a time.
+
+        Rows are fetched with a server-side cursor, so memory stays bounded by
+        one chunk however many items there are. Shards are read one by one.
+        """
+        join_owner = include_owner and self.shards.colocated
+        if join_owner:
+            query = _ITEM_OWNER_ROWS
+        else:
+            query = _ITEM_OWNER_ID_ROWS if include_owner else _ITEM_ROWS
         if owner_id:
             query = query.where(Item.owner_id == owner_id)
-        query = query.offset(skip).limit(limit)
-        result = await self.db.execute(query)
-        return result.scalars().all()
+        for shard in self._shards_for(owner_id):
+            result = await self.db.stream(
+                query.execution_options(yield_per=chunk_size),
+                bind_arguments={"shard_id": shard},
+            )
+            async for rows in result.partitions(chunk_size):
+                if include_owner and not join_owner:
+                    yield await self._rows_with_owners(rows)
+                else:
+                    yield _item_rows_to_dicts(rows, include_owner)
+
+    async def get_export_partitions(
+        self, partition_size: int, since: Optional[datetime] = None
+    ) -> Dict[int, Tuple[int, bool]]:
+        """Like ``UserRepository.get_export_partitions``, over every shard.
+
+        Shards have disjoint id ranges, so no partition spans two of them.
+        """
+        query = _export_partitions_query(Item, partition_size, since)
+        partitions = {}
+        for shard in self.shards.item_shards:
+            result = await self.db.execute(query, bind_arguments={"shard_id": shard})
+            partitions.update(_partition_summary(result))
+        return partitions
+
+    async def stream_export(
+        self,
+        columns: List[Any],
+        partition_size: int,
+        partitions: Optional[Collection[int]] = None,
+        chunk_size: int = 10_000,
+    ) -> AsyncIterator[List[Any]]:
+        """Like ``UserRepository.stream_export``, reading shards one by one in
+        id order."""
+        query = _export_rows_query(Item, columns, partition_size, partitions)
+        for shard in self.shards.item_shards:
+            result = await self.db.stream(
+                query.execution_options(yield_per=chunk_size),
+                bind_arguments={"shard_id": shard},
+            )
+            async for rows in result.partitions(chunk_size):
+                yield rows
+
+    async def get_price_summary(self, owner_id: Optional[int] = None) -> Dict[str, Any]:
+        """Count, sum, min and max of item prices, aggregated by the database."""
+        query = select(
+            func.count(Item.id).label("count"),
+            func.count(Item.price).label("priced_count"),
+            func.coalesce(func.sum(Item.price), 0).label("total"),
+            func.min(Item.price).label("min"),
+            func.max(Item.price).label("max"),
+        )
+        if owner_id:
+            query = query.where(Item.owner_id == owner_id)
+        summaries = []
+        for shard in self._shards_for(owner_id):
+            result = await self.db.execute(query, bind_arguments={"shard_id": shard})
+            summaries.append(result.one()._mapping)
+        mins = [summary["min"] for summary in summaries if summary["min"] is not None]
+        maxes = [summary["max"] for summary in summaries if summary["max"] is not None]
+        return {
+            "count": sum(summary["count"] for summary in summaries),
+            "priced_count": sum(summary["priced_count"] for summary in summaries),
+            "total": sum(summary["total"] for summary in summaries),
+            "min": min(mins, default=None),
+            "max": max(maxes, default=None),
+        }
+
+    async def get_price_percentiles(
+        self, percentiles: Sequence[float], owner_id: Optional[int] = None
+    ) -> Optional[List[Optional[float]]]:
+        """Price percentiles (0-100) from ``percentile_cont`` on PostgreSQL.
+
+        Returns None on databases without ordered-set aggregates, and when the
+        items span several shards, whose percentiles cannot be combined.
+        """
+        shards = self._shards_for(owner_id)
+        if len(shards) > 1 or self.db.get_bind(Item).dialect.name != "postgresql":
+            return None
+        query = select(
+            *(
+                func.percentile_cont(percentile / 100).within_group(Item.price)
+                for percentile in percentiles
+            )
+        )
+        if owner_id:
+            query = query.where(Item.owner_id == owner_id)
+        result = await self.db.execute(query, bind_arguments={"shard_id": shards[0]})
+        return list(result.one())
+
+    async def stream_prices(
+        self, owner_id: Optional[int] = None, chunk_size: int = 100_000
+    ) -> AsyncIterator[List[int]]:
+        """Stream non-null item prices, ``chunk_size`` at a time."""
+        query = select(Item.price).where(Item.price.is_not(None))
+        if owner_id:
+            query = query.where(Item.owner_id == owner_id)
+        for shard in self._shards_for(owner_id):
+            result = await self.db.stream_scalars(
+                query.execution_options(yield_per=chunk_size),
+                bind_arguments={"shard_id": shard},
+            )
+            async for prices in result.partitions(chunk_size):
+                yield prices
+
+    async def get_changes(
+        self, since: int = 0, limit: int = 100, shard: int = 0
+    ) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """Get item changes after the ``since`` cursor.
+
+        Several changes to the same item collapse into its latest one. Returns
+        the changes, the cursor to resume from, and whether more are pending.
+        Each item shard keeps its own change log, read with ``shard``.
+
+        Ids are assigned at insert, so a missing id may belong to a
+        transaction that hasn't committed yet. The feed therefore stops short
+        of a gap in the ids until the change after it is
+        ``CHANGE_FEED_GAP_SECONDS`` old; a gap still empty by then belongs
+        to a rolled-back write.
+        """
+        shard_id = self.shards.item_shards[shard]
+        result = await self.db.execute(
+            _ITEM_CHANGES_SINCE,
+            {"since": since, "limit": limit + 1},
+            bind_arguments={"shard_id": shard_id},
+        )
+        rows = result.all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        settled = _before_recent_gap(rows, since)
+        if settled < len(rows):
+            rows, has_more = rows[:settled], False
+
+        latest: Dict[int, Tuple[int, str]] = {}
+        for cursor, item_id, operation, _ in rows:
+            latest.pop(item_id, None)
+            latest[item_id] = (cursor, operation)
+
+        live_ids = [
+            item_id
+            for item_id, (_, operation) in latest.items()
+            if operation != "delete"
+        ]
+        items = {}
+        if live_ids:
+            if self.shards.colocated:
+                result = await self.db.execute(
+                    _ITEM_OWNER_ROWS_BY_IDS,
+                    {"item_ids": live_ids},
+                    bind_arguments={"shard_id": shard_id},
+                )
+                live_items = _item_rows_to_dicts(result.all(), include_owner=True)
+            else:
+                result = await self.db.execute(
+                    _ITEM_OWNER_ID_ROWS_BY_IDS,
+                    {"item_ids": live_ids},
+                    bind_arguments={"shard_id": shard_id},
+                )
+                live_items = await self._rows_with_owners(result.all())
+            for item in live_items:
+                items[item["id"]] = item
+
+        changes = []
+        for item_id, (cursor, operation) in latest.items():
+            item = items.get(item_id)
+            if item is None:
+                # Deleted since, its tombstone is further along the feed
+                operation = "delete"
+            changes.append(
+                {
+                    "cursor": cursor,
+                    "operation": operation,
+                    "item_id": item_id,
+                    "item": item,
+                }
+            )
+        return changes, rows[-1][0] if rows else since, has_more
+
+    def _record_change(self, db_item: Item, operation: str) -> ItemChange:
+        change = ItemChange(
+            item_id=db_item.id, owner_id=db_item.owner_id, operation=operation
+        )
+        self.db.add(change)
+        return change
+
+    def _queue_item_event(self, change: ItemChange, db_item: Item) -> None:
+        """Publish a flushed change to event subscribers after commit."""
+        invalidate_after_commit(self.db)
+        item = None
+        if change.operation != "delete":
+            item = ItemInDB.model_validate(db_item).model_dump(mode="json")
+        queue_event(
+            self.db,
+            {
+                "type": _ITEM_EVENT_TYPES[change.operation],
+                "cursor": change.id,
+                "shard": self.shards.index_for_owner(change.owner_id),
+                "item_id": change.item_id,
+                "owner_id": change.owner_id,
+                "item": item,
+            },
+        )
 
     async def create(self, item_create: ItemCreate, owner_id: int) -> Item:
         db_item = Item(
@@ -112,21 +755,102 @@ class ItemRepository:
             owner_id=owner_id,
         )
         self.db.add(db_item)
-        await self.db.commit()
-        await self.db.refresh(db_item)
+        await self.db.flush()
+        change = self._record_change(db_item, "create")
+        await self.db.flush()
+        self._queue_item_event(change, db_item)
+        await self.stats.apply(
+            owner_id,
+            count=1,
+            active=int(bool(db_item.is_active)),
+            price_sum=db_item.price or 0,
+            added_prices=[db_item.price] if db_item.price is not None else [],
+        )
         return db_item
 
+    async def create_many(self, items: List[ItemCreate], owner_id: int) -> int:
+        """Insert a batch of items with one multi-row INSERT ... RETURNING.
+
+        The inserts are Core statements on the tables: the ORM's bulk insert
+        cannot be routed to a shard. Subscribers get a single
+        ``item.imported`` event, whose ``since`` cursor reads the batch's
+        changes from the change feed.
+        """
+        if not items:
+            return 0
+        shard = {"shard_id": self.shards.for_owner(owner_id)}
+        result = await self.db.execute(
+            insert(Item.__table__).returning(
+                *[Item.__table__.c[field] for field in ItemInDB.model_fields],
+                sort_by_parameter_order=True,
+            ),
+            [
+                {
+                    "title": item.title,
+                    "description": item.description,
+                    "price": item.price,
+                    "owner_id": owner_id,
+                }
+                for item in items
+            ],
+            bind_arguments=shard,
+        )
+        rows = [ItemInDB.model_validate(row._mapping) for row in result]
+        result = await self.db.execute(
+            insert(ItemChange.__table__).returning(
+                ItemChange.__table__.c.id, sort_by_parameter_order=True
+            ),
+            [
+                {"item_id": row.id, "owner_id": owner_id, "operation": "create"}
+                for row in rows
+            ],
+            bind_arguments=shard,
+        )
+        invalidate_after_commit(self.db)
+        cursors = list(result.scalars())
+        # One event per batch: a batch is larger than a subscriber's queue,
+        # so an event per item would overflow the owner's own stream
+        queue_event(
+            self.db,
+            {
+                "type": "item.imported",
+                "cursor": cursors[-1],
+                "since": cursors[0] - 1,
+                "shard": self.shards.index_for_owner(owner_id),
+                "owner_id": owner_id,
+                "count": len(rows),
+            },
+        )
+        prices = [row.price for row in rows if row.price is not None]
+        await self.stats.apply(
+            owner_id,
+            count=len(rows),
+            active=sum(1 for row in rows if row.is_active),
+            price_sum=sum(prices),
+            added_prices=prices,
+        )
+        return len(rows)
+
     async def update(self, item_id: int, item_update: ItemUpdate) -> Optional[Item]:
         db_item = await self.get_by_id(item_id)
         if not db_item:
             return None
 
+        old_price, old_active = db_item.price, bool(db_item.is_active)
         update_data = item_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_item, field, value)
 
-        await self.db.commit()
-        await self.db.refresh(db_item)
+        change = self._record_change(db_item, "update")
+        await self.db.flush()
+        self._queue_item_event(change, db_item)
+        if db_item.price != old_price or bool(db_item.is_active) != old_active:
+            await self.stats.apply(
+                db_item.owner_id,
+                active=int(bool(db_item.is_active)) - int(old_active),
+                price_sum=(db_item.price or 0) - (old_price or 0),
+                recompute_bounds=db_item.price != old_price,
+            )
         return db_item
 
     async def delete(self, item_id: int) -> bool:
@@ -135,5 +859,116 @@ class ItemRepository:
             return False
 
         await self.db.delete(db_item)
-        await self.db.commit()
+        change = self._record_change(db_item, "delete")
+        await self.db.flush()
+        self._queue_item_event(change, db_item)
+        await self.stats.apply(
+            db_item.owner_id,
+            count=-1,
+            active=-int(bool(db_item.is_active)),
+            price_sum=-(db_item.price or 0),
+            recompute_bounds=db_item.price is not None,
+        )
         return True
+
+
+def _claim_of(job_id: str, started_at: datetime):
+    """Matches a job only while it is still running under the claim that started it."""
+    return and_(Job.id == job_id, Job.status == "running", Job.started_at == started_at)
+
+
+class JobRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_by_id(self, job_id: str) -> Optional[Job]:
+        return await self.db.get(Job, job_id)
+
+    async def create(
+        self, kind: str, params: Optional[Dict[str, Any]], owner_id: Optional[int]
+    ) -> Job:
+        db_job = Job(
+            id=str(uuid.uuid4()),
+            kind=kind,
+            status="pending",
+            params=params or {},
+            owner_id=owner_id,
+        )
+        self.db.add(db_job)
+        await self.db.flush()
+        return db_job
+
+    async def get_pending_ids(self, limit: int = 10) -> List[str]:
+        result = await self.db.execute(
+            select(Job.id)
+            .where(Job.status == "pending")
+            .order_by(Job.created_at)
+            .limit(limit)
+        )
+        return list(result.scalars())
+
+    async def claim(self, job_id: str, lease_until: datetime) -> Optional[datetime]:
+        """Mark a pending job as running, leased until ``lease_until``.
+
+        Returns the start time, which identifies this claim to ``renew``,
+        ``release`` and ``finish``; None if another worker got it first.
+        """
+        started_at = datetime.now(UTC)
+        result = await self.db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "pending")
+            .values(status="running", started_at=started_at, lease_until=lease_until)
+            .execution_options(synchronize_session=False)
+        )
+        return started_at if result.rowcount == 1 else None
+
+    async def renew(self, job_id: str, started_at: datetime, lease_until: datetime) -> bool:
+        """Extend the lease of a claim; False if the job no longer holds it."""
+        result = await self.db.execute(
+            update(Job)
+            .where(_claim_of(job_id, started_at))
+            .values(lease_until=lease_until)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    async def release(self, job_id: str, started_at: datetime) -> None:
+        """Put a running job back to pending, for a worker giving it up."""
+        await self.db.execute(
+            update(Job)
+            .where(_claim_of(job_id, started_at))
+            .values(status="pending", started_at=None, lease_until=None)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def requeue_stale(self, now: datetime) -> int:
+        """Put running jobs whose lease ran out before ``now`` back to pending."""
+        result = await self.db.execute(
+            update(Job)
+            .where(Job.status == "running", Job.lease_until < now)
+            .values(status="pending", started_at=None, lease_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    async def finish(
+        self,
+        job_id: str,
+        started_at: datetime,
+        result_path: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        """Record a claim's outcome; False if the job was requeued meanwhile."""
+        result = await self.db.execute(
+            update(Job)
+            .where(_claim_of(job_id, started_at))
+            .values(
+                status="failed" if error else "succeeded",
+                result_path=result_path,
+                error=error,
+                finished_at=datetime.now(UTC),
+                lease_until=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
@@ -72,6 +72,11 @@ class Item(ItemInDB):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
 
 
 class TokenData(BaseModel):
@@ -112,3 +117,115 @@ class ItemResponse(BaseModel):
     owner: Optional[UserResponse] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ItemChangeResponse(BaseModel):
+    cursor: int
+    operation: str
+    item_id: int
+    # Current state of the item, None for deletes
+    item: Optional[ItemResponse] = None
+
+
+class ItemChangeFeed(BaseModel):
+    changes: List[ItemChangeResponse]
+    cursor: int
+    has_more: bool
+    shard: int = 0
+    shard_count: int = 1
+
+
+class UserItemStatsResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    user_id: int
+    item_count: int
+    active_count: int
+    price_sum: int
+    price_min: Optional[int] = None
+    price_max: Optional[int] = None
+
+
+class PriceHistogram(BaseModel):
+    # bins + 1 edges; the last bin includes its upper edge
+    edges: List[float]
+    counts: List[int]
+
+
+class OwnerPriceStats(BaseModel):
+    owner_id: int
+    item_count: int
+    price_sum: int
+    price_min: Optional[int] = None
+    price_max: Optional[int] = None
+
+
+class PriceAnalytics(BaseModel):
+    """Distribution of item prices, in cents."""
+
+    count: int
+    priced_count: int
+    total: int
+    min: Optional[int] = None
+    max: Optional[int] = None
+    mean: Optional[float] = None
+    # Keyed like "p50", "p99.9"
+    percentiles: Dict[str, Optional[float]]
+    histogram: PriceHistogram
+    owners: List[OwnerPriceStats]
+    generated_at: datetime
+
+
+class ItemImportError(BaseModel):
+    line: int
+    errors: List[str]
+
+
+class ItemImportReport(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    batches: int = 0
+    # Only the first IMPORT_MAX_ERRORS failures are reported
+    errors: List[ItemImportError] = []
+    errors_truncated: bool = False
+
+
+# Job schemas
+class JobCreate(BaseModel):
+    kind: str
+    params: Dict[str, Any] = {}
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    params: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # Set once a finished job has a result file to download
+    result_url: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Debug schemas
+class AllocationStat(BaseModel):
+    # "path/to/module.py:123", relative to its sys.path entry
+    location: str
+    size: int
+    size_diff: int
+    count: int
+    count_diff: int
+
+
+class MemoryProfile(BaseModel):
+    seconds: float
+    # Whether tracemalloc was switched on just for this profile, in which
+    # case only allocations made during it are seen
+    tracing_started: bool
+    traced_bytes: int
+    peak_bytes: int
+    top: List[AllocationStat]
@@ -15,4 +15,6 @@ if __name__ == "__main__":
         port=settings.PORT,
         reload=settings.DEBUG,
         log_level=settings.LOG_LEVEL,
+        # Replaced by the structured access log
+        access_log=not settings.ACCESS_LOG_ENABLED,
     )
@@ -0,0 +1,77 @@
+"""
+Latency benchmark for the item price analytics.
+Times ``price_analytics`` (database aggregates plus chunked NumPy binning)
+over a seeded SQLite database, for a few chunk sizes.
+
+Usage: uv run python -m scripts.bench_analytics [--items N]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import analytics
+from app.core.database import Base
+from app.models import Item, User
+from app.repositories import UserItemStatsRepository
+
+CHUNK_SIZES = (10_000, 100_000, 500_000)
+
+
+async def seed(session: AsyncSession, count: int) -> None:
+    """Create ten users owning ``count`` items with log-normal prices."""
+    await session.execute(
+        insert(User),
+        [
+            {"username": f"bench{i}", "email": f"bench{i}@example.com", "hashed_password": "x"}
+            for i in range(10)
+        ],
+    )
+    for start in range(0, count, 100_000):
+        await session.execute(
+            insert(Item),
+            [
+                {
+                    "title": "Item",
+                    "price": int(random.lognormvariate(7, 1.5)),
+                    "owner_id": 1 + i % 10,
+                }
+                for i in range(start, min(start + 100_000, count))
+            ],
+        )
+    await UserItemStatsRepository(session).rebuild()
+    await session.commit()
+
+
+async def main(count: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        await seed(session, count)
+
+    for chunk_size in CHUNK_SIZES:
+        analytics.settings.ANALYTICS_CHUNK_SIZE = chunk_size
+        async with session_factory() as session:
+            start = time.perf_counter()
+            result = await analytics.price_analytics(session, bins=50)
+            elapsed = time.perf_counter() - start
+        print(
+            f"chunk {chunk_size:>7}: {elapsed:7.2f} s for {result['priced_count']} prices, "
+            f"p50={result['percentiles']['p50']:.0f} p99={result['percentiles']['p99']:.0f}"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1_000_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.items))
@@ -0,0 +1,83 @@
+"""
+Size and latency benchmark for response compression.
+Serializes item list pages (``ItemRepository.get_multi_rows`` through
+ItemResponse) to JSON and compresses them with every installed encoding at a
+few levels, printing the compression ratio and time per page.
+
+Usage: uv run python -m scripts.bench_compression [--iterations N]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.compression import ENCODERS, compress
+from app.core.database import Base
+from app.models import Item, User
+from app.repositories import ItemRepository
+from app.schemas import ItemResponse
+
+PAGE_SIZES = (100, 1000)
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 11), "zstd": (1, 3, 19)}
+
+
+async def seed(session: AsyncSession, count: int) -> None:
+    """Create one user owning ``count`` items."""
+    user = User(username="bench", email="bench@example.com", hashed_password="x")
+    session.add(user)
+    await session.flush()
+    session.add_all(
+        Item(title=f"Item {i}", description=f"Description of item {i}", price=i, owner_id=user.id)
+        for i in range(count)
+    )
+    await session.commit()
+
+
+async def page_body(session_factory, limit: int) -> bytes:
+    async with session_factory() as session:
+        rows = await ItemRepository(session).get_multi_rows(limit=limit)
+    items = [ItemResponse.model_validate(row).model_dump() for row in rows]
+    return json.dumps(jsonable_encoder(items), separators=(",", ":")).encode()
+
+
+def measure(body: bytes, encoding: str, level: int, iterations: int) -> None:
+    """Print the ratio and mean time for compressing one body."""
+    compressed = compress(body, encoding, level)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        compress(body, encoding, level)
+    elapsed = (time.perf_counter() - start) / iterations
+    print(
+        f"  {encoding:<4} level {level:>2}: {len(compressed):>8} bytes "
+        f"({len(body) / len(compressed):5.1f}x) {elapsed * 1000:8.3f} ms"
+    )
+
+
+async def main(iterations: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        await seed(session, max(PAGE_SIZES))
+
+    for limit in PAGE_SIZES:
+        body = await page_body(session_factory, limit)
+        print(f"page of {limit} items: {len(body)} bytes of JSON")
+        for encoding in ENCODERS:
+            for level in LEVELS[encoding]:
+                measure(body, encoding, level, iterations)
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
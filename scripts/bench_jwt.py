@@ -0,0 +1,63 @@
+"""
+JWT verification cost per signing algorithm.
+Signs a token with HS256, ES256 and EdDSA (throwaway keys) and times
+verifying it with the full signature check and from the verified-token
+cache, as repeat presentations of the same token are.
+
+Usage: uv run python -m scripts.bench_jwt [--iterations N]
+"""
+
+import argparse
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from app.core.tokens import JWTCodec
+
+
+def _private_pem(private_key) -> str:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def codecs(cache_size: int):
+    yield JWTCodec("HS256", secret_key="bench-secret", cache_size=cache_size)
+    yield JWTCodec(
+        "ES256",
+        private_key=_private_pem(ec.generate_private_key(ec.SECP256R1())),
+        cache_size=cache_size,
+    )
+    yield JWTCodec(
+        "EdDSA", private_key=_private_pem(Ed25519PrivateKey.generate()), cache_size=cache_size
+    )
+
+
+def measure(codec: JWTCodec, iterations: int) -> float:
+    token = codec.encode(
+        {"sub": "bench", "type": "access", "jti": "0" * 32, "exp": int(time.time()) + 3600}
+    )
+    codec.decode(token)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        codec.decode(token)
+    return (time.perf_counter() - start) / iterations
+
+
+def main(iterations: int) -> None:
+    print(f"{'algorithm':<10} {'verify':>12} {'cached':>12}")
+    for uncached, cached in zip(codecs(0), codecs(1000)):
+        full = measure(uncached, iterations)
+        hit = measure(cached, iterations)
+        print(f"{uncached.algorithm:<10} {full * 1e6:9.1f} us {hit * 1e6:9.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    main(args.iterations)
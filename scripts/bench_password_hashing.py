@@ -0,0 +1,71 @@
+"""
+Login throughput for password hashing configurations.
+Times password verification, the CPU-bound part of a login, on one thread for
+bcrypt at a few costs and argon2id at a few time/memory costs, and reports
+logins per second per core.
+
+Usage: uv run python -m scripts.bench_password_hashing [--iterations N]
+"""
+
+import argparse
+import os
+import time
+from typing import Tuple
+
+from app.core.config import settings
+from app.core.security import create_password_context
+
+def bcrypt(rounds: int) -> Tuple[str, dict]:
+    return f"bcrypt rounds={rounds}", {"schemes": ["bcrypt"], "bcrypt_rounds": rounds}
+
+
+def argon2id(time_cost: int, memory_mib: int, parallelism: int) -> Tuple[str, dict]:
+    return f"argon2id t={time_cost} m={memory_mib}MiB p={parallelism}", {
+        "schemes": ["argon2"],
+        "argon2_time_cost": time_cost,
+        "argon2_memory_cost": memory_mib * 1024,
+        "argon2_parallelism": parallelism,
+    }
+
+
+# (label, create_password_context arguments); the argon2id rows include the
+# OWASP minimums and the default settings
+CONFIGURATIONS = [
+    bcrypt(10),
+    bcrypt(12),
+    bcrypt(14),
+    argon2id(1, 46, 1),
+    argon2id(2, 19, 1),
+    argon2id(3, 64, 4),
+]
+
+
+def measure(label: str, context, iterations: int) -> None:
+    """Print the mean verification time and the resulting logins/s/core."""
+    hashed = context.hash("correct horse battery staple")
+    context.verify("correct horse battery staple", hashed)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        context.verify("correct horse battery staple", hashed)
+    elapsed = (time.perf_counter() - start) / iterations
+    print(f"{label:<26} {elapsed * 1000:8.1f} ms/login {1 / elapsed:8.1f} logins/s/core")
+
+
+def main(iterations: int) -> None:
+    print(
+        f"configured: {settings.PASSWORD_SCHEMES[0]}, "
+        f"{os.cpu_count()} CPU(s) available"
+    )
+    for label, options in CONFIGURATIONS:
+        try:
+            context = create_password_context(**options)
+            measure(label, context, iterations)
+        except Exception as exc:  # e.g. argon2-cffi not installed
+            print(f"{label:<26} skipped: {exc}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    main(args.iterations)
@@ -0,0 +1,105 @@
+"""
+Microbenchmark for the hot repository queries.
+Compares statements built on every call (the old behaviour) against the
+pre-built, parameterized statements used by the repositories.
+
+Usage: uv run python -m scripts.bench_queries [--iterations N]
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from app.core.database import Base
+from app.models import Item, User
+from app.repositories import _USER_BY_USERNAME, ItemRepository, UserRepository
+
+
+async def seed(session: AsyncSession) -> None:
+    """Create one user owning a page of items."""
+    user = User(username="bench", email="bench@example.com", hashed_password="x")
+    session.add(user)
+    await session.flush()
+    session.add_all(
+        Item(title=f"Item {i}", price=i, owner_id=user.id) for i in range(100)
+    )
+    await session.commit()
+
+
+async def time_calls(label: str, iterations: int, call) -> None:
+    """Run an async callable repeatedly and print the per-call cost."""
+    for _ in range(min(iterations, 100)):
+        await call()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await call()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed / iterations * 1e6:10.1f} us/call")
+
+
+def time_construction(label: str, iterations: int, build) -> None:
+    """Time building a statement and generating its cache key."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        build()._generate_cache_key()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed / iterations * 1e6:10.1f} us/call")
+
+
+async def main(iterations: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as session:
+        await seed(session)
+
+    print("Statement construction + cache key")
+    time_construction(
+        "get_by_username (per call)",
+        iterations,
+        lambda: select(User).where(User.username == "bench"),
+    )
+    time_construction("get_by_username (pre-built)", iterations, lambda: _USER_BY_USERNAME)
+
+    print()
+    print("End-to-end execution")
+    async with session_factory() as session:
+        user_repo = UserRepository(session)
+        item_repo = ItemRepository(session)
+
+        async def adhoc_username():
+            result = await session.execute(select(User).where(User.username == "bench"))
+            return result.scalar_one_or_none()
+
+        async def adhoc_items():
+            query = (
+                select(Item).options(selectinload(Item.owner)).offset(0).limit(100)
+            )
+            result = await session.execute(query)
+            return result.scalars().all()
+
+        await time_calls("get_by_username (per call)", iterations, adhoc_username)
+        await time_calls(
+            "get_by_username (pre-built)",
+            iterations,
+            lambda: user_repo.get_by_username("bench"),
+        )
+        await time_calls("get_multi items (per call)", iterations // 10, adhoc_items)
+        await time_calls(
+            "get_multi items (pre-built)", iterations // 10, item_repo.get_multi
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
@@ -0,0 +1,78 @@
+"""
+Per-request overhead of rate limiting.
+Times raw token bucket hits on the in-memory backend (and on Redis with
+--redis-url), then the latency of an anonymous request to a small app with
+and without the RateLimiter dependency.
+
+Usage: uv run python -m scripts.bench_ratelimit [--iterations N] [--redis-url URL]
+"""
+
+import argparse
+import asyncio
+import time
+
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.ratelimit import RateLimiter
+from app.core import ratelimit
+from app.core.database import get_db
+from app.core.ratelimit import MemoryRateLimitBackend, RateLimit, RedisRateLimitBackend
+
+# Large enough that no request is rejected
+LIMIT = RateLimit(burst=10**9, rate=10**9)
+KEYS = 10_000
+
+
+async def bench_backend(label: str, backend, iterations: int) -> None:
+    start = time.perf_counter()
+    for i in range(iterations):
+        await backend.hit(f"bench:ip:{i % KEYS}", LIMIT)
+    elapsed = (time.perf_counter() - start) / iterations
+    print(f"{label:<24} {elapsed * 1e6:9.1f} us/hit")
+    await backend.close()
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    # Both take a session like the API endpoints do, which the limiter's
+    # user lookup shares
+    @app.get("/plain")
+    async def plain(db: AsyncSession = Depends(get_db)):
+        return {"ok": True}
+
+    @app.get("/limited", dependencies=[Depends(RateLimiter("bench", LIMIT))])
+    async def limited(db: AsyncSession = Depends(get_db)):
+        return {"ok": True}
+
+    return app
+
+
+async def bench_requests(iterations: int) -> None:
+    ratelimit.rate_limit_backend = MemoryRateLimitBackend()
+    transport = ASGITransport(app=_app())
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ("/plain", "/limited"):
+            await client.get(path)
+            start = time.perf_counter()
+            for _ in range(iterations):
+                await client.get(path)
+            elapsed = (time.perf_counter() - start) / iterations
+            print(f"GET {path:<20} {elapsed * 1e6:9.1f} us/request")
+
+
+async def main(iterations: int, redis_url: str) -> None:
+    await bench_backend("memory backend", MemoryRateLimitBackend(), iterations * 10)
+    if redis_url:
+        await bench_backend("redis backend", RedisRateLimitBackend(redis_url), iterations)
+    await bench_requests(iterations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--redis-url", help="also time the Redis backend")
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.redis_url))
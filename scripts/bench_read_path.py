@@ -0,0 +1,89 @@
+"""
+Memory and latency benchmark for the item list read paths.
+Compares ORM hydration (``ItemRepository.get_multi``) against the column-level
+path (``ItemRepository.get_multi_rows``), both serialized through ItemResponse.
+
+Usage: uv run python -m scripts.bench_read_path [--iterations N]
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import Item, User
+from app.repositories import ItemRepository
+from app.schemas import ItemResponse
+
+PAGE_SIZES = (100, 1000)
+
+
+async def seed(session: AsyncSession, count: int) -> None:
+    """Create one user owning ``count`` items."""
+    user = User(username="bench", email="bench@example.com", hashed_password="x")
+    session.add(user)
+    await session.flush()
+    session.add_all(
+        Item(title=f"Item {i}", description="x" * 64, price=i, owner_id=user.id)
+        for i in range(count)
+    )
+    await session.commit()
+
+
+async def orm_page(session_factory, limit: int) -> list:
+    async with session_factory() as session:
+        items = await ItemRepository(session).get_multi(limit=limit)
+        return [ItemResponse.model_validate(item).model_dump() for item in items]
+
+
+async def rows_page(session_factory, limit: int) -> list:
+    async with session_factory() as session:
+        items = await ItemRepository(session).get_multi_rows(limit=limit)
+        return [ItemResponse.model_validate(item).model_dump() for item in items]
+
+
+async def measure(label: str, iterations: int, page) -> None:
+    """Print mean latency and peak traced memory for one page function."""
+    await page()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await page()
+    elapsed = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    await page()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {elapsed * 1000:9.2f} ms/page {peak / 1024:10.1f} KiB peak")
+
+
+async def main(iterations: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        await seed(session, max(PAGE_SIZES))
+
+    for limit in PAGE_SIZES:
+        await measure(
+            f"ORM get_multi ({limit})", iterations, lambda: orm_page(session_factory, limit)
+        )
+        await measure(
+            f"Core get_multi_rows ({limit})",
+            iterations,
+            lambda: rows_page(session_factory, limit),
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
@@ -0,0 +1,88 @@
+"""
+Encode/decode benchmark for JSON and MessagePack responses.
+Serializes item list pages through ItemResponse the way the API does for each
+format (``dump_json`` for JSON, JSON-mode ``dump_python`` plus msgpack for
+MessagePack), then decodes them as a client would, printing sizes and times.
+
+Usage: uv run python -m scripts.bench_serialization [--iterations N]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.serialization import msgpack_available, packb, unpackb
+from app.models import Item, User
+from app.repositories import ItemRepository
+from app.schemas import ItemResponse
+
+PAGE_SIZES = (100, 1000)
+ITEM_PAGE = TypeAdapter(List[ItemResponse])
+
+
+async def seed(session: AsyncSession, count: int) -> None:
+    """Create one user owning ``count`` items."""
+    user = User(username="bench", email="bench@example.com", hashed_password="x")
+    session.add(user)
+    await session.flush()
+    session.add_all(
+        Item(title=f"Item {i}", description=f"Description of item {i}", price=i, owner_id=user.id)
+        for i in range(count)
+    )
+    await session.commit()
+
+
+def timed(iterations: int, func) -> float:
+    """Mean milliseconds per call."""
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def measure(label: str, iterations: int, encode, decode) -> None:
+    body = encode()
+    print(
+        f"  {label:<8} {len(body):>9} bytes  encode {timed(iterations, encode):7.3f} ms  "
+        f"decode {timed(iterations, lambda: decode(body)):7.3f} ms"
+    )
+
+
+async def main(iterations: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        await seed(session, max(PAGE_SIZES))
+
+    for limit in PAGE_SIZES:
+        async with session_factory() as session:
+            rows = await ItemRepository(session).get_multi_rows(limit=limit)
+        page = ITEM_PAGE.validate_python(rows)
+        print(f"page of {limit} items:")
+        measure("json", iterations, lambda: ITEM_PAGE.dump_json(page), json.loads)
+        if msgpack_available():
+            measure(
+                "msgpack",
+                iterations,
+                lambda: packb(ITEM_PAGE.dump_python(page, mode="json")),
+                unpackb,
+            )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
@@ -0,0 +1,62 @@
+"""
+Cost of the token revocation check.
+Times decoding an access token alone, then verify_token with a denylist
+Bloom filter holding --revoked random ids, and reports the filter's memory
+and how many of the (unrevoked) tokens needed a database check against the
+configured DATABASE_URL.
+
+Usage: uv run python -m scripts.bench_token_revocation [--iterations N] [--revoked N]
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from app.core import revocation
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, create_tables
+from app.core.revocation import DENYLIST_CHECKS, TokenDenylist
+from app.core.security import create_token_pair, decode_token, verify_token
+
+
+async def main(iterations: int, revoked: int) -> None:
+    await create_tables()
+    denylist = TokenDenylist(
+        AsyncSessionLocal,
+        capacity=max(settings.TOKEN_DENYLIST_CAPACITY, revoked),
+        error_rate=settings.TOKEN_DENYLIST_ERROR_RATE,
+        sync_interval=settings.TOKEN_DENYLIST_SYNC_SECONDS,
+    )
+    for _ in range(revoked):
+        denylist._add(uuid.uuid4().hex)
+    revocation.token_denylist = denylist
+    bloom = denylist._filter
+    print(
+        f"{revoked} revoked ids: {bloom.size // 8 / 1024:.0f} KiB, "
+        f"{bloom.hashes} hashes"
+    )
+
+    tokens = [create_token_pair("bench")["access_token"] for _ in range(iterations)]
+    start = time.perf_counter()
+    for token in tokens:
+        decode_token(token)
+    decode = (time.perf_counter() - start) / iterations
+
+    hits_before = DENYLIST_CHECKS.get(result="hit")
+    start = time.perf_counter()
+    for token in tokens:
+        await verify_token(token)
+    verify = (time.perf_counter() - start) / iterations
+    hits = int(DENYLIST_CHECKS.get(result="hit") - hits_before)
+    print(f"decode only           {decode * 1e6:8.1f} us/token")
+    print(f"verify_token          {verify * 1e6:8.1f} us/token (+{(verify - decode) * 1e6:.1f})")
+    print(f"database checks       {hits} of {iterations} tokens")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--revoked", type=int, default=100_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.revoked))
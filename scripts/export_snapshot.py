@@ -0,0 +1,49 @@
+"""
+Export the users (without password hashes) and items tables as Parquet or
+Arrow IPC files, partitioned by id range. Only partitions changed since the
+previous export in the same directory are rewritten, unless --full is given.
+
+Usage: uv run python -m scripts.export_snapshot [--dir DIR] [--format parquet|arrow] [--full]
+"""
+
+import argparse
+import asyncio
+
+from app.core.database import AsyncSessionLocal, shard_router
+from app.core.snapshots import SNAPSHOT_FORMATS, export_snapshot
+
+
+async def export(args) -> dict:
+    async with AsyncSessionLocal() as session:
+        report = await export_snapshot(
+            session,
+            directory=args.dir,
+            format=args.format,
+            full=args.full,
+            chunk_size=args.chunk_size,
+        )
+    for engine in shard_router.engines.values():
+        await engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dir", help="snapshot directory (default: SNAPSHOT_DIR)")
+    parser.add_argument("--format", choices=sorted(SNAPSHOT_FORMATS))
+    parser.add_argument("--full", action="store_true", help="rewrite every partition")
+    parser.add_argument("--chunk-size", type=int, help="rows per record batch")
+    args = parser.parse_args()
+
+    report = asyncio.run(export(args))
+    mode = "incremental" if report["incremental"] else "full"
+    print(f"{mode} {report['format']} export to {report['directory']}")
+    for name, table in report["tables"].items():
+        print(
+            f"  {name}: {table['rows']} rows, {len(table['rewritten'])} partition(s) "
+            f"rewritten, {len(table['removed'])} removed"
+        )
+
+
+if __name__ == "__main__":
+    main()
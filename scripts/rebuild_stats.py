@@ -0,0 +1,33 @@
+"""
+Rebuild the per-user item statistics from the items table.
+Run after bulk changes made outside the application, or to repair drift.
+
+Usage: uv run python -m scripts.rebuild_stats [--user-id ID]
+"""
+
+import argparse
+import asyncio
+
+from app.core.database import AsyncSessionLocal, engine
+from app.repositories import UserItemStatsRepository
+
+
+async def rebuild(user_id) -> int:
+    async with AsyncSessionLocal() as session:
+        rebuilt = await UserItemStatsRepository(session).rebuild(user_id)
+        await session.commit()
+    await engine.dispose()
+    return rebuilt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--user-id", type=int, help="only rebuild this user's stats")
+    args = parser.parse_args()
+
+    rebuilt = asyncio.run(rebuild(args.user_id))
+    print(f"Rebuilt stats for {rebuilt} user(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,10 @@ from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from app.core.database import Base, get_db
+from app.core import ratelimit, revocation
+from app.core.http_cache import response_cache
+from app.core.database import Base, get_db, instrument_pool
+from app.core.logs import instrument_queries
 from app.main import app
 from app.repositories import UserRepository
 
@@ -12,6 +15,8 @@ TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
 # Create test engine
 test_engine = create_async_engine(TEST_DATABASE_URL, echo=True)
+instrument_pool(test_engine, database="test")
+instrument_queries(test_engine, database="test")
 TestingSessionLocal = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
 
 
@@ -34,6 +39,27 @@ app.dependency_overrides[get_db] = override_get_db
 #     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def fresh_rate_limits(monkeypatch):
+    """Give every test its own rate limit buckets."""
+    monkeypatch.setattr(ratelimit, "rate_limit_backend", ratelimit.MemoryRateLimitBackend())
+
+
+@pytest.fixture(autouse=True)
+def fresh_response_cache():
+    """Don't serve one test the public responses cached by another."""
+    response_cache.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def fresh_token_denylist(monkeypatch):
+    """Give every test an empty revocation filter over the test database."""
+    denylist = revocation.TokenDenylist(
+        TestingSessionLocal, capacity=1000, error_rate=0.001, sync_interval=0.1
+    )
+    monkeypatch.setattr(revocation, "token_denylist", denylist)
+
+
 @pytest.fixture(scope="session")
 async def setup_database():
     """Create tables for testing."""
@@ -83,6 +109,7 @@ async def test_user(db_session: AsyncSession):
     }
 
     user = await user_repo.create(user_data)
+    await db_session.commit()
     # Store the password for later use in tests
     user._test_password = "testpassword123"
     return user
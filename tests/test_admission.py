@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core.admission import (
+    ADMISSION_SHED,
+    AdmissionMiddleware,
+    ConcurrencyLimiter,
+    Overloaded,
+    RouteClass,
+)
+
+
+def _app(release: asyncio.Event) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        AdmissionMiddleware,
+        default=RouteClass("test_default", (), limit=1, max_queue=1, queue_timeout=0.05),
+        route_classes=[
+            RouteClass("test_auth", ["/auth/"], limit=5, max_queue=0, queue_timeout=0)
+        ],
+        exempt_prefixes=["/health"],
+        retry_after=3,
+    )
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {"ok": True}
+
+    @app.get("/auth/token")
+    async def token():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_requests_over_budget_are_shed():
+    """Test fast 503s when the queue is full or the queue budget runs out."""
+    release = asyncio.Event()
+    app = _app(release)
+    full_before = ADMISSION_SHED.get(route_class="test_default", reason="queue_full")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        running = asyncio.create_task(client.get("/slow"))
+        queued = asyncio.create_task(client.get("/slow"))
+        await asyncio.sleep(0.01)
+
+        response = await client.get("/slow")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "3"
+        assert ADMISSION_SHED.get(route_class="test_default", reason="queue_full") == full_before + 1
+
+        # The queued request gives up after its budget
+        assert (await queued).status_code == 503
+
+        # Other route classes and exempt paths are not affected
+        assert (await client.get("/auth/token")).status_code == 200
+        assert (await client.get("/health")).status_code == 200
+
+        release.set()
+        assert (await running).status_code == 200
+        assert (await client.get("/slow")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_released_slot_handed_to_oldest_waiter():
+    """Test that waiting requests take over released slots in order."""
+    limiter = ConcurrencyLimiter(
+        RouteClass("test_handover", (), limit=1, max_queue=2, queue_timeout=5.0)
+    )
+    await limiter.acquire()
+    admitted = []
+
+    async def wait(name: str) -> None:
+        await limiter.acquire()
+        admitted.append(name)
+
+    first = asyncio.create_task(wait("first"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(wait("second"))
+    await asyncio.sleep(0)
+    with pytest.raises(Overloaded):
+        await limiter.acquire()
+
+    limiter.release()
+    await first
+    assert admitted == ["first"] and limiter.in_flight == 1
+    limiter.release()
+    await second
+    limiter.release()
+    assert admitted == ["first", "second"] and limiter.in_flight == 0
@@ -42,3 +42,65 @@ async def test_token_endpoint(client: AsyncClient, test_user):
     data = response.json()
     assert "access_token" in data
     assert data["token_type"] == "bearer"
+
+
+async def _login(client: AsyncClient, user) -> dict:
+    login_data = {"username": user.username, "password": user._test_password}
+    response = await client.post("/api/v1/auth/login", json=login_data)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_tokens(client: AsyncClient, test_user):
+    """Test that a refresh token buys a new pair once, and only once."""
+    tokens = await _login(client, test_user)
+    assert tokens["refresh_token"]
+
+    # Refresh tokens don't authenticate requests
+    response = await client.get(
+        "/api/v1/users/me", headers={"Authorization": f"Bearer {tokens['refresh_token']}"}
+    )
+    assert response.status_code == 401
+
+    response = await client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    response = await client.get("/api/v1/users/me", headers=_bearer(rotated))
+    assert response.status_code == 200
+    assert response.json()["username"] == test_user.username
+
+    # Reusing the old refresh token revokes the whole session
+    response = await client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+    response = await client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": rotated["refresh_token"]}
+    )
+    assert response.status_code == 401
+    assert (await client.get("/api/v1/users/me", headers=_bearer(rotated))).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_session(client: AsyncClient, test_user):
+    """Test that logging out revokes the session's tokens but no other's."""
+    tokens = await _login(client, test_user)
+    other = await _login(client, test_user)
+
+    response = await client.post("/api/v1/auth/logout", headers=_bearer(tokens))
+    assert response.status_code == 200
+
+    assert (await client.get("/api/v1/users/me", headers=_bearer(tokens))).status_code == 401
+    response = await client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+    assert (await client.get("/api/v1/users/me", headers=_bearer(other))).status_code == 200
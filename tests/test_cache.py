@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from app.core.cache import TTLCache
+
+
+def test_ttl_cache_expiry_and_eviction(monkeypatch):
+    """Test that entries expire after the TTL and the oldest are evicted."""
+    now = [100.0]
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(ttl=10, maxsize=2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    now[0] += 10
+    assert cache.get("c") is None
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_computes_once():
+    """Test that concurrent misses share a single computation."""
+    cache = TTLCache(ttl=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(5)))
+    assert results == ["value"] * 5
+    assert calls == 1
+    assert cache.get("key") == "value"
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_does_not_cache_errors():
+    """Test that a failed computation is raised to every waiter and retried."""
+    cache = TTLCache(ttl=60)
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(cache.get_or_compute("key", fail) for _ in range(2)), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def succeed():
+        return 1
+
+    assert await cache.get_or_compute("key", succeed) == 1
@@ -0,0 +1,173 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.core.compression import ENCODERS, CompressionMiddleware, choose_encoding
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/big")
+    async def big():
+        return [{"title": "Repeated item", "price": 100}] * 50
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(3):
+                yield f'{{"line": {i}}}\n'
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/events")
+    async def events():
+        async def frames():
+            yield "event: ping\ndata: {}\n\n"
+
+        return StreamingResponse(frames(), media_type="text/event-stream")
+
+    @app.get("/encoded")
+    async def encoded():
+        return PlainTextResponse("x" * 500, headers={"Content-Encoding": "identity"})
+
+    return app
+
+
+@pytest.fixture
+async def raw_client():
+    """A client that neither advertises nor decodes content codings."""
+    transport = ASGITransport(app=_app())
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def _get(client: AsyncClient, path: str, accept_encoding: str):
+    request = client.build_request("GET", path, headers={"Accept-Encoding": accept_encoding})
+    response = await client.send(request, stream=True)
+    body = b"".join([chunk async for chunk in response.aiter_raw()])
+    return response, body
+
+
+def test_choose_encoding():
+    """Test Accept-Encoding negotiation with q-values and server preference."""
+    encodings = ["zstd", "br", "gzip"]
+    assert choose_encoding("gzip, br", encodings) == "br"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5", encodings) == "gzip"
+    assert choose_encoding("*;q=0.1, zstd;q=0", encodings) == "br"
+    assert choose_encoding("identity", encodings) is None
+    assert choose_encoding("", encodings) is None
+
+
+@pytest.mark.asyncio
+async def test_gzip_over_minimum_size(raw_client: AsyncClient):
+    """Test that bodies above the threshold are compressed and sized correctly."""
+    response, body = await _get(raw_client, "/big", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(body)
+    assert gzip.decompress(body).startswith(b'[{"title":"Repeated item"')
+
+    response, body = await _get(raw_client, "/small", "gzip")
+    assert "content-encoding" not in response.headers
+    assert body == b'{"ok":true}'
+
+    response, body = await _get(raw_client, "/big", "identity")
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+@pytest.mark.asyncio
+async def test_streaming_compressed_per_chunk(raw_client: AsyncClient):
+    """Test that streamed bodies are compressed and every chunk is decodable."""
+    response, body = await _get(raw_client, "/stream", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(body) == b'{"line": 0}\n{"line": 1}\n{"line": 2}\n'
+
+
+@pytest.mark.asyncio
+async def test_streaming_chunks_flushed():
+    """Test that each streamed chunk can be decoded as soon as it is sent."""
+    app = _app()
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/stream",
+        "raw_path": b"/stream",
+        "query_string": b"",
+        "headers": [(b"accept-encoding", b"gzip")],
+        "scheme": "http",
+        "server": ("test", 80),
+        "root_path": "",
+    }
+    decoder = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    decoded = []
+
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # Never disconnect; the response cancels this once it is sent
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("more_body"):
+            decoded.append(decoder.decompress(message["body"]))
+
+    await app(scope, receive, send)
+    assert decoded == [b'{"line": 0}\n', b'{"line": 1}\n', b'{"line": 2}\n']
+
+
+@pytest.mark.asyncio
+async def test_events_and_encoded_bodies_pass_through(raw_client: AsyncClient):
+    """Test that SSE and already-encoded responses are left alone."""
+    response, body = await _get(raw_client, "/events", "gzip")
+    assert "content-encoding" not in response.headers
+    assert body == b"event: ping\ndata: {}\n\n"
+
+    response, body = await _get(raw_client, "/encoded", "gzip")
+    assert response.headers["content-encoding"] == "identity"
+    assert body == b"x" * 500
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["br", "zstd"])
+async def test_optional_encodings(raw_client: AsyncClient, encoding: str):
+    """Test brotli and zstd when their libraries are installed."""
+    if encoding not in ENCODERS:
+        pytest.skip(f"{encoding} support is not installed")
+    response, body = await _get(raw_client, "/stream", f"gzip;q=0.5, {encoding}")
+    assert response.headers["content-encoding"] == encoding
+    if encoding == "br":
+        import brotli
+
+        assert brotli.decompress(body).endswith(b'{"line": 2}\n')
+    else:
+        import zstandard
+
+        reader = zstandard.ZstdDecompressor().decompressobj()
+        assert reader.decompress(body).endswith(b'{"line": 2}\n')
+
+
+@pytest.mark.asyncio
+async def test_item_list_compressed(client: AsyncClient, auth_headers):
+    """Test that the application compresses large item pages."""
+    for i in range(20):
+        await client.post("/api/v1/items/", json={"title": f"Compressed {i}"}, headers=auth_headers)
+
+    response = await client.get("/api/v1/items/?limit=20", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 20
@@ -0,0 +1,125 @@
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from pydantic import BaseModel, field_validator
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.routing import AppRoute
+from app.core.database import (
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_HOLD_SECONDS,
+    get_db,
+    release_sessions,
+    session_scope,
+)
+from tests.conftest import TestingSessionLocal, override_get_db, test_engine
+
+# Connections checked out while the response model was being validated
+checked_out_during_serialization = []
+
+
+class ProbeResponse(BaseModel):
+    value: int
+
+    @field_validator("value")
+    @classmethod
+    def record_pool_state(cls, value):
+        checked_out_during_serialization.append(DB_POOL_CHECKED_OUT.get(database="test"))
+        return value
+
+
+@pytest.fixture
+def statements():
+    """Record commits and SQL statements issued against the test database."""
+    recorded = {"commits": 0, "sql": []}
+
+    def on_commit(session):
+        recorded["commits"] += 1
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        recorded["sql"].append(statement.split()[0].upper())
+
+    event.listen(Session, "after_commit", on_commit)
+    event.listen(test_engine.sync_engine, "before_cursor_execute", on_execute)
+    yield recorded
+    event.remove(Session, "after_commit", on_commit)
+    event.remove(test_engine.sync_engine, "before_cursor_execute", on_execute)
+
+
+@pytest.mark.asyncio
+async def test_release_sessions_returns_connection(setup_database):
+    """Test that releasing a scope ends its transactions."""
+    async with TestingSessionLocal() as session:
+        with session_scope():
+            await session.execute(text("SELECT 1"))
+            assert session.in_transaction()
+            assert DB_POOL_CHECKED_OUT.get(database="test") == 1
+
+            await release_sessions()
+            assert not session.in_transaction()
+            assert DB_POOL_CHECKED_OUT.get(database="test") == 0
+
+
+@pytest.mark.asyncio
+async def test_connection_released_before_serialization(setup_database):
+    """Test that AppRoute hands the connection back before serializing."""
+    router = APIRouter(route_class=AppRoute)
+
+    @router.get("/probe", response_model=ProbeResponse)
+    async def probe(db: AsyncSession = Depends(get_db)):
+        result = await db.execute(text("SELECT 1"))
+        return {"value": result.scalar_one()}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = override_get_db
+    hold_count = DB_POOL_HOLD_SECONDS.get_count(database="test")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/probe")
+
+    assert response.status_code == 200
+    assert checked_out_during_serialization == [0]
+    assert DB_POOL_HOLD_SECONDS.get_count(database="test") == hold_count + 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client: AsyncClient):
+    """Test that pool metrics are exported."""
+    await client.get("/api/v1/items/")
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert 'db_pool_connection_hold_seconds_count{database="test"}' in response.text
+
+
+@pytest.mark.asyncio
+async def test_create_item_commits_once(client: AsyncClient, auth_headers, statements):
+    """Test that creating an item is a single unit of work without a refresh."""
+    item_data = {"title": "Unit of Work", "price": 100}
+    response = await client.post("/api/v1/items/", json=item_data, headers=auth_headers)
+    assert response.status_code == 201
+    assert response.json()["created_at"] is not None
+
+    assert statements["commits"] == 1
+    # The user lookup for authentication, the INSERT ... RETURNING, its
+    # change feed entry and the owner's stats delta
+    assert statements["sql"] == ["SELECT", "INSERT", "INSERT", "UPDATE"]
+
+
+@pytest.mark.asyncio
+async def test_update_item_commits_once(client: AsyncClient, auth_headers, statements):
+    """Test that updating an item commits once and returns updated_at."""
+    create_response = await client.post(
+        "/api/v1/items/", json={"title": "Before"}, headers=auth_headers
+    )
+    item_id = create_response.json()["id"]
+    statements["commits"] = 0
+
+    response = await client.put(
+        f"/api/v1/items/{item_id}", json={"title": "After"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["title"] == "After"
+    assert statements["commits"] == 1
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.profiling import SamplingProfiler
+
+
+@pytest.fixture
+async def superuser_headers(db_session, test_user, auth_headers):
+    test_user.is_superuser = True
+    await db_session.commit()
+    return auth_headers
+
+
+@pytest.mark.asyncio
+async def test_debug_endpoints_are_gated(client: AsyncClient, superuser_headers, monkeypatch):
+    """Test that the endpoints need the settings flag as well as a superuser."""
+    response = await client.get("/debug/profile?seconds=0.1", headers=superuser_headers)
+    assert response.status_code == 404
+
+    monkeypatch.setattr(settings, "DEBUG_ENDPOINTS_ENABLED", True)
+    assert (await client.get("/debug/profile?seconds=0.1")).status_code == 401
+    response = await client.get(
+        f"/debug/memory?seconds={settings.DEBUG_MAX_SECONDS + 1}", headers=superuser_headers
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_debug_nonsuperuser_forbidden(client: AsyncClient, auth_headers, monkeypatch):
+    """Test that regular users can't profile."""
+    monkeypatch.setattr(settings, "DEBUG_ENDPOINTS_ENABLED", True)
+    response = await client.get("/debug/memory?seconds=0.1", headers=auth_headers)
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_cpu_and_memory_profiles(client: AsyncClient, superuser_headers, monkeypatch):
+    """Test collapsed stack output and the allocation diff."""
+    monkeypatch.setattr(settings, "DEBUG_ENDPOINTS_ENABLED", True)
+
+    response = await client.get("/debug/profile?seconds=0.2", headers=superuser_headers)
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+    assert any(line.startswith("MainThread;") for line in lines)
+
+    response = await client.get("/debug/memory?seconds=0.1&limit=5", headers=superuser_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["top"]) <= 5
+    assert data["traced_bytes"] >= 0
+
+
+def test_sampling_profiler_sees_busy_thread():
+    """Test that a thread's hot function shows up in the samples."""
+    done = threading.Event()
+
+    def spin_for_profiler():
+        while not done.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=spin_for_profiler, name="busy-worker")
+    worker.start()
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    time.sleep(0.1)
+    profiler.stop()
+    done.set()
+    worker.join()
+
+    assert profiler.samples > 0
+    busy = [line for line in profiler.collapsed().splitlines() if line.startswith("busy-worker;")]
+    assert any("spin_for_profiler" in line for line in busy)
@@ -0,0 +1,188 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.items import _item_event_stream
+from app.core import events
+from app.core.events import EventBroker, RedisEventBroker, broker, format_sse
+from app.repositories import ItemRepository
+from app.schemas import ItemCreate, ItemUpdate
+
+
+@pytest.mark.asyncio
+async def test_broker_fan_out():
+    """Test that events reach every matching subscriber."""
+    local_broker = EventBroker(queue_size=10)
+    everything = local_broker.subscribe()
+    only_owner_2 = local_broker.subscribe(lambda event: event["owner_id"] == 2)
+
+    local_broker.publish({"type": "item.created", "owner_id": 1})
+    local_broker.publish({"type": "item.created", "owner_id": 2})
+
+    assert (await everything.get(timeout=1))["owner_id"] == 1
+    assert (await everything.get(timeout=1))["owner_id"] == 2
+    assert (await only_owner_2.get(timeout=1))["owner_id"] == 2
+    assert only_owner_2.queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_broker_drops_slow_consumer():
+    """Test that a full subscriber is dropped without affecting others."""
+    local_broker = EventBroker(queue_size=2)
+    slow = local_broker.subscribe()
+    fast = local_broker.subscribe()
+
+    for i in range(3):
+        local_broker.publish({"type": "item.created", "owner_id": i})
+        await fast.get(timeout=1)
+
+    assert slow.dropped
+    assert await slow.get(timeout=1) is None
+    assert not fast.dropped
+
+    local_broker.publish({"type": "item.created", "owner_id": 3})
+    assert (await fast.get(timeout=1))["owner_id"] == 3
+
+
+class FakePubSub:
+    """Pub/sub connection that fails on its first read, then delivers ``messages``."""
+
+    attempts = 0
+
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def subscribe(self, channel):
+        pass
+
+    async def listen(self):
+        FakePubSub.attempts += 1
+        if FakePubSub.attempts == 1:
+            raise ConnectionError("connection reset")
+        for message in self.messages:
+            yield message
+        await asyncio.Event().wait()
+
+    async def aclose(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_redis_broker_resubscribes(monkeypatch):
+    """Test that a failed Redis subscription is retried and drops local subscribers."""
+    message = {"type": "message", "data": json.dumps({"type": "item.created", "owner_id": 1})}
+    client = SimpleNamespace(pubsub=lambda: FakePubSub([message]))
+
+    async def aclose():
+        pass
+
+    client.aclose = aclose
+    monkeypatch.setattr(FakePubSub, "attempts", 0)
+    monkeypatch.setattr(events, "aioredis", SimpleNamespace(from_url=lambda url: client))
+    redis_broker = RedisEventBroker("redis://test", "events", retry_initial=0.01)
+    before = redis_broker.subscribe()
+    await redis_broker.start()
+    try:
+        # Dropped when the first subscription failed
+        assert await before.get(timeout=1) is None
+        assert before.dropped
+
+        after = redis_broker.subscribe()
+        assert (await after.get(timeout=1))["owner_id"] == 1
+        assert FakePubSub.attempts == 2
+    finally:
+        await redis_broker.stop()
+
+
+@pytest.mark.asyncio
+async def test_redis_publish_failure_is_logged(monkeypatch, caplog):
+    """Test that a failed publish is logged rather than lost with its task."""
+
+    async def publish(channel, data):
+        raise ConnectionError("connection reset")
+
+    client = SimpleNamespace(publish=publish)
+    monkeypatch.setattr(events, "aioredis", SimpleNamespace(from_url=lambda url: client))
+    redis_broker = RedisEventBroker("redis://test", "events")
+    redis_broker._redis = client
+
+    redis_broker.publish({"type": "item.created", "owner_id": 1})
+    await asyncio.gather(*redis_broker._pending, return_exceptions=True)
+
+    assert not redis_broker._pending
+    [record] = [record for record in caplog.records if record.name == events.logger.name]
+    assert record.getMessage() == "Publishing an event to events failed"
+    assert isinstance(record.exc_info[1], ConnectionError)
+
+
+@pytest.mark.asyncio
+async def test_item_events_published_after_commit(db_session: AsyncSession, test_user):
+    """Test that repository writes are published only once committed."""
+    subscription = broker.subscribe(lambda event: event["owner_id"] == test_user.id)
+    try:
+        item_repo = ItemRepository(db_session)
+        item = await item_repo.create(ItemCreate(title="Evented"), owner_id=test_user.id)
+        assert subscription.queue.empty()
+
+        await db_session.commit()
+        event = await subscription.get(timeout=1)
+        assert event["type"] == "item.created"
+        assert event["item"]["title"] == "Evented"
+        assert event["cursor"] > 0
+
+        await item_repo.update(item.id, ItemUpdate(title="Rolled back"))
+        await db_session.rollback()
+        await db_session.commit()
+        assert subscription.queue.empty()
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_publishes_one_event_per_batch(db_session: AsyncSession, test_user):
+    """Test that a batch larger than a subscriber's queue doesn't overflow it."""
+    subscription = broker.subscribe(lambda event: event["owner_id"] == test_user.id)
+    try:
+        items = [ItemCreate(title=f"Bulk {i}") for i in range(broker.queue_size + 1)]
+        await ItemRepository(db_session).create_many(items, owner_id=test_user.id)
+        await db_session.commit()
+
+        event = await subscription.get(timeout=1)
+        assert event["type"] == "item.imported"
+        assert event["count"] == len(items)
+        assert event["cursor"] - event["since"] == len(items)
+        assert subscription.queue.empty()
+        assert not subscription.dropped
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@pytest.mark.asyncio
+async def test_item_event_stream_frames(db_session: AsyncSession, test_user):
+    """Test the SSE frames produced for the current user's items."""
+    stream = _item_event_stream(test_user.id)
+    # Let the stream subscribe before the commit publishes
+    task = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0)
+
+    item_repo = ItemRepository(db_session)
+    await item_repo.create(ItemCreate(title="Streamed"), owner_id=test_user.id)
+    await db_session.commit()
+
+    frame = await asyncio.wait_for(task, timeout=1)
+    assert frame.startswith("id: ")
+    assert "event: item.created" in frame
+    assert '"title": "Streamed"' in frame
+    await stream.aclose()
+
+
+def test_format_sse():
+    """Test server-sent event framing."""
+    frame = format_sse({"type": "item.deleted", "cursor": 7, "item": None})
+    assert frame == (
+        'id: 7\nevent: item.deleted\ndata: {"type": "item.deleted", "cursor": 7, '
+        '"item": null}\n\n'
+    )
@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+from alembic.script import ScriptDirectory
+from httpx import AsyncClient
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import health
+from app.core.admission import ADMISSION_QUEUE_DEPTH
+from app.core.health import ALEMBIC_DIR, ReadinessCheck
+from tests.conftest import test_engine
+
+SCRIPT = ScriptDirectory(str(ALEMBIC_DIR))
+HEAD = SCRIPT.get_current_head()
+PREVIOUS = SCRIPT.get_revision(HEAD).down_revision
+
+
+def make_check(engine=test_engine, **options) -> ReadinessCheck:
+    options = {
+        "cache_seconds": 60.0,
+        "probe_timeout": 1.0,
+        "max_pool_saturation": 1.0,
+        "queue_limits": {"default": 4},
+        "max_queue_fraction": 0.5,
+        **options,
+    }
+    return ReadinessCheck({"default": engine}, **options)
+
+
+async def stamp(engine, revision: str) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)")
+        )
+        await conn.execute(text(f"INSERT INTO alembic_version VALUES ('{revision}')"))
+
+
+@pytest.fixture
+def readiness(monkeypatch, setup_database):
+    check = make_check()
+    monkeypatch.setattr(health, "readiness", check)
+    return check
+
+
+@pytest.mark.asyncio
+async def test_liveness(client: AsyncClient):
+    """Test that liveness doesn't depend on anything."""
+    response = await client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+@pytest.mark.asyncio
+async def test_ready(client: AsyncClient, readiness):
+    """Test that a reachable, unversioned database is ready."""
+    response = await client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-store"
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["checks"]["database"]["default"]["ok"]
+    assert body["checks"]["migrations"]["default"]["status"] == "unversioned"
+    assert body["checks"]["pool"]["default"]["capacity"] > 0
+    assert body["checks"]["admission"]["default"] == {
+        "ok": True,
+        "queue_depth": 0,
+        "max_queue": 4,
+    }
+
+
+@pytest.mark.asyncio
+async def test_database_down_is_unready(client: AsyncClient, monkeypatch, tmp_path):
+    """Test that an unreachable database fails readiness with a 503."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/db.sqlite")
+    monkeypatch.setattr(health, "readiness", make_check(engine))
+
+    response = await client.get("/health/ready")
+    assert response.status_code == 503
+    body = response.json()
+    assert body["status"] == "unready"
+    assert body["checks"]["database"]["default"] == {"ok": False, "error": "OperationalError"}
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_probe_is_cached(readiness):
+    """Test that checks within the cache interval share one database probe."""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        await asyncio.gather(*(readiness.check() for _ in range(5)))
+        await readiness.check()
+        assert statements.count("SELECT 1") == 1
+
+        readiness.invalidate()
+        await readiness.check()
+        assert statements.count("SELECT 1") == 2
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "revision, status, ok",
+    [(HEAD, "current", True), (PREVIOUS, "behind", False), ("9999", "ahead", True)],
+)
+async def test_migration_status(tmp_path, revision, status, ok):
+    """Test that only a schema behind the code's head is unready."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/db.sqlite")
+    await stamp(engine, revision)
+    try:
+        ready, checks = await make_check(engine).check()
+    finally:
+        await engine.dispose()
+
+    migrations = checks["migrations"]["default"]
+    assert migrations["status"] == status
+    assert migrations["revision"] == (revision,)
+    assert migrations["head"] == (HEAD,)
+    assert ready is ok
+
+
+@pytest.mark.asyncio
+async def test_exhausted_pool_is_unready(tmp_path):
+    """Test that a worker with every pooled connection checked out is unready."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path}/db.sqlite", pool_size=1, max_overflow=0
+    )
+    check = make_check(engine, probe_timeout=0.2)
+    try:
+        async with engine.connect():
+            ready, checks = await check.check()
+    finally:
+        await engine.dispose()
+
+    assert not ready
+    assert checks["pool"]["default"] == {
+        "ok": False,
+        "checked_out": 1,
+        "capacity": 1,
+        "saturation": 1.0,
+    }
+    # The probe couldn't get a connection either
+    assert checks["database"]["default"] == {"ok": False, "error": "TimeoutError"}
+
+
+@pytest.mark.asyncio
+async def test_deep_admission_queue_is_unready(readiness):
+    """Test that readiness fails once a queue is more than the allowed share full."""
+    ADMISSION_QUEUE_DEPTH.inc(2, route_class="default")
+    try:
+        ready, _ = await readiness.check()
+        assert ready
+
+        ADMISSION_QUEUE_DEPTH.inc(route_class="default")
+        ready, checks = await readiness.check()
+        assert not ready
+        assert checks["admission"]["default"]["queue_depth"] == 3
+    finally:
+        ADMISSION_QUEUE_DEPTH.dec(3, route_class="default")
@@ -0,0 +1,68 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.http_cache import CachePolicy, HTTPCacheMiddleware
+from app.repositories import ItemRepository
+
+
+@pytest.mark.asyncio
+async def test_public_item_has_cache_headers(client: AsyncClient, auth_headers):
+    """Test cache headers on a public item and 304s for conditional requests."""
+    created = await client.post(
+        "/api/v1/items/", json={"title": "Cached item", "price": 500}, headers=auth_headers
+    )
+    url = f"/api/v1/items/{created.json()['id']}"
+
+    response = await client.get(url)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=30, stale-while-revalidate=60"
+    assert "Accept" in response.headers["vary"]
+    # Revalidation is by ETag alone
+    assert "last-modified" not in response.headers
+    etag = response.headers["etag"]
+
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    # Private routes are left alone
+    response = await client.get("/api/v1/users/me", headers=auth_headers)
+    assert "cache-control" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_public_pages_served_from_cache(client: AsyncClient, auth_headers, monkeypatch):
+    """Test that repeat listings skip the database until an item changes."""
+    calls = 0
+    get_multi_rows = ItemRepository.get_multi_rows
+
+    async def counting_get_multi_rows(self, *args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return await get_multi_rows(self, *args, **kwargs)
+
+    monkeypatch.setattr(ItemRepository, "get_multi_rows", counting_get_multi_rows)
+
+    first = await client.get("/api/v1/items/?limit=1000&skip=0")
+    # Same query in another order
+    second = await client.get("/api/v1/items/?skip=0&limit=1000")
+    assert second.json() == first.json()
+    assert calls == 1
+
+    created = await client.post(
+        "/api/v1/items/", json={"title": "Fresh item", "price": 700}, headers=auth_headers
+    )
+    third = await client.get("/api/v1/items/?limit=1000&skip=0")
+    assert calls == 2
+    assert created.json()["id"] in [item["id"] for item in third.json()]
+
+
+def test_policies_match_route_templates():
+    """Test that typed placeholders keep other routes out of a policy."""
+    middleware = HTTPCacheMiddleware(
+        None, {"/api/v1/items/{item_id:int}": CachePolicy(max_age=30)}
+    )
+    assert middleware.policy_for("/api/v1/items/42") is not None
+    assert middleware.policy_for("/api/v1/items/stream") is None
+    assert middleware.policy_for("/api/v1/items/42/other") is None
@@ -0,0 +1,96 @@
+import asyncio
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.idempotency import (
+    IdempotencyConflict,
+    IdempotencyStore,
+    StoredResponse,
+    idempotency_store,
+)
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture(autouse=True)
+def test_store(monkeypatch):
+    monkeypatch.setattr(idempotency_store, "session_factory", TestingSessionLocal)
+
+
+def _new_user() -> dict:
+    unique_id = uuid.uuid4().hex[:8]
+    return {
+        "username": f"idem_{unique_id}",
+        "email": f"idem_{unique_id}@example.com",
+        "password": "testpassword123",
+        "full_name": "Idempotent User",
+    }
+
+
+@pytest.mark.asyncio
+async def test_retried_post_is_replayed(client: AsyncClient):
+    """Test that a retry gets the stored response instead of a second insert."""
+    user = _new_user()
+    headers = {"Idempotency-Key": uuid.uuid4().hex}
+
+    first = await client.post("/api/v1/users/", json=user, headers=headers)
+    assert first.status_code == 201
+    assert "idempotent-replayed" not in first.headers
+
+    retry = await client.post("/api/v1/users/", json=user, headers=headers)
+    assert retry.status_code == 201
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+
+    # The same key with another body is an error, a new key runs again
+    response = await client.post(
+        "/api/v1/users/", json={**user, "full_name": "Someone Else"}, headers=headers
+    )
+    assert response.status_code == 422
+    response = await client.post(
+        "/api/v1/users/", json=user, headers={"Idempotency-Key": uuid.uuid4().hex}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_wait_for_first(client: AsyncClient, auth_headers):
+    """Test that duplicates sent at once create a single item."""
+    headers = {**auth_headers, "Idempotency-Key": uuid.uuid4().hex}
+    item = {"title": "Idempotent item", "price": 1000}
+
+    responses = await asyncio.gather(
+        *(client.post("/api/v1/items/", json=item, headers=headers) for _ in range(3))
+    )
+    assert [response.status_code for response in responses] == [201, 201, 201]
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert sum("idempotent-replayed" in response.headers for response in responses) == 2
+
+
+@pytest.mark.asyncio
+async def test_other_workers_wait_for_claim(setup_database):
+    """Test that a key claimed by another worker is waited for, then replayed."""
+    first = IdempotencyStore(TestingSessionLocal, ttl=60, lock_timeout=60, wait_timeout=2)
+    second = IdempotencyStore(
+        TestingSessionLocal, ttl=60, lock_timeout=60, wait_timeout=0.2, poll_interval=0.01
+    )
+    key = uuid.uuid4().hex
+
+    assert await first.begin(key, "fingerprint") is None
+    with pytest.raises(IdempotencyConflict) as exc_info:
+        await second.begin(key, "fingerprint")
+    assert exc_info.value.status_code == 409
+
+    waiting = asyncio.create_task(second.begin(key, "fingerprint"))
+    await asyncio.sleep(0.05)
+    await first.complete(key, StoredResponse(201, [("content-type", "text/plain")], b"done"))
+    stored = await waiting
+    assert stored.status_code == 201 and stored.body == b"done"
+    assert stored.headers == [("content-type", "text/plain")]
+
+    # A released claim lets the next request run
+    other_key = uuid.uuid4().hex
+    assert await first.begin(other_key, "fingerprint") is None
+    await first.release(other_key)
+    assert await second.begin(other_key, "fingerprint") is None
@@ -0,0 +1,28 @@
+import pytest
+
+from app.core.imports import ImportFormatError, iter_lines
+
+
+async def chunked(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(lines):
+    return [line async for line in lines]
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_across_chunks():
+    """Test that lines and multi-byte characters may span chunks."""
+    euro = "€".encode()
+    lines = iter_lines(chunked(b"first\r\nsec", b"ond\n" + euro[:1], euro[1:] + b"\n", b"tail"))
+    assert await collect(lines) == ["first", "second", "€", "tail"]
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_bounds_line_length():
+    """Test that a line without a newline cannot grow without bound."""
+    lines = iter_lines(chunked(b"x" * 10, b"x" * 10), max_length=15)
+    with pytest.raises(ImportFormatError):
+        await collect(lines)
@@ -32,6 +32,21 @@ async def test_get_items(client: AsyncClient):
     assert isinstance(data, list)
 
 
+@pytest.mark.asyncio
+async def test_get_items_without_owner(client: AsyncClient, auth_headers):
+    """Test listing items without joining the owner."""
+    item_data = {"title": "Ownerless Listing", "price": 100}
+    create_response = await client.post("/api/v1/items/", json=item_data, headers=auth_headers)
+    assert create_response.status_code == 201
+
+    response = await client.get("/api/v1/items/my-items?include_owner=false", headers=auth_headers)
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data[0]["title"] == item_data["title"]
+    assert data[0]["owner"] is None
+
+
 @pytest.mark.asyncio
 async def test_get_my_items(client: AsyncClient, auth_headers):
     """Test getting current user's items."""
@@ -136,3 +151,167 @@ async def test_create_item_unauthorized(client: AsyncClient):
     }
     response = await client.post("/api/v1/items/", json=item_data)
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_item_change_feed(client: AsyncClient, auth_headers):
+    """Test syncing items incrementally through the change feed."""
+    # Drain the feed to get the current cursor
+    cursor, has_more = 0, True
+    while has_more:
+        response = await client.get(f"/api/v1/items/changes?since={cursor}&limit=1000")
+        assert response.status_code == 200
+        cursor, has_more = response.json()["cursor"], response.json()["has_more"]
+
+    kept = await client.post("/api/v1/items/", json={"title": "Kept"}, headers=auth_headers)
+    gone = await client.post("/api/v1/items/", json={"title": "Gone"}, headers=auth_headers)
+    kept_id, gone_id = kept.json()["id"], gone.json()["id"]
+    await client.put(f"/api/v1/items/{kept_id}", json={"title": "Kept v2"}, headers=auth_headers)
+    await client.delete(f"/api/v1/items/{gone_id}", headers=auth_headers)
+
+    response = await client.get(f"/api/v1/items/changes?since={cursor}")
+    assert response.status_code == 200
+    feed = response.json()
+    assert feed["has_more"] is False
+    assert feed["cursor"] > cursor
+
+    changes = {change["item_id"]: change for change in feed["changes"]}
+    assert changes[kept_id]["operation"] == "update"
+    assert changes[kept_id]["item"]["title"] == "Kept v2"
+    assert changes[gone_id]["operation"] == "delete"
+    assert changes[gone_id]["item"] is None
+
+    # Nothing new after the returned cursor
+    response = await client.get(f"/api/v1/items/changes?since={feed['cursor']}")
+    assert response.json()["changes"] == []
+
+
+@pytest.mark.asyncio
+async def test_import_items_ndjson(client: AsyncClient, auth_headers, monkeypatch):
+    """Test bulk importing NDJSON with batching and a per-row error report."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    body = "\n".join(
+        [
+            '{"title": "Imported 1", "price": 100}',
+            '{"title": "", "price": 100}',
+            "not json",
+            '{"title": "Imported 2"}',
+            '{"title": "Imported 3", "description": "last"}',
+        ]
+    )
+    response = await client.post(
+        "/api/v1/items/import",
+        content=body,
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+
+    report = response.json()
+    assert report["imported"] == 3
+    assert report["failed"] == 2
+    assert report["batches"] == 2
+    assert [error["line"] for error in report["errors"]] == [2, 3]
+    assert report["errors"][0]["errors"][0].startswith("title:")
+
+    response = await client.get("/api/v1/items/my-items", headers=auth_headers)
+    titles = [item["title"] for item in response.json()]
+    assert titles == ["Imported 1", "Imported 2", "Imported 3"]
+
+
+@pytest.mark.asyncio
+async def test_import_items_csv(client: AsyncClient, auth_headers):
+    """Test bulk importing CSV, including quoted multi-line fields."""
+    body = 'title,description,price\nDesk,"Oak, large",15000\nLamp,"Two\nlines",\n'
+    response = await client.post(
+        "/api/v1/items/import?format=csv", content=body, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["imported"] == 2
+
+    response = await client.get("/api/v1/items/my-items", headers=auth_headers)
+    items = {item["title"]: item for item in response.json()}
+    assert items["Desk"]["description"] == "Oak, large"
+    assert items["Desk"]["price"] == 15000
+    assert items["Lamp"]["description"] == "Two\nlines"
+    assert items["Lamp"]["price"] is None
+
+
+@pytest.mark.asyncio
+async def test_import_items_unsupported_type(client: AsyncClient, auth_headers):
+    """Test that unknown upload formats are rejected."""
+    response = await client.post(
+        "/api/v1/items/import",
+        content="<items/>",
+        headers={**auth_headers, "Content-Type": "application/xml"},
+    )
+    assert response.status_code == 415
+
+
+@pytest.mark.asyncio
+async def test_item_price_analytics(client: AsyncClient, auth_headers, test_user, monkeypatch):
+    """Test the price distribution of one owner's items."""
+    from app.core import analytics
+
+    monkeypatch.setattr(analytics.settings, "ANALYTICS_CHUNK_SIZE", 3)
+    for price in (100, 200, 300, 400, 1000):
+        await client.post(
+            "/api/v1/items/", json={"title": f"Priced {price}", "price": price}, headers=auth_headers
+        )
+    await client.post("/api/v1/items/", json={"title": "Unpriced"}, headers=auth_headers)
+
+    url = f"/api/v1/items/analytics?owner_id={test_user.id}&bins=3&percentiles=50&percentiles=99.5"
+    response = await client.get(url, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["count"], data["priced_count"], data["total"]) == (6, 5, 2000)
+    assert (data["min"], data["max"], data["mean"]) == (100, 1000, 400)
+    assert data["percentiles"] == {"p50": 300, "p99.5": 988}
+    assert data["histogram"] == {"edges": [100, 400, 700, 1000], "counts": [3, 1, 1]}
+    assert data["owners"] == [
+        {
+            "owner_id": test_user.id,
+            "item_count": 6,
+            "price_sum": 2000,
+            "price_min": 100,
+            "price_max": 1000,
+        }
+    ]
+
+    # Served from the cache until it expires
+    await client.post("/api/v1/items/", json={"title": "Late", "price": 5}, headers=auth_headers)
+    response = await client.get(url, headers=auth_headers)
+    assert response.json() == data
+
+
+@pytest.mark.asyncio
+async def test_item_price_analytics_invalid_percentile(client: AsyncClient, auth_headers):
+    """Test that percentiles outside 0-100 are rejected."""
+    response = await client.get("/api/v1/items/analytics?percentiles=101", headers=auth_headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_item_price_analytics_without_numpy(client: AsyncClient, auth_headers, monkeypatch):
+    """Test that analytics report 501 when NumPy is not installed."""
+    from app.core import analytics
+
+    monkeypatch.setattr(analytics, "np", None)
+    response = await client.get("/api/v1/items/analytics?bins=7", headers=auth_headers)
+    assert response.status_code == 501
+
+
+@pytest.mark.asyncio
+async def test_get_items_after_cursor(client: AsyncClient, auth_headers, test_user):
+    """Test paging through items with the id cursor."""
+    for i in range(3):
+        await client.post("/api/v1/items/", json={"title": f"Paged {i}"}, headers=auth_headers)
+
+    url = f"/api/v1/items/?owner_id={test_user.id}&limit=2"
+    first = (await client.get(url)).json()
+    rest = (await client.get(f"{url}&after={first[-1]['id']}")).json()
+    assert [item["title"] for item in first + rest] == ["Paged 0", "Paged 1", "Paged 2"]
+
+    response = await client.get("/api/v1/items/changes?shard=1")
+    assert response.status_code == 400
@@ -0,0 +1,198 @@
+import asyncio
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+
+from app.core.jobs import JOBS_FINISHED, job_runner
+from app.models import Job
+from app.repositories import JobRepository
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+async def running_jobs(monkeypatch, tmp_path):
+    """Run the job runner against the test database."""
+    monkeypatch.setattr(job_runner, "session_factory", TestingSessionLocal)
+    monkeypatch.setattr(job_runner, "result_dir", tmp_path)
+    monkeypatch.setattr(job_runner, "poll_interval", 0.1)
+    await job_runner.start()
+    yield job_runner
+    await job_runner.stop()
+
+
+async def wait_for_job(client: AsyncClient, job_id: str, headers: dict) -> dict:
+    for _ in range(50):
+        response = await client.get(f"/api/v1/jobs/{job_id}", headers=headers)
+        assert response.status_code == 200
+        if response.json()["status"] in ("succeeded", "failed"):
+            return response.json()
+        await asyncio.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+@pytest.mark.asyncio
+async def test_export_items_job(client: AsyncClient, auth_headers, test_user, running_jobs):
+    """Test exporting items through a background job."""
+    for title in ("Exported 1", "Exported 2"):
+        await client.post("/api/v1/items/", json={"title": title}, headers=auth_headers)
+
+    response = await client.post(
+        "/api/v1/jobs/",
+        json={"kind": "export_items", "params": {"owner_id": test_user.id}},
+        headers=auth_headers,
+    )
+    assert response.status_code == 202
+    assert response.json()["status"] == "pending"
+
+    job = await wait_for_job(client, response.json()["id"], auth_headers)
+    assert job["status"] == "succeeded"
+    assert job["result_url"] == f"/api/v1/jobs/{job['id']}/result"
+
+    response = await client.get(job["result_url"], headers=auth_headers)
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["Exported 1", "Exported 2"]
+    assert rows[0]["owner"]["id"] == test_user.id
+
+
+@pytest.mark.asyncio
+async def test_pending_job_picked_up_by_polling(client: AsyncClient, auth_headers, running_jobs):
+    """Test that a job missing from the queue still runs."""
+    async with TestingSessionLocal() as session:
+        job = await JobRepository(session).create("export_items", {}, owner_id=None)
+        await session.commit()
+
+    for _ in range(50):
+        async with TestingSessionLocal() as session:
+            db_job = await JobRepository(session).get_by_id(job.id)
+            if db_job.status == "succeeded":
+                break
+        await asyncio.sleep(0.05)
+    assert db_job.status == "succeeded"
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_recorded(monkeypatch, setup_database, tmp_path):
+    """Test that a handler raising marks the job failed without crashing the run."""
+
+    async def broken(db, job, result_dir):
+        raise RuntimeError("disk on fire")
+
+    monkeypatch.setattr(job_runner, "session_factory", TestingSessionLocal)
+    monkeypatch.setattr(job_runner, "result_dir", tmp_path)
+    monkeypatch.setitem(job_runner.handlers, "broken", broken)
+    async with TestingSessionLocal() as session:
+        job = await JobRepository(session).create("broken", {}, owner_id=None)
+        await session.commit()
+    failed = JOBS_FINISHED.get(kind="broken", status="failed")
+
+    await job_runner.run(job.id)
+
+    async with TestingSessionLocal() as session:
+        db_job = await JobRepository(session).get_by_id(job.id)
+    assert db_job.status == "failed"
+    assert db_job.error == "disk on fire"
+    assert JOBS_FINISHED.get(kind="broken", status="failed") == failed + 1
+
+
+@pytest.mark.asyncio
+async def test_stale_running_job_runs_again(client: AsyncClient, monkeypatch, running_jobs):
+    """Test that a job left running by a dead worker is requeued once its lease lapses."""
+    async with TestingSessionLocal() as session:
+        job = await JobRepository(session).create("export_items", {}, owner_id=None)
+        await session.execute(
+            update(Job)
+            .where(Job.id == job.id)
+            .values(
+                status="running",
+                started_at=datetime.now(UTC) - timedelta(hours=1),
+                lease_until=datetime.now(UTC) - timedelta(minutes=1),
+            )
+        )
+        await session.commit()
+
+    for _ in range(50):
+        async with TestingSessionLocal() as session:
+            db_job = await JobRepository(session).get_by_id(job.id)
+            if db_job.status == "succeeded":
+                break
+        await asyncio.sleep(0.05)
+    assert db_job.status == "succeeded"
+
+
+@pytest.mark.asyncio
+async def test_running_job_keeps_its_lease(client: AsyncClient, monkeypatch, running_jobs):
+    """Test that a job running longer than the lease timeout isn't run twice."""
+    runs = []
+
+    async def slow(db, job, result_dir):
+        runs.append(job.id)
+        await asyncio.sleep(1.0)
+
+    monkeypatch.setattr(job_runner, "lease_timeout", 0.3)
+    monkeypatch.setitem(job_runner.handlers, "slow", slow)
+    async with TestingSessionLocal() as session:
+        job = await JobRepository(session).create("slow", {}, owner_id=None)
+        await session.commit()
+    job_runner.submit(job.id)
+
+    for _ in range(50):
+        async with TestingSessionLocal() as session:
+            db_job = await JobRepository(session).get_by_id(job.id)
+            if db_job.status == "succeeded":
+                break
+        await asyncio.sleep(0.05)
+    assert db_job.status == "succeeded"
+    assert runs == [job.id]
+
+
+@pytest.mark.asyncio
+async def test_requeued_claim_cannot_finish(setup_database):
+    """Test that a run whose job was requeued doesn't overwrite the new run's outcome."""
+    async with TestingSessionLocal() as session:
+        job_repo = JobRepository(session)
+        job = await job_repo.create("export_items", {}, owner_id=None)
+        expired = datetime.now(UTC) - timedelta(seconds=1)
+        first = await job_repo.claim(job.id, lease_until=expired)
+        assert await job_repo.requeue_stale(datetime.now(UTC)) == 1
+        second = await job_repo.claim(job.id, lease_until=datetime.now(UTC) + timedelta(minutes=5))
+        assert first is not None and second is not None
+
+        assert not await job_repo.renew(job.id, first, datetime.now(UTC) + timedelta(minutes=5))
+        assert not await job_repo.finish(job.id, first, error="stale run")
+        assert await job_repo.finish(job.id, second, result_path="result.ndjson")
+        await session.commit()
+
+    async with TestingSessionLocal() as session:
+        db_job = await JobRepository(session).get_by_id(job.id)
+    assert db_job.status == "succeeded"
+    assert db_job.error is None
+    assert db_job.result_path == "result.ndjson"
+
+
+@pytest.mark.asyncio
+async def test_create_job_unknown_kind(client: AsyncClient, auth_headers):
+    """Test submitting a job kind that has no handler."""
+    response = await client.post(
+        "/api/v1/jobs/", json={"kind": "reindex"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_read_job_not_found(client: AsyncClient, auth_headers):
+    """Test reading a job that does not exist."""
+    response = await client.get("/api/v1/jobs/missing", headers=auth_headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_rebuild_stats_job_requires_superuser(client: AsyncClient, auth_headers):
+    """Test that only superusers can submit a stats rebuild."""
+    response = await client.post(
+        "/api/v1/jobs/", json={"kind": "rebuild_stats"}, headers=auth_headers
+    )
+    assert response.status_code == 403
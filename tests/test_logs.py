@@ -0,0 +1,126 @@
+import io
+import json
+import logging
+import queue
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from app.core import logs
+from app.core.logs import (
+    LOG_RECORDS_DROPPED,
+    LogPipeline,
+    LogSampler,
+    RequestLog,
+    _DroppingQueueHandler,
+    access_logger,
+    current_request,
+    query_logger,
+)
+from tests.conftest import test_engine
+
+
+@pytest.fixture
+async def log_output():
+    """Run a log pipeline into a buffer; yields a function returning its records."""
+    stream = io.StringIO()
+    pipeline = LogPipeline([access_logger, query_logger], queue_size=100, stream=stream)
+    await pipeline.start()
+
+    async def records(logger: str):
+        await pipeline.stop()
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        return [record for record in lines if record["logger"] == logger]
+
+    yield records
+    await pipeline.stop()
+
+
+@pytest.mark.asyncio
+async def test_access_log(client: AsyncClient, log_output):
+    """Test that a request is logged with its id, route, status and DB time."""
+    response = await client.get("/api/v1/items/?limit=5", headers={"X-Request-ID": "abc-123"})
+    assert response.status_code == 200
+    assert response.headers["x-request-id"] == "abc-123"
+
+    [record] = await log_output("app.access")
+    assert record["level"] == "INFO"
+    assert record["message"] == "GET /api/v1/items/ 200"
+    assert record["request_id"] == "abc-123"
+    assert record["route"] == "/api/v1/items/"
+    assert record["status"] == 200
+    assert record["duration_seconds"] > 0
+    assert record["db_queries"] >= 1
+    assert 0 < record["db_seconds"] <= record["duration_seconds"]
+
+
+@pytest.mark.asyncio
+async def test_unusable_request_id_is_replaced(client: AsyncClient, log_output):
+    """Test that requests without a plain-token id get a generated one."""
+    response = await client.get("/nowhere", headers={"X-Request-ID": "not a token"})
+    assert response.status_code == 404
+    request_id = response.headers["x-request-id"]
+    assert len(request_id) == 32
+
+    [record] = await log_output("app.access")
+    assert record["request_id"] == request_id
+    # Unmatched paths have no route template
+    assert record["route"] is None
+
+
+@pytest.mark.asyncio
+async def test_excluded_paths_are_not_logged(client: AsyncClient, log_output):
+    """Test that health checks don't show up in the access log."""
+    assert (await client.get("/health")).status_code == 200
+    assert await log_output("app.access") == []
+
+
+@pytest.mark.asyncio
+async def test_query_log(monkeypatch, setup_database, log_output):
+    """Test that queries are logged with the request id they ran for."""
+    monkeypatch.setattr(logs.settings, "QUERY_LOG_ENABLED", True)
+    request = RequestLog("req-1")
+    token = current_request.set(request)
+    try:
+        async with test_engine.connect() as conn:
+            await conn.execute(text("SELECT 42"))
+    finally:
+        current_request.reset(token)
+
+    assert request.db_queries == 1
+    [record] = [
+        record for record in await log_output("app.query") if record["message"] == "SELECT 42"
+    ]
+    assert record["request_id"] == "req-1"
+    assert record["database"] == "test"
+    assert record["duration_seconds"] >= 0
+
+
+def test_sampler_rate_and_cap():
+    """Test that sampling keeps the sampled share, always-records, and the cap."""
+    draws = iter([0.05, 0.5, 0.95])
+    sampler = LogSampler("test", rate=0.1, rng=lambda: next(draws))
+    assert [sampler.keep() for _ in range(3)] == [True, False, False]
+    assert sampler.keep(always=True)
+
+    capped = LogSampler("test", rate=1.0, max_per_second=2)
+    dropped = LOG_RECORDS_DROPPED.get(logger="test", reason="capped")
+    kept = [capped.keep(always=True) for _ in range(5)]
+    # All five calls land in the same second unless one crosses a boundary
+    assert kept[:2] == [True, True]
+    assert kept.count(True) <= 4
+    assert LOG_RECORDS_DROPPED.get(logger="test", reason="capped") - dropped == kept.count(False)
+
+
+def test_full_queue_drops_records():
+    """Test that logging never blocks on a full queue."""
+    handler = _DroppingQueueHandler(queue.Queue(1))
+    record = logging.LogRecord("app.access", logging.INFO, __file__, 1, "msg", (), None)
+    dropped = LOG_RECORDS_DROPPED.get(logger="app.access", reason="queue_full")
+
+    handler.handle(record)
+    handler.handle(record)
+
+    assert handler.queue.qsize() == 1
+    assert LOG_RECORDS_DROPPED.get(logger="app.access", reason="queue_full") == dropped + 1
@@ -0,0 +1,32 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from app.core.loop_monitor import EVENT_LOOP_BLOCKS, EVENT_LOOP_LAG, EventLoopMonitor
+
+
+def block_the_loop():
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_measured_and_logged(caplog):
+    """Test that a blocked loop shows up as lag and its stack is logged."""
+    monitor = EventLoopMonitor(interval=0.01, block_threshold=0.1)
+    lag_count, lag_sum = EVENT_LOOP_LAG.get_count(), EVENT_LOOP_LAG.get_sum()
+    blocks = EVENT_LOOP_BLOCKS.get()
+
+    with caplog.at_level(logging.WARNING, logger="app.core.loop_monitor"):
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        block_the_loop()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    assert EVENT_LOOP_LAG.get_count() > lag_count
+    assert EVENT_LOOP_LAG.get_sum() - lag_sum >= 0.2
+    # Logged once for the one stall
+    assert EVENT_LOOP_BLOCKS.get() == blocks + 1
+    assert "block_the_loop" in caplog.text
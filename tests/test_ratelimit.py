@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from app.core import ratelimit
+from app.core.events import broker
+from app.core.ratelimit import MemoryRateLimitBackend, RateLimit
+
+
+def test_parse_rate_limit():
+    """Test parsing rate limit settings."""
+    assert RateLimit.parse("10/minute") == RateLimit(burst=10, rate=10 / 60)
+    assert RateLimit.parse("5/seconds") == RateLimit(burst=5, rate=5.0)
+    assert RateLimit.parse("") is None
+    with pytest.raises(ValueError):
+        RateLimit.parse("10/fortnight")
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_token_bucket(monkeypatch):
+    """Test bursts, refills and sweeping of full buckets."""
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    backend = MemoryRateLimitBackend(shards=1, max_keys_per_shard=2)
+    limit = RateLimit(burst=3, rate=1.0)
+
+    results = [await backend.hit("a", limit) for _ in range(4)]
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results] == [2, 1, 0, 0]
+    assert results[-1].retry_after == pytest.approx(1.0)
+    assert results[-1].headers()["Retry-After"] == "1"
+
+    now[0] += 1.5
+    result = await backend.hit("a", limit)
+    assert result.allowed and result.remaining == 0
+    assert result.reset_after == pytest.approx(2.5)
+
+    # "b" refills completely and is swept once the shard overflows
+    await backend.hit("b", limit)
+    now[0] += 10
+    await backend.hit("c", limit)
+    assert set(backend._shards[0].buckets) == {"c"}
+
+
+@pytest.mark.asyncio
+async def test_login_rate_limited_per_ip(client: AsyncClient, test_user):
+    """Test that the auth router limits logins per client IP."""
+    login_data = {"username": test_user.username, "password": "wrong"}
+    for _ in range(10):
+        response = await client.post("/api/v1/auth/login", json=login_data)
+        assert response.status_code == 401
+
+    response = await client.post("/api/v1/auth/login", json=login_data)
+    assert response.status_code == 429
+    assert response.headers["ratelimit-limit"] == "10"
+    assert response.headers["ratelimit-remaining"] == "0"
+    assert int(response.headers["retry-after"]) >= 1
+
+
+@pytest.mark.asyncio
+async def test_items_rate_limited_per_user(client: AsyncClient, auth_headers):
+    """Test that authenticated requests use a bucket of their own."""
+    # Cached responses are served without reaching the limiter
+    no_cache = {"Cache-Control": "no-cache"}
+    anonymous = await client.get("/api/v1/items/", headers=no_cache)
+    first = await client.get("/api/v1/items/", headers={**auth_headers, **no_cache})
+    second = await client.get("/api/v1/items/", headers={**auth_headers, **no_cache})
+    assert anonymous.headers["ratelimit-remaining"] == "299"
+    assert first.headers["ratelimit-remaining"] == "299"
+    assert second.headers["ratelimit-remaining"] == "298"
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_has_rate_limit_headers(client: AsyncClient, auth_headers):
+    """Test that responses the endpoint builds itself still carry the headers."""
+    request = asyncio.ensure_future(client.get("/api/v1/items/stream", headers=auth_headers))
+    for _ in range(100):
+        if broker._subscribers:
+            break
+        await asyncio.sleep(0.01)
+    # End the otherwise endless event stream
+    for subscription in list(broker._subscribers):
+        broker._drop(subscription)
+
+    response = await request
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["ratelimit-limit"] == "300"
+    assert response.headers["ratelimit-remaining"] == "299"
@@ -0,0 +1,208 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import security
+from app.core.events import broker
+from app.core.http_cache import response_cache
+from app.models import ItemChange, UserItemStats
+from app.repositories import ItemRepository, UserItemStatsRepository, UserRepository
+from app.schemas import ItemCreate, ItemUpdate
+
+
+@pytest.mark.asyncio
+async def test_user_lookups(db_session: AsyncSession, test_user):
+    """Test the pre-built user lookup statements."""
+    user_repo = UserRepository(db_session)
+
+    by_username = await user_repo.get_by_username(test_user.username)
+    by_email = await user_repo.get_by_email(test_user.email)
+    by_id = await user_repo.get_by_id(test_user.id)
+
+    assert by_username.id == by_email.id == by_id.id == test_user.id
+    assert await user_repo.get_by_username("no-such-user") is None
+
+
+@pytest.mark.asyncio
+async def test_authenticate_rehashes_outdated_hashes(
+    db_session: AsyncSession, test_user, monkeypatch
+):
+    """Test that logins upgrade hashes to the configured scheme and cost."""
+    user_repo = UserRepository(db_session)
+    password = test_user._test_password
+    assert test_user.hashed_password.startswith("$2b$12$")
+
+    # A cheaper bcrypt cost, then argon2id with bcrypt kept for verification
+    monkeypatch.setattr(security, "pwd_context", security.create_password_context(bcrypt_rounds=4))
+    assert await user_repo.authenticate(test_user.username, "wrong") is None
+    assert test_user.hashed_password.startswith("$2b$12$")
+    user = await user_repo.authenticate(test_user.username, password)
+    assert user.hashed_password.startswith("$2b$04$")
+
+    monkeypatch.setattr(
+        security,
+        "pwd_context",
+        security.create_password_context(
+            ["argon2", "bcrypt"], argon2_time_cost=1, argon2_memory_cost=1024
+        ),
+    )
+    user = await user_repo.authenticate(test_user.username, password)
+    assert user.hashed_password.startswith("$argon2id$v=19$m=1024,t=1,p=4$")
+    rehashed = user.hashed_password
+    assert (await user_repo.authenticate(test_user.username, password)).hashed_password == rehashed
+
+
+@pytest.mark.asyncio
+async def test_get_multi_items_by_owner(db_session: AsyncSession, test_user):
+    """Test paginating items with and without an owner filter."""
+    item_repo = ItemRepository(db_session)
+    for i in range(3):
+        await item_repo.create(ItemCreate(title=f"Repo Item {i}"), owner_id=test_user.id)
+
+    owned = await item_repo.get_multi(owner_id=test_user.id)
+    assert [item.title for item in owned] == [f"Repo Item {i}" for i in range(3)]
+    assert all(item.owner.id == test_user.id for item in owned)
+
+    page = await item_repo.get_multi(skip=1, limit=1, owner_id=test_user.id)
+    assert [item.title for item in page] == ["Repo Item 1"]
+
+    assert len(await item_repo.get_multi(limit=2)) <= 2
+
+
+@pytest.mark.asyncio
+async def test_get_multi_rows(db_session: AsyncSession, test_user):
+    """Test the column-level read path returns response-shaped dicts."""
+    item_repo = ItemRepository(db_session)
+    await item_repo.create(ItemCreate(title="Row Item", price=250), owner_id=test_user.id)
+
+    rows = await item_repo.get_multi_rows(owner_id=test_user.id)
+    assert len(rows) == 1
+    assert rows[0]["title"] == "Row Item"
+    assert rows[0]["price"] == 250
+    assert rows[0]["owner"]["username"] == test_user.username
+    assert "hashed_password" not in rows[0]["owner"]
+
+    rows = await item_repo.get_multi_rows(owner_id=test_user.id, include_owner=False)
+    assert "owner" not in rows[0]
+
+
+@pytest.mark.asyncio
+async def test_user_item_stats_maintained(db_session: AsyncSession, test_user):
+    """Test that item writes keep the owner's stats in step."""
+    item_repo = ItemRepository(db_session)
+    stats_repo = UserItemStatsRepository(db_session)
+
+    cheap = await item_repo.create(ItemCreate(title="Cheap", price=100), owner_id=test_user.id)
+    await item_repo.create(ItemCreate(title="Dear", price=900), owner_id=test_user.id)
+    await item_repo.create(ItemCreate(title="Unpriced"), owner_id=test_user.id)
+    stats = await stats_repo.get(test_user.id)
+    assert (stats.item_count, stats.active_count, stats.price_sum) == (3, 3, 1000)
+    assert (stats.price_min, stats.price_max) == (100, 900)
+
+    await item_repo.update(cheap.id, ItemUpdate(price=500, is_active=False))
+    stats = await stats_repo.get(test_user.id)
+    assert (stats.item_count, stats.active_count, stats.price_sum) == (3, 2, 1400)
+    assert (stats.price_min, stats.price_max) == (500, 900)
+
+    await item_repo.delete(cheap.id)
+    stats = await stats_repo.get(test_user.id)
+    assert (stats.item_count, stats.active_count, stats.price_sum) == (2, 2, 900)
+    assert (stats.price_min, stats.price_max) == (900, 900)
+
+
+@pytest.mark.asyncio
+async def test_user_item_stats_rebuilt_when_missing(db_session: AsyncSession, test_user):
+    """Test that a missing stats row is rebuilt from the items table."""
+    item_repo = ItemRepository(db_session)
+    stats_repo = UserItemStatsRepository(db_session)
+    await item_repo.create(ItemCreate(title="Before", price=300), owner_id=test_user.id)
+    await db_session.execute(delete(UserItemStats).where(UserItemStats.user_id == test_user.id))
+
+    # The next write rebuilds the row, which already includes the new item
+    await item_repo.create(ItemCreate(title="After", price=200), owner_id=test_user.id)
+    stats = await stats_repo.get(test_user.id)
+    assert (stats.item_count, stats.price_sum, stats.price_min) == (2, 500, 200)
+
+    await db_session.execute(delete(UserItemStats).where(UserItemStats.user_id == test_user.id))
+    stats = await stats_repo.get(test_user.id)
+    assert (stats.item_count, stats.price_max) == (2, 300)
+
+    assert await stats_repo.get(-1) is None
+    assert await stats_repo.rebuild() >= 1
+
+
+@pytest.mark.asyncio
+async def test_stats_insert_race_keeps_transaction_side_effects(
+    db_session: AsyncSession, test_user, monkeypatch
+):
+    """Test that losing the stats row insert race still publishes the write's events."""
+
+    async def lose_race(self, user_id=None):
+        raise IntegrityError("INSERT INTO user_item_stats", {}, Exception("duplicate"))
+
+    await db_session.execute(delete(UserItemStats).where(UserItemStats.user_id == test_user.id))
+    await db_session.commit()
+    monkeypatch.setattr(UserItemStatsRepository, "rebuild", lose_race)
+    subscription = broker.subscribe(lambda event: event["owner_id"] == test_user.id)
+    try:
+        await ItemRepository(db_session).create(ItemCreate(title="Raced"), owner_id=test_user.id)
+        generation = response_cache.generation
+        await db_session.commit()
+
+        event = await subscription.get(timeout=1)
+        assert event["type"] == "item.created"
+        assert response_cache.generation == generation + 1
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@pytest.mark.asyncio
+async def test_change_feed_waits_for_recent_gaps(db_session: AsyncSession):
+    """Test that the change feed doesn't read past an id that may still commit."""
+    item_repo = ItemRepository(db_session)
+    since = await db_session.scalar(select(func.coalesce(func.max(ItemChange.id), 0)))
+    # The write given since + 1 hasn't committed; since + 2 has
+    await db_session.execute(
+        insert(ItemChange),
+        [{"id": since + 2, "item_id": -2, "owner_id": None, "operation": "delete"}],
+    )
+    await db_session.commit()
+
+    changes, cursor, has_more = await item_repo.get_changes(since=since)
+    assert (changes, cursor, has_more) == ([], since, False)
+
+    await db_session.execute(
+        insert(ItemChange),
+        [{"id": since + 1, "item_id": -1, "owner_id": None, "operation": "delete"}],
+    )
+    await db_session.commit()
+    changes, cursor, _ = await item_repo.get_changes(since=since)
+    assert [change["item_id"] for change in changes] == [-1, -2]
+    assert cursor == since + 2
+
+
+@pytest.mark.asyncio
+async def test_change_feed_reads_past_old_gaps(db_session: AsyncSession):
+    """Test that a gap left by a rolled-back write stops holding the feed back."""
+    since = await db_session.scalar(select(func.coalesce(func.max(ItemChange.id), 0)))
+    changed_at = datetime.now(UTC) - timedelta(minutes=5)
+    await db_session.execute(
+        insert(ItemChange),
+        [
+            {
+                "id": since + 2,
+                "item_id": -2,
+                "owner_id": None,
+                "operation": "delete",
+                "changed_at": changed_at,
+            }
+        ],
+    )
+    await db_session.commit()
+
+    changes, cursor, _ = await ItemRepository(db_session).get_changes(since=since)
+    assert [change["item_id"] for change in changes] == [-2]
+    assert cursor == since + 2
@@ -0,0 +1,106 @@
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.revocation import BloomFilter, TokenDenylist
+from app.models import RevokedToken
+from tests.conftest import TestingSessionLocal
+
+
+def test_bloom_filter_error_rate():
+    """Test that added keys are always found and others rarely are."""
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    added = [uuid.uuid4().hex for _ in range(10_000)]
+    for key in added:
+        bloom.add(key)
+    assert all(key in bloom for key in added)
+
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10_000))
+    assert false_positives < 200
+
+
+@pytest.mark.asyncio
+async def test_revocations_reach_other_workers(db_session: AsyncSession):
+    """Test that a worker picks up another worker's revocations on sync."""
+    first = TokenDenylist(TestingSessionLocal, capacity=100, error_rate=0.001, sync_interval=1)
+    second = TokenDenylist(TestingSessionLocal, capacity=100, error_rate=0.001, sync_interval=1)
+    await second.rebuild()
+    jti = uuid.uuid4().hex
+    expires_at = datetime.now(UTC) + timedelta(minutes=5)
+
+    assert await first.revoke(db_session, jti, expires_at)
+    assert not await first.revoke(db_session, jti, expires_at)
+    await db_session.commit()
+    assert await first.is_revoked(jti)
+    assert not await second.is_revoked(jti)
+
+    await second.sync()
+    assert await second.is_revoked(jti)
+    assert not await second.is_revoked(uuid.uuid4().hex)
+
+
+@pytest.mark.asyncio
+async def test_expired_revocations_are_purged(db_session: AsyncSession):
+    """Test that purging drops expired revocations from table and filter."""
+    denylist = TokenDenylist(TestingSessionLocal, capacity=100, error_rate=0.001, sync_interval=1)
+    expired, live = uuid.uuid4().hex, uuid.uuid4().hex
+    await denylist.revoke(db_session, expired, datetime.now(UTC) - timedelta(seconds=1))
+    await denylist.revoke(db_session, live, datetime.now(UTC) + timedelta(minutes=5))
+    await db_session.commit()
+
+    await denylist.purge()
+    assert expired not in denylist._filter
+    assert not await denylist.is_revoked(expired)
+    assert await denylist.is_revoked(live)
+
+
+@pytest.mark.asyncio
+async def test_late_commit_is_synced(db_session: AsyncSession):
+    """Test that a revocation committing after a higher id was synced isn't missed."""
+    denylist = TokenDenylist(TestingSessionLocal, capacity=100, error_rate=0.001, sync_interval=1)
+    await denylist.rebuild()
+    expires_at = datetime.now(UTC) + timedelta(minutes=5)
+    late, early = uuid.uuid4().hex, uuid.uuid4().hex
+    # The transaction given the lower id commits last
+    first_id = denylist._last_id + 1
+    await db_session.execute(
+        insert(RevokedToken), [{"id": first_id + 1, "jti": early, "expires_at": expires_at}]
+    )
+    await db_session.commit()
+    await denylist.sync()
+    assert await denylist.is_revoked(early)
+
+    await db_session.execute(
+        insert(RevokedToken), [{"id": first_id, "jti": late, "expires_at": expires_at}]
+    )
+    await db_session.commit()
+    await denylist.sync()
+    assert await denylist.is_revoked(late)
+    assert first_id not in denylist._gaps
+
+
+@pytest.mark.asyncio
+async def test_late_commit_during_rebuild_is_synced(db_session: AsyncSession):
+    """Test that a rebuild keeps checking ids it found no revocation for."""
+    denylist = TokenDenylist(TestingSessionLocal, capacity=100, error_rate=0.001, sync_interval=1)
+    await denylist.rebuild()
+    expires_at = datetime.now(UTC) + timedelta(minutes=5)
+    late, early = uuid.uuid4().hex, uuid.uuid4().hex
+    first_id = denylist._last_id + 1
+    await db_session.execute(
+        insert(RevokedToken), [{"id": first_id + 1, "jti": early, "expires_at": expires_at}]
+    )
+    await db_session.commit()
+    await denylist.rebuild()
+    assert first_id in denylist._gaps
+
+    await db_session.execute(
+        insert(RevokedToken), [{"id": first_id, "jti": late, "expires_at": expires_at}]
+    )
+    await db_session.commit()
+    await denylist.sync()
+    assert await denylist.is_revoked(late)
+    assert first_id not in denylist._gaps
@@ -0,0 +1,63 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.serialization import msgpack_available, packb, prefers_msgpack, unpackb
+
+pytestmark = pytest.mark.skipif(not msgpack_available(), reason="msgpack is not installed")
+
+MSGPACK = {"Accept": "application/msgpack", "Content-Type": "application/msgpack"}
+
+
+def test_prefers_msgpack():
+    """Test that MessagePack is only chosen when asked for by name."""
+    assert prefers_msgpack("application/msgpack")
+    assert prefers_msgpack("application/x-msgpack, application/json;q=0.5")
+    assert not prefers_msgpack("application/json, application/msgpack;q=0.5")
+    assert not prefers_msgpack("*/*")
+    assert not prefers_msgpack("")
+
+
+@pytest.mark.asyncio
+async def test_item_round_trip(client: AsyncClient, auth_headers):
+    """Test creating and reading items as MessagePack, matching the JSON responses."""
+    response = await client.post(
+        "/api/v1/items/",
+        content=packb({"title": "Packed", "description": "Binary body", "price": 250}),
+        headers={**auth_headers, **MSGPACK},
+    )
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/msgpack"
+    assert "Accept" in response.headers["vary"]
+    item = unpackb(response.content)
+    assert item["title"] == "Packed" and item["price"] == 250
+
+    packed = await client.get(f"/api/v1/items/{item['id']}", headers=MSGPACK)
+    as_json = await client.get(f"/api/v1/items/{item['id']}")
+    assert as_json.headers["content-type"] == "application/json"
+    assert unpackb(packed.content) == as_json.json()
+
+    listing = await client.get("/api/v1/items/?limit=5", headers={"Accept": "application/msgpack"})
+    assert unpackb(listing.content) == (await client.get("/api/v1/items/?limit=5")).json()
+
+
+@pytest.mark.asyncio
+async def test_msgpack_body_errors(client: AsyncClient, auth_headers):
+    """Test that MessagePack bodies are validated like JSON ones."""
+    response = await client.post(
+        "/api/v1/items/", content=packb({"price": 10}), headers={**auth_headers, **MSGPACK}
+    )
+    assert response.status_code == 422
+
+    response = await client.post(
+        "/api/v1/items/", content=b"\xc1", headers={**auth_headers, **MSGPACK}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_user_as_msgpack(client: AsyncClient, auth_headers, test_user):
+    """Test that user responses go through UserResponse in MessagePack too."""
+    response = await client.get("/api/v1/users/me", headers={**auth_headers, **MSGPACK})
+    user = unpackb(response.content)
+    assert user["username"] == test_user.username
+    assert "hashed_password" not in user
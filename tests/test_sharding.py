@@ -0,0 +1,131 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.database import SHARD_ID_BITS, ShardRouter, create_tables
+from app.models import Item, ItemChange, User, UserItemStats
+from app.repositories import ItemRepository, UserItemStatsRepository, UserRepository
+from app.schemas import ItemCreate, ItemUpdate
+
+
+@pytest.fixture
+async def sharded(tmp_path):
+    """A default database for users and two item shards, as SQLite files."""
+    default_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/default.db")
+    item_engines = [
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/items{index}.db")
+        for index in range(2)
+    ]
+    router = ShardRouter(default_engine, item_engines)
+    await create_tables(router)
+
+    session_factory = router.session_factory()
+    async with session_factory() as session:
+        user_repo = UserRepository(session)
+        # Owners 1 and 3 land on shard 1, owner 2 on shard 0
+        for name in ("alice", "bob", "carol"):
+            await user_repo.create(
+                {"username": name, "email": f"{name}@example.com", "hashed_password": "x"}
+            )
+        await session.commit()
+    yield router, session_factory
+
+    for engine in router.engines.values():
+        await engine.dispose()
+
+
+async def _owner_ids(engine, model) -> list:
+    async with engine.connect() as conn:
+        column = model.user_id if model is UserItemStats else model.owner_id
+        return (await conn.execute(select(column).order_by(column))).scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_items_routed_to_owner_shard(sharded):
+    """Test that item writes land on the owner's shard with shard-ranged ids."""
+    router, session_factory = sharded
+    async with session_factory() as session:
+        item_repo = ItemRepository(session)
+        bobs = await item_repo.create(ItemCreate(title="Bob's", price=100), owner_id=2)
+        alices = await item_repo.create(ItemCreate(title="Alice's", price=300), owner_id=1)
+        await item_repo.create_many(
+            [ItemCreate(title="Carol's", price=50), ItemCreate(title="Carol's 2")], owner_id=3
+        )
+        await session.commit()
+
+    assert bobs.id < 1 << SHARD_ID_BITS
+    assert alices.id > 1 << SHARD_ID_BITS
+    shard0, shard1 = (router.engines[shard] for shard in router.item_shards)
+    assert await _owner_ids(shard0, Item) == [2]
+    assert await _owner_ids(shard1, Item) == [1, 3, 3]
+    assert await _owner_ids(shard1, ItemChange) == [1, 3, 3]
+    assert await _owner_ids(shard0, UserItemStats) == [2]
+    assert await _owner_ids(shard1, UserItemStats) == [1, 3]
+    assert await _owner_ids(router.engines["default"], Item) == []
+
+    async with session_factory() as session:
+        item_repo = ItemRepository(session)
+        item = await item_repo.get_by_id(alices.id)
+        assert item.owner.username == "alice"
+
+        await item_repo.update(alices.id, ItemUpdate(price=500))
+        assert await item_repo.delete(bobs.id)
+        await session.commit()
+
+        stats_repo = UserItemStatsRepository(session)
+        assert (await stats_repo.get(1)).price_sum == 500
+        assert (await stats_repo.get(2)).item_count == 0
+        owners = await stats_repo.get_top_by_value(limit=2)
+        assert [stats.user_id for stats in owners] == [1, 3]
+
+
+@pytest.mark.asyncio
+async def test_listing_merges_shards(sharded):
+    """Test cross-owner listings gathered from every shard in id order."""
+    _, session_factory = sharded
+    async with session_factory() as session:
+        item_repo = ItemRepository(session)
+        for owner_id in (1, 2, 3, 2):
+            await item_repo.create(ItemCreate(title=f"Owner {owner_id}"), owner_id=owner_id)
+        await session.commit()
+
+        rows = await item_repo.get_multi_rows(limit=10)
+        ids = [row["id"] for row in rows]
+        assert len(ids) == 4 and ids == sorted(ids)
+        assert {row["owner"]["username"] for row in rows} == {"alice", "bob", "carol"}
+
+        # Cursor pagination and offsets give the same pages
+        first = await item_repo.get_multi_rows(limit=3, include_owner=False)
+        rest = await item_repo.get_multi_rows(limit=3, after_id=first[-1]["id"])
+        assert [row["id"] for row in first + rest] == ids
+        assert await item_repo.get_multi_rows(skip=3, limit=3) == rest
+        assert [item.id for item in await item_repo.get_multi(skip=1, limit=2)] == ids[1:3]
+
+        bobs = await item_repo.get_multi_rows(owner_id=2)
+        assert [row["title"] for row in bobs] == ["Owner 2", "Owner 2"]
+
+        summary = await item_repo.get_price_summary()
+        assert summary["count"] == 4
+
+        exported = [row async for rows in item_repo.stream_rows(chunk_size=2) for row in rows]
+        assert sorted(row["id"] for row in exported) == ids
+
+        user = await UserRepository(session).get_by_id(2)
+        assert len(user.items) == 2
+
+
+@pytest.mark.asyncio
+async def test_change_feed_per_shard(sharded):
+    """Test that every item shard keeps its own change feed."""
+    _, session_factory = sharded
+    async with session_factory() as session:
+        item_repo = ItemRepository(session)
+        bobs = await item_repo.create(ItemCreate(title="Bob's"), owner_id=2)
+        alices = await item_repo.create(ItemCreate(title="Alice's"), owner_id=1)
+        await session.commit()
+
+        changes, _, _ = await item_repo.get_changes(shard=0)
+        assert [change["item_id"] for change in changes] == [bobs.id]
+        changes, _, _ = await item_repo.get_changes(shard=1)
+        assert [change["item_id"] for change in changes] == [alices.id]
+        assert changes[0]["item"]["owner"]["username"] == "alice"
@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select, update
+
+from app.core.snapshots import pa, export_snapshot
+from app.models import Item, User
+from app.repositories import ItemRepository
+from app.schemas import ItemCreate, ItemUpdate
+
+pytestmark = pytest.mark.skipif(pa is None, reason="pyarrow is not installed")
+
+
+def _read_table(directory, format: str):
+    files = sorted(directory.glob(f"part-*.{format}"))
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        tables = [pq.read_table(path) for path in files]
+    else:
+        tables = [pa.ipc.open_file(path).read_all() for path in files]
+    return pa.concat_tables(tables)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+async def test_full_export(db_session, test_user, tmp_path, format: str):
+    """Test that both tables are exported without password hashes."""
+    await ItemRepository(db_session).create_many(
+        [ItemCreate(title=f"Snapshot {i}", price=i) for i in range(25)], owner_id=test_user.id
+    )
+    await db_session.commit()
+
+    report = await export_snapshot(db_session, str(tmp_path), format, partition_size=10)
+    assert not report["incremental"]
+
+    users = _read_table(tmp_path / "users", format)
+    assert "hashed_password" not in users.column_names
+    assert users.num_rows == await db_session.scalar(select(func.count(User.id)))
+    items = _read_table(tmp_path / "items", format)
+    assert items.num_rows == await db_session.scalar(select(func.count(Item.id)))
+    assert items.num_rows == report["tables"]["items"]["rows"]
+    assert sorted(items.column("id").to_pylist()) == items.column("id").to_pylist()
+    assert str(items.schema.field("created_at").type) == "timestamp[us, tz=UTC]"
+
+
+@pytest.mark.asyncio
+async def test_incremental_export(db_session, test_user, tmp_path):
+    """Test that later exports only rewrite changed partitions."""
+    item_repo = ItemRepository(db_session)
+    await item_repo.create_many(
+        [ItemCreate(title=f"Incremental {i}") for i in range(30)], owner_id=test_user.id
+    )
+    # Everything so far was written long before the first export
+    long_ago = datetime(2020, 1, 1)
+    await db_session.execute(update(User).values(updated_at=long_ago))
+    await db_session.execute(update(Item).values(updated_at=long_ago))
+    await db_session.commit()
+    await export_snapshot(db_session, str(tmp_path), "parquet", partition_size=10)
+
+    report = await export_snapshot(db_session, str(tmp_path), "parquet", partition_size=10)
+    assert report["incremental"]
+    assert report["tables"]["items"]["rewritten"] == []
+
+    ids = (
+        await db_session.scalars(
+            select(Item.id).where(Item.owner_id == test_user.id).order_by(Item.id)
+        )
+    ).all()
+    await item_repo.update(ids[0], ItemUpdate(title="Renamed"))
+    await item_repo.delete(ids[-1])
+    await db_session.commit()
+
+    report = await export_snapshot(db_session, str(tmp_path), "parquet", partition_size=10)
+    # The delete may have emptied its partition, which is then removed
+    items_report = report["tables"]["items"]
+    assert {*items_report["rewritten"], *items_report["removed"]} == {ids[0] // 10, ids[-1] // 10}
+    assert report["tables"]["users"]["rewritten"] == []
+    items = _read_table(tmp_path / "items", "parquet").to_pylist()
+    titles = {item["id"]: item["title"] for item in items}
+    assert titles[ids[0]] == "Renamed"
+    assert ids[-1] not in titles
+    assert len(items) == await db_session.scalar(select(func.count(Item.id)))
+
+    report = await export_snapshot(db_session, str(tmp_path), "arrow", partition_size=10)
+    assert not report["incremental"]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_job_requires_superuser(client: AsyncClient, auth_headers):
+    """Test that only superusers can export snapshots."""
+    response = await client.post(
+        "/api/v1/jobs/", json={"kind": "export_snapshot"}, headers=auth_headers
+    )
+    assert response.status_code == 403
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from jose import JWTError, jwt
+
+from app.core.tokens import TOKEN_CACHE, JWTCodec, VerifiedTokenCache
+
+
+def _pem_pair(private_key):
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    return private_pem, public_pem
+
+
+@pytest.mark.parametrize(
+    "algorithm, generate_key",
+    [
+        ("ES256", lambda: ec.generate_private_key(ec.SECP256R1())),
+        ("EdDSA", Ed25519PrivateKey.generate),
+    ],
+)
+def test_asymmetric_tokens_verify_with_public_key(algorithm, generate_key):
+    """Test that a public key alone verifies tokens but can't issue them."""
+    private_pem, public_pem = _pem_pair(generate_key())
+    issuer = JWTCodec(algorithm, private_key=private_pem)
+    verifier = JWTCodec(algorithm, public_key=public_pem)
+    claims = {"sub": "alice", "exp": int(time.time()) + 60}
+
+    token = issuer.encode(claims)
+    assert jwt.get_unverified_header(token)["alg"] == algorithm
+    assert verifier.decode(token)["sub"] == "alice"
+    with pytest.raises(RuntimeError):
+        verifier.encode(claims)
+
+    other_pem, _ = _pem_pair(generate_key())
+    with pytest.raises(JWTError):
+        verifier.decode(JWTCodec(algorithm, private_key=other_pem).encode(claims))
+    with pytest.raises(JWTError):
+        verifier.decode(JWTCodec("HS256", secret_key="secret").encode(claims))
+
+
+def test_repeat_verifications_hit_cache():
+    """Test that a verified token is served from the cache until it expires."""
+    codec = JWTCodec("HS256", secret_key="secret")
+    token = codec.encode({"sub": "alice", "exp": int(time.time()) + 60})
+    hits_before = TOKEN_CACHE.get(result="hit")
+
+    codec.decode(token)
+    claims = codec.decode(token)
+    claims["sub"] = "mallory"
+    assert codec.decode(token)["sub"] == "alice"
+    assert TOKEN_CACHE.get(result="hit") == hits_before + 2
+
+    expired = codec.encode({"sub": "alice", "exp": int(time.time()) - 1})
+    codec.cache.put(expired, {"sub": "alice", "exp": int(time.time()) - 1})
+    with pytest.raises(JWTError):
+        codec.decode(expired)
+    assert codec.cache.get(expired) is None
+
+
+def test_cache_evicts_least_recently_used():
+    """Test that the cache stays within its size, dropping the oldest use."""
+    cache = VerifiedTokenCache(max_size=2)
+    exp = time.time() + 60
+    cache.put("a", {"sub": "a", "exp": exp})
+    cache.put("b", {"sub": "b", "exp": exp})
+    assert cache.get("a") is not None
+    cache.put("c", {"sub": "c", "exp": exp})
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a")["sub"] == "a" and cache.get("c")["sub"] == "c"
@@ -90,3 +90,22 @@ async def test_unauthorized_access(client: AsyncClient):
     """Test accessing protected endpoints without authentication."""
     response = await client.get("/api/v1/users/")
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_get_user_stats(client: AsyncClient, auth_headers, test_user):
+    """Test reading item statistics for the current and a specific user."""
+    await client.post("/api/v1/items/", json={"title": "Stat", "price": 42}, headers=auth_headers)
+
+    response = await client.get("/api/v1/users/me/stats", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["user_id"] == test_user.id
+    assert data["item_count"] == 1
+    assert data["price_sum"] == data["price_min"] == data["price_max"] == 42
+
+    response = await client.get(f"/api/v1/users/{test_user.id}/stats", headers=auth_headers)
+    assert response.json() == data
+
+    response = await client.get("/api/v1/users/999999/stats", headers=auth_headers)
+    assert response.status_code == 404